@@ -0,0 +1,532 @@
+# -*- coding: UTF-8 -*-
+# A compact, array-backed form of a parse tree.
+#
+# An ArenaTree keeps one row per element, in parallel typed arrays (class, marker, offsets,
+# parent / first child / next sibling, depth, value), with text as offsets into the source
+# rather than strings. Elements are created only when asked for: ArenaNode is a light view
+# of a row, ArenaTree.to_results() materializes (part of) the tree as ParserResults.
+#
+#   tree = ArenaTree.from_text(text)
+#   tree.get_verse(3, 16).start
+#   for verse in tree.iter_verses(): ...
+#   results = tree.to_results(chapter=3)
+
+import collections
+from array import array
+
+from .Parser import Parser, ParserResults, VerseText
+
+from .Elements.Element import Element, ParsingFailedElement
+from .Elements.Text import Text
+from .Elements.Whitespace import Whitespace
+from .Elements.ChildElement import ChildElement
+from .Elements.ParentElement import ParentElement
+from .Elements.MarkerElement import MarkerElement
+from .Elements.NumberedElement import NumberedElement
+from .Elements.SpanMarkerElement import SpanMarkerElement
+from .Elements.ConvertableElements import VerseNumberSequence
+from .Elements.ParagraphMarkerElements import D, SP
+from .Elements.CharacterMarkerElements import W
+from .Elements.NoteMarkerElements import F, FE, X
+from .Elements.MilestoneMarkerElements import C, V, MilestoneMarkerElement
+
+
+NO_NODE = -1
+
+# Bits in ArenaTree.flags
+FLAG_PSALM_119_SKIP = 1     # D._psalm_119_skip
+FLAG_NO_DEPTH = 2           # element had no _depth (so repr() uses its default)
+FLAG_NO_CHAPTER = 4         # V not in a chapter (after a \c that failed to parse)
+
+# Text is parsed in chunks of about this many characters by ArenaTree.from_text()
+FROM_TEXT_CHUNK_SIZE = 65536
+
+
+class ArenaNode:
+    """A view of one element (row) in an ArenaTree. Create the element itself with
+       element()."""
+
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def cls(self):
+        return self.tree.classes[self.tree.kind[self.index]]
+
+    @property
+    def marker(self):
+        return self.tree.markers[self.tree.marker[self.index]]
+
+    @property
+    def start(self):
+        return self.tree.start[self.index]
+
+    @property
+    def end(self):
+        return self.tree.end[self.index]
+
+    @property
+    def depth(self):
+        return self.tree.depth[self.index]
+
+    @property
+    def value(self):
+        return self.tree.get_value(self.index)
+
+    @property
+    def text(self):
+        """Text of a Text or Whitespace element"""
+        return self.tree.get_node_text(self.index)
+
+    @property
+    def parent(self):
+        return self.tree.node(self.tree.parent[self.index])
+
+    @property
+    def next_sibling(self):
+        return self.tree.node(self.tree.next_sibling[self.index])
+
+    @property
+    def children(self):
+        return [ArenaNode(self.tree, x) for x in self.tree.iter_children(self.index)]
+
+    def element(self):
+        """Create this element, with its descendants (but not its parents)"""
+        return self.tree.materialize(self.index)
+
+    def __eq__(self, other):
+        return isinstance(other, ArenaNode) and self.tree is other.tree and self.index == other.index
+
+    def __hash__(self):
+        return hash(self.index)
+
+    def __repr__(self):
+        return 'ArenaNode({}, {}, start={}, end={})'.format(
+            self.index, self.cls.__name__, self.start, self.end
+        )
+
+
+class ArenaTree:
+    """A parse tree kept in parallel arrays, indexed by node (one node per element, in
+       document order). Node text and raw markers are offsets into source."""
+
+    def __init__(self, source):
+        self.source = source
+
+        self.classes = []           # kind => element class
+        self._class_ids = {}
+        self.markers = []           # marker id => marker ('p', 'w', ...)
+        self._marker_ids = {}
+
+        self.kind = array('B')
+        self.marker = array('H')
+        # start and end are both the offset of a ParsingFailedElement (see Parser, recover)
+        self.start = array('i')
+        self.end = array('i')
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.depth = array('H')
+        # C value, first verse of V, or number of a NumberedElement. value_end is the last
+        # verse of a verse range, or NO_NODE
+        self.value = array('i')
+        self.value_end = array('i')
+        # marker_raw is source[start:start + raw_len] (-1 if none)
+        self.raw_len = array('i')
+        # Span attributes_raw is source[attributes_start:attributes_start + attributes_len]
+        self.attributes_start = array('i')
+        self.attributes_len = array('i')
+        # Span end_marker_raw is source[end - end_marker_len:end]
+        self.end_marker_len = array('B')
+        self.flags = array('B')
+
+        # node => {attribute: value}, for anything not matching the source (rare), and the
+        # exception (e) of a ParsingFailedElement
+        self.overflow = {}
+        # node => earlier node of the same element - the text of a \d, which the parser also
+        # adds after the next \v (see Parser.parse_paragraph_marker())
+        self.same_as = {}
+        self.shared = set()             # nodes in same_as's values
+
+        self.top_level = array('i')     # nodes with no parent, in order
+        self.chapters = {}              # C value => node
+        self._last_child = {}           # while adding - node => its last child
+        self._d_text = {}               # while adding - id of \d text => (element, node)
+
+    # Building
+
+    @classmethod
+    def from_results(cls, results, source):
+        """Create from ParserResults of parsing source (the whole text)."""
+        tree = cls(source)
+        for element in results:
+            tree.add(element)
+        tree._last_child = {}
+        tree._d_text = {}
+        return tree
+
+    @classmethod
+    def from_text(cls, text, **parser_kwargs):
+        """Parse text into an ArenaTree. Text is parsed in chunks and each top-level element
+           is added as it's complete (see Parser.yield_results()), so the elements of the
+           whole book never exist at once."""
+        tree = cls(text)
+        parser = Parser(**parser_kwargs)
+        chunk_start = 0
+        while chunk_start < len(text):
+            # Whole lines, so markers aren't split
+            chunk_end = text.find('\n', chunk_start + FROM_TEXT_CHUNK_SIZE)
+            chunk_end = len(text) if chunk_end == -1 else chunk_end + 1
+            parser.add(text[chunk_start:chunk_end])
+            for element in parser.yield_results():
+                tree.add(element)
+            chunk_start = chunk_end
+        for element in parser.yield_results(final=True):
+            tree.add(element)
+        tree._last_child = {}
+        tree._d_text = {}
+        return tree
+
+    def _id(self, table, ids, key):
+        if key not in ids:
+            ids[key] = len(table)
+            table.append(key)
+        return ids[key]
+
+    def add(self, element, parent=NO_NODE):
+        """Add element and its descendants, as the last child of parent (a node) or as a
+           top-level element. Returns its node."""
+        node = len(self.kind)
+        source = self.source
+        overflow = {}
+
+        self.kind.append(self._id(self.classes, self._class_ids, element.__class__))
+        self.marker.append(self._id(self.markers, self._marker_ids, getattr(element, 'marker', None)))
+        if isinstance(element, ParsingFailedElement):
+            self.start.append(element.offset)
+            self.end.append(element.offset)
+            overflow['e'] = element.e
+        else:
+            self.start.append(element.start)
+            self.end.append(element.end)
+        self.parent.append(parent)
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        if parent == NO_NODE:
+            self.top_level.append(node)
+        else:
+            last_child = self._last_child.get(parent, NO_NODE)
+            if last_child == NO_NODE:
+                self.first_child[parent] = node
+            else:
+                self.next_sibling[last_child] = node
+            self._last_child[parent] = node
+
+        flags = 0
+        if getattr(element, '_psalm_119_skip', False):
+            flags |= FLAG_PSALM_119_SKIP
+        if hasattr(element, '_depth'):
+            self.depth.append(element._depth)
+        else:
+            self.depth.append(0 if parent == NO_NODE else self.depth[parent] + 1)
+            flags |= FLAG_NO_DEPTH
+        if isinstance(element, V):
+            # A verse's first parent is its chapter - None if that's been freed, as
+            # when streamed by ArenaTree.from_text()
+            parents = element.parents
+            if not parents or not (parents[0] == None or isinstance(parents[0], C)):
+                flags |= FLAG_NO_CHAPTER
+        self.flags.append(flags)
+
+        value = NO_NODE
+        value_end = NO_NODE
+        if isinstance(element, C):
+            value = element.value
+            self.chapters[value] = node
+        elif isinstance(element, V):
+            value = element.value.first_verse
+            if element.value.last_verse != None:
+                value_end = element.value.last_verse
+        elif isinstance(element, NumberedElement):
+            value = element.number
+        self.value.append(value)
+        self.value_end.append(value_end)
+
+        raw_len = NO_NODE
+        if isinstance(element, MarkerElement) and hasattr(element, 'marker_raw'):
+            raw = element.marker_raw
+            if source.startswith(raw, element.start):
+                raw_len = len(raw)
+            else:
+                overflow['marker_raw'] = raw
+        self.raw_len.append(raw_len)
+
+        attributes_start = NO_NODE
+        attributes_len = 0
+        end_marker_len = 0
+        if isinstance(element, SpanMarkerElement):
+            raw = getattr(element, 'attributes_raw', None)
+            if raw:
+                attributes_start = source.rfind(raw, element.start, element.end)
+                attributes_len = len(raw)
+                if attributes_start == -1:
+                    attributes_start = NO_NODE
+                    overflow['attributes_raw'] = raw
+            raw = getattr(element, 'end_marker_raw', None)
+            if raw:
+                if source.endswith(raw, 0, element.end) and len(raw) < 256:
+                    end_marker_len = len(raw)
+                else:
+                    overflow['end_marker_raw'] = raw
+        self.attributes_start.append(attributes_start)
+        self.attributes_len.append(attributes_len)
+        self.end_marker_len.append(end_marker_len)
+
+        if isinstance(element, (Text, Whitespace)) \
+        and source[element.start:element.end] != element.text:
+            overflow['text'] = element.text
+
+        if overflow:
+            self.overflow[node] = overflow
+
+        if isinstance(element, Text):
+            found = self._d_text.get(id(element))
+            if found != None and found[0] is element:
+                self.same_as[node] = found[1]
+                self.shared.add(found[1])
+            elif parent != NO_NODE and self.classes[self.kind[parent]] is D:
+                self._d_text[id(element)] = (element, node)
+
+        # C children are its verses, which are children of paragraphs too
+        if isinstance(element, ParentElement) and not isinstance(element, C):
+            for child in element.children:
+                self.add(child, node)
+        return node
+
+    # Access
+
+    def __len__(self):
+        return len(self.kind)
+
+    def __iter__(self):
+        """Top-level nodes"""
+        for node in self.top_level:
+            yield ArenaNode(self, node)
+
+    def node(self, index):
+        """ArenaNode for index, or None for NO_NODE"""
+        if index == NO_NODE:
+            return None
+        return ArenaNode(self, index)
+
+    def iter_children(self, node):
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def get_value(self, node):
+        """value of a C or V node (as the element has it), number of a NumberedElement node"""
+        cls = self.classes[self.kind[node]]
+        if issubclass(cls, V):
+            if self.value_end[node] != NO_NODE:
+                return VerseNumberSequence(self.value[node], self.value_end[node])
+            return VerseNumberSequence(self.value[node])
+        if self.value[node] == NO_NODE:
+            return None
+        return self.value[node]
+
+    def get_node_text(self, node):
+        overflow = self.overflow.get(node)
+        if overflow and 'text' in overflow:
+            return overflow['text']
+        return self.source[self.start[node]:self.end[node]]
+
+    def get_chapter(self, chapter):
+        """ArenaNode of \\c chapter, or None"""
+        return self.node(self.chapters.get(chapter, NO_NODE))
+
+    def _chapter_range(self, chapter):
+        """Range of nodes from \\c chapter to before the next \\c (None if no chapter)"""
+        if chapter not in self.chapters:
+            return None
+        first = self.chapters[chapter]
+        c_kinds = self._kinds(C)
+        kind = self.kind
+        for node in range(first + 1, len(kind)):
+            if kind[node] in c_kinds:
+                return range(first, node)
+        return range(first, len(kind))
+
+    def _kinds(self, classes):
+        """Kinds (as a set) of node classes that are subclasses of classes"""
+        return set([x for x, cls in enumerate(self.classes) if issubclass(cls, classes)])
+
+    def get_verse(self, chapter, verse):
+        """ArenaNode of \\v verse in \\c chapter, or None. As with C.get_verse(), a verse
+           range doesn't match a single verse."""
+        nodes = self._chapter_range(chapter)
+        if nodes == None:
+            return None
+        v_kinds = self._kinds(V)
+        for node in nodes:
+            if self.kind[node] in v_kinds and self.value[node] == verse \
+            and self.value_end[node] == NO_NODE and not self.flags[node] & FLAG_NO_CHAPTER:
+                return ArenaNode(self, node)
+        return None
+
+    def iter_verses(self):
+        """Yield VerseText(chapter, verse, text, words) for every verse, as
+           ParserResults.iter_verses() does, except words are ArenaNodes."""
+        boundary_kinds = self._kinds((C, V, D))
+        c_kinds = self._kinds(C)
+        v_kinds = self._kinds(V)
+        text_kinds = self._kinds((Text, Whitespace))
+        word_kinds = self._kinds(W)
+        excluded_kinds = self._kinds((F, FE, X, SP))
+
+        kind = self.kind
+        parent = self.parent
+        start = self.start
+        end = self.end
+        source = self.source
+        overflow = self.overflow
+        normalize_whitespace = Element.normalize_whitespace
+        # Whether each node is within excluded_kinds (parents come before children)
+        excluded = bytearray(len(kind))
+
+        chapter = None
+        verse = None
+        texts = None
+        for node in range(len(kind)):
+            node_kind = kind[node]
+            node_parent = parent[node]
+            if node_parent != NO_NODE and (excluded[node_parent] or kind[node_parent] in excluded_kinds):
+                excluded[node] = 1
+
+            if node_kind in boundary_kinds:
+                if texts != None:
+                    yield VerseText(chapter, verse, normalize_whitespace(None, ''.join(texts)), words)
+                    texts = None
+                if node_kind in c_kinds:
+                    chapter = self.value[node]
+                elif node_kind in v_kinds:
+                    verse = self.get_value(node)
+                    texts = []
+                    words = []
+            elif texts != None and (node_kind in text_kinds or node_kind in word_kinds):
+                if excluded[node]:
+                    continue
+                if node_kind in word_kinds:
+                    words.append(ArenaNode(self, node))
+                elif node in overflow:
+                    texts.append(self.get_node_text(node))
+                else:
+                    texts.append(source[start[node]:end[node]])
+        if texts != None:
+            yield VerseText(chapter, verse, normalize_whitespace(None, ''.join(texts)), words)
+
+    # Materializing
+
+    def materialize(self, node, root=None, parents=(), elements=None):
+        """Create the element for node, and its descendants. The element's parents are
+           parents, and _root is root. elements (a dict) is node => element of those
+           created that another node is the same element as (see same_as), so that node
+           is given that element, as the parser does."""
+        cls = self.classes[self.kind[node]]
+        overflow = self.overflow.get(node, {})
+        source = self.source
+        start = self.start[node]
+        element = cls.__new__(cls)
+        if issubclass(cls, ParsingFailedElement):
+            element.offset = start
+            element.e = overflow['e']
+        else:
+            element.start = start
+            element.end = self.end[node]
+        if not self.flags[node] & FLAG_NO_DEPTH:
+            element._depth = self.depth[node]
+        if root != None:
+            element._root = root
+
+        if isinstance(element, MarkerElement):
+            element.marker = self.markers[self.marker[node]]
+            if self.raw_len[node] != NO_NODE:
+                element.marker_raw = source[start:start + self.raw_len[node]]
+            elif 'marker_raw' in overflow:
+                element.marker_raw = overflow['marker_raw']
+        if isinstance(element, ChildElement):
+            element.parents = list(parents)
+        if isinstance(element, ParentElement):
+            element.children = []
+        if isinstance(element, (ParentElement, MilestoneMarkerElement)):
+            element._repr_children = True
+        if isinstance(element, (Text, Whitespace)):
+            element.text = self.get_node_text(node)
+        if isinstance(element, NumberedElement):
+            element.number = self.value[node]
+        if isinstance(element, (C, V)):
+            element.value = self.get_value(node)
+        if self.flags[node] & FLAG_PSALM_119_SKIP:
+            element._psalm_119_skip = True
+
+        if isinstance(element, SpanMarkerElement):
+            attributes_raw = overflow.get('attributes_raw')
+            if self.attributes_start[node] != NO_NODE:
+                attributes_start = self.attributes_start[node]
+                attributes_raw = source[attributes_start:attributes_start + self.attributes_len[node]]
+            if attributes_raw:
+                element.attributes = element.parse_attributes(attributes_raw)
+                element.attributes_raw = attributes_raw
+            else:
+                element.attributes = collections.OrderedDict()
+            if self.end_marker_len[node]:
+                element.end_marker_raw = source[element.end - self.end_marker_len[node]:element.end]
+            elif 'end_marker_raw' in overflow:
+                element.end_marker_raw = overflow['end_marker_raw']
+
+        if isinstance(element, ParentElement) and not isinstance(element, C):
+            for child in self.iter_children(node):
+                same_as = self.same_as.get(child)
+                if same_as != None and elements != None and same_as in elements:
+                    element.children.append(elements[same_as])
+                else:
+                    element.children.append(self.materialize(child, root, (element,), elements))
+        if elements != None and node in self.shared:
+            elements[node] = element
+        return element
+
+    def to_results(self, chapter=None):
+        """Create ParserResults with the elements of the whole tree, or only those from
+           \\c chapter to the next \\c. Chapters and verses are linked as when parsing."""
+        if chapter == None:
+            top_level = self.top_level
+        else:
+            nodes = self._chapter_range(chapter)
+            if nodes == None:
+                raise KeyError(chapter)
+            top_level = [x for x in self.top_level if x in nodes]
+
+        results = ParserResults()
+        chapter_element = None
+        elements = {}
+        for node in top_level:
+            element = self.materialize(node, results, elements=elements)
+            if isinstance(element, C):
+                chapter_element = element
+                results.chapters[element.value] = element
+            elif chapter_element != None:
+                # Verses are the first parent of their chapter (see Parser.milestone_c_v())
+                stack = [(element, node)]
+                while stack:
+                    elem, elem_node = stack.pop()
+                    if isinstance(elem, V) and not self.flags[elem_node] & FLAG_NO_CHAPTER:
+                        elem.parents.insert(0, chapter_element)
+                        chapter_element.children.append(elem)
+                    children = getattr(elem, 'children', ())
+                    stack.extend(reversed(list(zip(children, self.iter_children(elem_node)))))
+            results.append(element)
+        return results
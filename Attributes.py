@@ -0,0 +1,201 @@
+# -*- coding: UTF-8 -*-
+# An inverted index of the attributes of \w words (lemma, strong, srcloc, x-...).
+#
+#   index = AttributeIndex()
+#   index.add_results(results)                  # book code from \id
+#   index.lookup('strong', 'H7225')             # [Posting(book=0, chapter=1, verse=1, offset=27), ...]
+#   both = intersect(index.get('strong', 'H430'), index.get('strong', 'H1254'), level=VERSE)
+#   [unpack(x) for x in both]                   # verses with both words
+#
+# Each (attribute, value) has a posting list: an array of unsigned 64-bit integers, one
+# per \w, packing (book, chapter, verse, offset of the \w) so that postings sort in
+# document order and compare as integers. intersect() and union() work on these arrays,
+# per element or per verse (the offset masked off), without making a tuple per posting.
+
+import bisect
+import collections
+from array import array
+
+from .Elements.CharacterMarkerElements import W
+from .Elements.MilestoneMarkerElements import C, V
+
+
+# A posting, unpacked. book is the number of the book in AttributeIndex.books, and
+# chapter and verse are 0 for words before the first \c or \v.
+Posting = collections.namedtuple('Posting', ['book', 'chapter', 'verse', 'offset'])
+
+# Bits of each field of a posting, from the most significant
+BOOK_BITS = 8
+CHAPTER_BITS = 12
+VERSE_BITS = 12
+OFFSET_BITS = 32
+
+_VERSE_SHIFT = OFFSET_BITS
+_CHAPTER_SHIFT = _VERSE_SHIFT + VERSE_BITS
+_BOOK_SHIFT = _CHAPTER_SHIFT + CHAPTER_BITS
+
+# Levels of intersect() and union() - the same \w, or the same verse
+ELEMENT = 0
+VERSE = 1
+
+_VERSE_MASK = ~((1 << OFFSET_BITS) - 1) & ((1 << 64) - 1)
+
+
+def pack(book, chapter, verse, offset):
+    """Posting as an int (see Posting). ValueError if a field doesn't fit."""
+    if book >= 1 << BOOK_BITS or chapter >= 1 << CHAPTER_BITS or \
+            verse >= 1 << VERSE_BITS or offset >= 1 << OFFSET_BITS:
+        raise ValueError("Posting ({}, {}, {}, {}) out of range".format(book, chapter, verse, offset))
+    return (book << _BOOK_SHIFT) | (chapter << _CHAPTER_SHIFT) | (verse << _VERSE_SHIFT) | offset
+
+
+def unpack(posting):
+    return Posting(
+        posting >> _BOOK_SHIFT,
+        (posting >> _CHAPTER_SHIFT) & ((1 << CHAPTER_BITS) - 1),
+        (posting >> _VERSE_SHIFT) & ((1 << VERSE_BITS) - 1),
+        posting & ((1 << OFFSET_BITS) - 1)
+    )
+
+
+def _at_level(postings, level):
+    if level == ELEMENT:
+        return postings
+    # Sorted, so equal verses are adjacent
+    ret = array('Q')
+    last = None
+    for posting in postings:
+        posting &= _VERSE_MASK
+        if posting != last:
+            ret.append(posting)
+            last = posting
+    return ret
+
+
+def intersect(*postings, level=ELEMENT):
+    """Postings (sorted arrays, as AttributeIndex.get() gives) in all of postings, at
+       level ELEMENT or VERSE. At VERSE, postings are per verse, with offset 0."""
+    lists = sorted((_at_level(x, level) for x in postings), key=len)
+    if not lists:
+        return array('Q')
+    ret = array('Q', lists[0])
+    for other in lists[1:]:
+        if not ret:
+            break
+        if len(ret) * 32 < len(other):
+            # Much shorter - search the longer list rather than reading all of it
+            found = array('Q')
+            lo = 0
+            for posting in ret:
+                lo = bisect.bisect_left(other, posting, lo)
+                if lo == len(other):
+                    break
+                if other[lo] == posting:
+                    found.append(posting)
+            ret = found
+        else:
+            other = set(other)
+            ret = array('Q', [x for x in ret if x in other])
+    return ret
+
+
+def union(*postings, level=ELEMENT):
+    """Postings in any of postings, sorted, at level ELEMENT or VERSE (see intersect())"""
+    if len(postings) == 1:
+        return array('Q', _at_level(postings[0], level))
+    found = set()
+    for x in postings:
+        found.update(_at_level(x, level))
+    return array('Q', sorted(found))
+
+
+class AttributeIndex:
+    """Posting lists for each (attribute, value) of \\w words in books added with
+       add_results(). A value that is a list (strong="H1,H2") is indexed by each item."""
+
+    def __init__(self):
+        self.books = []             # book codes, in the order added
+        self._postings = {}         # (attribute, value) => array of postings
+        self._unsorted = set()      # keys of postings that need sorting
+
+    def add_results(self, results, code=None):
+        """Index the \\w of ParserResults, as book code (default: the \\id code). Returns
+           the book number."""
+        if code == None:
+            id_elem = results.get_id() if results else None
+            code = id_elem.get_code() if id_elem != None else None
+        book = len(self.books)
+        if book >= 1 << BOOK_BITS:
+            raise ValueError("No more than {} books can be indexed".format(1 << BOOK_BITS))
+        self.books.append(code)
+
+        postings = self._postings
+        unsorted = self._unsorted
+        chapter = 0
+        verse = 0
+        for elem in results.get_flattened_forward():
+            if isinstance(elem, W):
+                if not elem.attributes:
+                    continue
+                posting = pack(book, chapter, verse, elem.start)
+                for name, values in elem.attributes.items():
+                    if isinstance(values, str):
+                        values = (values,)
+                    for value in values:
+                        key = (name, value)
+                        found = postings.get(key)
+                        if found == None:
+                            postings[key] = array('Q', (posting,))
+                        elif found[-1] != posting:
+                            if found[-1] > posting:
+                                unsorted.add(key)       # e.g. verses out of order
+                            found.append(posting)
+            elif isinstance(elem, C):
+                chapter = elem.value
+                verse = 0
+            elif isinstance(elem, V):
+                verse = elem.value.first_verse
+        return book
+
+    def get(self, name, value):
+        """Postings of \\w with attribute name equal to value (a sorted array, empty if
+           there are none). Don't modify it."""
+        key = (name, value)
+        if key in self._unsorted:
+            self._postings[key] = array('Q', sorted(set(self._postings[key])))
+            self._unsorted.discard(key)
+        return self._postings.get(key, array('Q'))
+
+    def lookup(self, name, value):
+        """Posting for each \\w with attribute name equal to value, in order"""
+        return [unpack(x) for x in self.get(name, value)]
+
+    def count(self, name, value):
+        return len(self._postings.get((name, value), ()))
+
+    def find_all(self, pairs, level=ELEMENT):
+        """Postings with every (attribute, value) of pairs (see intersect())"""
+        return intersect(*[self.get(name, value) for name, value in pairs], level=level)
+
+    def find_any(self, pairs, level=ELEMENT):
+        """Postings with any (attribute, value) of pairs (see union())"""
+        return union(*[self.get(name, value) for name, value in pairs], level=level)
+
+    def get_names(self):
+        """Attributes indexed"""
+        return sorted(set(name for name, value in self._postings))
+
+    def get_values(self, name):
+        """Values of attribute name indexed"""
+        return sorted(value for attribute, value in self._postings if attribute == name)
+
+    def get_book(self, posting):
+        """Book code of a posting"""
+        return self.books[posting >> _BOOK_SHIFT]
+
+    def __len__(self):
+        """Number of (attribute, value) keys"""
+        return len(self._postings)
+
+    def __repr__(self):
+        return 'AttributeIndex({} books, {} keys)'.format(len(self.books), len(self._postings))
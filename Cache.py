@@ -0,0 +1,236 @@
+# -*- coding: UTF-8 -*-
+# An on-disk cache of parsed books, keyed by a hash of the text and parser options.
+#
+#   cache = ParseCache('/var/cache/usfm')
+#   results = cache.parse(text)             # parsed once, then loaded from the cache
+#   results = cache.parse_file('01GEN.usfm')
+#
+# Entries are stored in the binary format of Serialization. They're invalidated when the
+# parser or element classes change (see version_stamp()), and the least recently used
+# entries are removed once the cache is larger than max_size.
+
+import gc
+import os
+import sys
+import copyreg
+import hashlib
+import tempfile
+
+from .Parser import Parser, ParserResults
+from .Locations import LineIndex
+from . import Serialization
+from . import Tokenizer, Token, Markers, References, Locations
+
+from .Elements.Element import ParsingFailedElement
+from .Elements.Text import Text
+from .Elements.Whitespace import Whitespace
+from .Elements.ConvertableElements import VerseNumberSequence
+from .Elements.ParagraphMarkerElements import PARAGRAPH_MARKER_ELEMENTS
+from .Elements.CharacterMarkerElements import CHARACTER_MARKER_ELEMENTS
+from .Elements.NoteMarkerElements import NOTE_MARKER_ELEMENTS
+from .Elements.MilestoneMarkerElements import (
+    MILESTONE_MARKER_ELEMENTS, PairedMilestoneMarkerElement
+)
+
+
+# Change when the way entries are stored changes (as well as Serialization.FORMAT_VERSION)
+CACHE_FORMAT = 3
+
+CACHE_EXTENSION = '.cache'
+
+# Parser options that don't change the results, so aren't part of the key
+UNKEYED_OPTIONS = ('trace', 'columnar')
+
+
+def _element_classes():
+    classes = [ParserResults, Text, Whitespace, ParsingFailedElement,
+               PairedMilestoneMarkerElement, VerseNumberSequence]
+    for elements in (PARAGRAPH_MARKER_ELEMENTS, CHARACTER_MARKER_ELEMENTS,
+                     NOTE_MARKER_ELEMENTS, MILESTONE_MARKER_ELEMENTS):
+        classes.extend(elements[x] for x in sorted(elements))
+    return classes
+
+
+def _source_modules():
+    """Modules whose code makes the results - the parser, and each element class and
+       its bases"""
+    package = __name__.rpartition('.')[0]
+    modules = set([Tokenizer, Token, Markers, References, Locations, Serialization])
+    for cls in _element_classes():
+        for base in cls.__mro__:
+            if base.__module__.startswith(package + '.'):
+                modules.add(sys.modules[base.__module__])
+    return sorted(modules, key=lambda x: x.__name__)
+
+
+def version_stamp():
+    """Hash of the cache format, the layout of each element class (its bases and
+       attributes) and the source of the modules that parse (see _source_modules()),
+       which changes when the parser or element classes change"""
+    h = hashlib.sha256()
+    layouts = ['format {} {}'.format(CACHE_FORMAT, Serialization.FORMAT_VERSION)]
+    for cls in _element_classes():
+        layouts.append('{}.{}({}) {}'.format(
+            cls.__module__, cls.__qualname__,
+            ','.join(x.__qualname__ for x in cls.__mro__[1:]),
+            ','.join(copyreg._slotnames(cls)),
+        ))
+    h.update('\n'.join(layouts).encode('utf-8'))
+    for module in _source_modules():
+        h.update(b'\0' + module.__name__.encode('utf-8') + b'\0')
+        try:
+            with open(module.__file__, 'rb') as f:
+                h.update(f.read())
+        except (AttributeError, TypeError, OSError):
+            pass            # no source (e.g. in a zip) - the layout and name only
+    return h.hexdigest()
+
+
+class ParseCache:
+    """ParserResults cached in files in directory, named by the hash of the text and parser
+       options. Loaded results are the same as parsing gives - elements, diagnostics
+       (see Parser, recover), source and line index (made again from the text) - except
+       results.parser is None, and the reference index is made when first used (see
+       ParserResults.get_references()).
+
+       Using an entry updates its modification time, and once the entries total more than
+       max_size bytes, those least recently used are removed."""
+
+    DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.version = version_stamp()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, text, **parser_kwargs):
+        """Hash of text, parser_kwargs and the version stamp"""
+        options = sorted((k, v) for k, v in parser_kwargs.items() if k not in UNKEYED_OPTIONS)
+        h = hashlib.sha256()
+        h.update(self.version.encode('ascii'))
+        h.update(repr(options).encode('utf-8'))
+        h.update(b'\0')
+        h.update(text.encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+    def get(self, text, **parser_kwargs):
+        """Cached ParserResults for text, or None"""
+        path = self.path(self.key(text, **parser_kwargs))
+        try:
+            with open(path, 'rb') as f:
+                results = self.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Unreadable (e.g. truncated) - parse again
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        self._restore_source(results, text, parser_kwargs)
+        return results
+
+    def _restore_source(self, results, text, parser_kwargs):
+        # The text is what the entry is keyed by, so isn't stored. Kept as the Parser keeps it.
+        offset = parser_kwargs.get('offset', 0)
+        results.lines = LineIndex(offset, parser_kwargs.get('line', 1))
+        results.lines.add(text)
+        if not offset:
+            results.source = text
+
+    def put(self, text, results, **parser_kwargs):
+        """Cache results of parsing text with parser_kwargs"""
+        path = self.path(self.key(text, **parser_kwargs))
+        # Written to a temporary file and renamed, so readers never see part of an entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self.dump(results, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def parse(self, text, **parser_kwargs):
+        """ParserResults for text - cached, or parsed and then cached. Parser exceptions
+           are raised as usual (and nothing is cached)."""
+        results = self.get(text, **parser_kwargs)
+        if results == None:
+            parser = Parser(text, **parser_kwargs)
+            parser.parse()
+            results = parser.results
+            self.put(text, results, **parser_kwargs)
+        return results
+
+    def parse_file(self, path, **parser_kwargs):
+        """ParserResults for a USFM file (see Corpus.parse_file())"""
+        with open(path, encoding='utf-8-sig') as f:
+            text = f.read()
+        return self.parse(text, **parser_kwargs)
+
+    def dump(self, results, f):
+        Serialization.dump(results, f)
+
+    def load(self, f):
+        # Trees have no reference cycles (see Element), so the cyclic GC running over
+        # every new element while loading only slows it down
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return Serialization.load(f)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def entries(self):
+        """(mtime, size, path) of each entry, least recently used first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_EXTENSION):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:   # removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def size(self):
+        return sum(x[1] for x in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache is within max_size"""
+        entries = self.entries()
+        total = sum(x[1] for x in entries)
+        for mtime, size, path in entries:
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for mtime, size, path in self.entries():
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def __len__(self):
+        return len(self.entries())
@@ -0,0 +1,231 @@
+# -*- coding: UTF-8 -*-
+# Parse a corpus of USFM books (e.g. a whole Bible), each book in a worker process.
+#
+#   python -m usfmparser.Corpus [-j N] DIR_OR_FILE...
+#
+# Each worker parses one book and reduces its ParserResults with a transform function
+# before sending anything back, so the element graph is never pickled between processes.
+#
+# A single large book can also be parsed in parallel with parse_sharded(), which splits it
+# at \c markers and parses runs of chapters in worker processes.
+
+import os
+import re
+import sys
+import argparse
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+from .Parser import Parser, ParserResults
+from .Locations import LineIndex
+from .References import ReferenceIndex
+from .Elements.Text import Text
+
+
+USFM_EXTENSIONS = ('.usfm', '.sfm')
+
+# \c at the start of a line. The parser closes open paragraphs at \c, so parsing from
+# one is the same as reaching it in a parse of the whole book.
+CHAPTER_MARKER_REGEX = re.compile(r'^\\c[\n\r \t]', re.M)
+
+# parse_sharded() splits a book into about this many shards per worker, so a few long
+# chapters don't leave workers idle
+SHARDS_PER_WORKER = 4
+
+BookSummary = collections.namedtuple('BookSummary', ['code', 'chapters', 'verses'])
+
+# value is what transform() returned (None on error), error is the exception raised (or None)
+CorpusResult = collections.namedtuple('CorpusResult', ['path', 'value', 'error'])
+
+
+def find_usfm_files(paths):
+    """Return USFM files in paths (files and/or directories, not recursive), in order.
+       Files in directories are sorted by name, and must have a USFM extension."""
+    if isinstance(paths, str):
+        paths = [paths]
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if os.path.splitext(name)[1].lower() in USFM_EXTENSIONS:
+                    found.append(os.path.join(path, name))
+        else:
+            found.append(path)
+    return found
+
+
+def summarize(results):
+    """Default transform - book code, number of chapters and number of verses"""
+    id_elem = results.get_id() if results else None
+    code = id_elem.get_code() if id_elem else None
+    chapters = results.get_chapters()
+    verses = sum([len(chapter.get_verses()) for chapter in chapters])
+    return BookSummary(code, len(chapters), verses)
+
+
+def parse_file(path, **parser_kwargs):
+    """Parse a USFM file, returning ParserResults"""
+    # universal newlines - the parser doesn't support \r
+    with open(path, encoding='utf-8-sig') as f:
+        text = f.read()
+    parser = Parser(text, **parser_kwargs)
+    parser.parse()
+    return parser.results
+
+
+def _parse_file_transform(args):
+    path, transform, parser_kwargs = args
+    try:
+        return CorpusResult(path, transform(parse_file(path, **parser_kwargs)), None)
+    except Exception as e:      # parser bugs included - report per book
+        return CorpusResult(path, None, e)
+
+
+def parse_corpus(paths, transform=summarize, max_workers=None, **parser_kwargs):
+    """Parse every USFM file in paths (see find_usfm_files()), each in a worker process,
+       returning a CorpusResult per file in order. transform(results) runs in the worker
+       and its return value is sent back, so it must be picklable (as must transform, so
+       use a module-level function). Failing books have error set rather than raising.
+
+       max_workers defaults to the number of CPUs. max_workers=1 parses in this process."""
+    files = find_usfm_files(paths)
+    jobs = [(path, transform, parser_kwargs) for path in files]
+
+    if max_workers == 1 or len(jobs) < 2:
+        return [_parse_file_transform(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        # Books vary a lot in size - hand them out one at a time
+        return list(pool.map(_parse_file_transform, jobs, chunksize=1))
+
+
+def shard_bounds(text, num_shards):
+    """Offsets splitting text into at most num_shards runs of whole chapters, of about
+       equal length. The first shard includes any text before the first \\c.
+       Returns [0, ..., len(text)]; shard i is text[bounds[i]:bounds[i + 1]]."""
+    bounds = [0]
+    target = len(text) / max(num_shards, 1)
+    for match in CHAPTER_MARKER_REGEX.finditer(text):
+        if match.start() - bounds[-1] >= target:
+            bounds.append(match.start())
+    if len(text) > bounds[-1]:
+        bounds.append(len(text))
+    return bounds
+
+
+def _parse_shard(args):
+    text, offset, line, parser_kwargs = args
+    # Offsets and lines of the book, so diagnostics (see recover) and errors are as when
+    # the book is parsed whole
+    parser = Parser(text, offset=offset, line=line, **parser_kwargs)
+    # Stands in for the text of a \d that the previous shard may leave pending, to be
+    # added after the next \v (see Parser.parse_paragraph_marker()). Wherever the parser
+    # puts it, parse_sharded() puts the previous shard's pending text, or removes it.
+    placeholder = None
+    if offset:
+        placeholder = Text(offset, offset)
+        parser._prev_d_text = placeholder
+    parser.parse()
+    results = parser.results
+    del results.parser      # only the elements are sent back
+    results.lines = None    # lines of the shard - parse_sharded() indexes the whole book
+    # One tuple, so pickling keeps the identity of placeholder within results
+    return results, placeholder, parser._prev_d_text
+
+
+def _stitch(elem, root, placeholder, pending_d_text):
+    """Point elem and its descendants at root, and replace placeholder (see
+       _parse_shard()) with pending_d_text, or remove it if that is None."""
+    if hasattr(elem, '_root'):
+        elem._root = root
+    children = getattr(elem, 'children', None)
+    if not children:
+        return
+    if placeholder is not None:
+        for child in children:
+            if child is placeholder:
+                if pending_d_text == None:
+                    elem.remove_child(placeholder)
+                else:
+                    elem.replace_child(placeholder, pending_d_text)
+                break
+    for child in children:
+        _stitch(child, root, placeholder, pending_d_text)
+
+
+def parse_sharded(text, max_workers=None, **parser_kwargs):
+    """Parse one book, splitting it at \\c markers (see shard_bounds()) and parsing the
+       shards in worker processes, returning ParserResults the same as Parser(text).parse()
+       gives - same elements, offsets, chapters and verse links, and diagnostics with
+       recover=True. results.parser is None.
+
+       If any shard fails to parse, the whole book is parsed again in this process, so
+       the exception raised (and its line number) is the same as a sequential parse.
+       max_workers defaults to the number of CPUs. max_workers=1 parses in this process."""
+    if max_workers == None:
+        max_workers = os.cpu_count() or 1
+    bounds = shard_bounds(text, max_workers * SHARDS_PER_WORKER)
+    if max_workers == 1 or len(bounds) < 3:
+        parser = Parser(text, **parser_kwargs)
+        parser.parse()
+        return parser.results
+
+    jobs = []
+    line = 1
+    for start, end in zip(bounds, bounds[1:]):
+        jobs.append((text[start:end], start, line, parser_kwargs))
+        line += text.count('\n', start, end)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            shards = list(pool.map(_parse_shard, jobs, chunksize=1))
+    except Exception:
+        return parse_sharded(text, max_workers=1, **parser_kwargs)
+
+    results = ParserResults()
+    results.parser = None
+    results.lines = LineIndex()
+    results.lines.add(text)
+    results.source = text
+    results.references = ReferenceIndex()
+    pending_d_text = None
+    for shard_results, placeholder, last_d_text in shards:
+        for elem in shard_results:
+            _stitch(elem, results, placeholder, pending_d_text)
+        results.extend(shard_results)
+        results.chapters.update(shard_results.chapters)
+        results.milestones.update(shard_results.milestones)
+        results.references.update(shard_results.references)
+        results.diagnostics.extend(shard_results.diagnostics)
+        # A placeholder still pending means the previous shard's text is still pending
+        if last_d_text is not placeholder:
+            pending_d_text = last_d_text
+    return results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog='python -m usfmparser.Corpus',
+        description='Parse USFM books in parallel, and summarize each book.'
+    )
+    arg_parser.add_argument('paths', nargs='+', metavar='PATH',
+        help='USFM files, or directories containing .usfm / .sfm files')
+    arg_parser.add_argument('-j', '--jobs', type=int, default=None,
+        help='number of worker processes (default: number of CPUs)')
+    args = arg_parser.parse_args(argv)
+
+    failed = 0
+    for result in parse_corpus(args.paths, max_workers=args.jobs):
+        if result.error != None:
+            failed += 1
+            print('{}\tERROR\t{}: {}'.format(
+                result.path, result.error.__class__.__name__, result.error
+            ))
+        else:
+            print('{}\t{}\t{} chapters\t{} verses'.format(
+                result.path, result.value.code, result.value.chapters, result.value.verses
+            ))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
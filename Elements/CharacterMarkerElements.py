@@ -8,6 +8,8 @@ from .SpanMarkerElement import SpanMarkerElement
 class CharacterMarkerElement(SpanMarkerElement):
     """Character Markers"""
 
+    __slots__ = ()
+
     def get_value(self):
         return ''.join([x.get_text() for x in self.children])
 
@@ -26,7 +28,7 @@ class CharacterMarkerElementEncoder(json.JSONEncoder):
 
 
 
-# TODO decoding hierarchies of objects
+# Whole trees are serialized (and read back) by Serialization
 
 ###
 # Chapters, Verses
@@ -38,12 +40,16 @@ class CharacterMarkerElementEncoder(json.JSONEncoder):
 class CA(CharacterMarkerElement):
     """CA"""
 
+    __slots__ = ()
+
     default_marker = 'ca'
 
 
 class VA(CharacterMarkerElement):
     """VA"""
 
+    __slots__ = ()
+
     default_marker = 'va'
 
 
@@ -54,6 +60,8 @@ class VA(CharacterMarkerElement):
 class W(CharacterMarkerElement):
     """W"""
 
+    __slots__ = ()
+
     default_marker = 'w'
     default_attribute = 'lemma'
 
@@ -70,6 +78,8 @@ class W(CharacterMarkerElement):
 class RB(CharacterMarkerElement):
     """RB"""
 
+    __slots__ = ()
+
     default_marker = 'rb'
     default_attribute = 'gloss'
     all_attributes = ('gloss')
@@ -80,6 +90,9 @@ class RB(CharacterMarkerElement):
 
 class FIG(CharacterMarkerElement):
     """FIG"""
+
+    __slots__ = ()
+
     # type: paragraph, but needs parsing as CharacterMarkerElement.
     # no default attribute.
 
@@ -98,6 +111,8 @@ class FIG(CharacterMarkerElement):
 class QS(CharacterMarkerElement):
     """QS"""
 
+    __slots__ = ()
+
     default_marker = 'qs'
 
     
@@ -109,60 +124,80 @@ class QS(CharacterMarkerElement):
 class ADD(CharacterMarkerElement):
     """ADD"""
 
+    __slots__ = ()
+
     default_marker = 'add'
 
 
 class BK(CharacterMarkerElement):
     """BK"""
 
+    __slots__ = ()
+
     default_marker = 'bk'
 
 
 class DC(CharacterMarkerElement):
     """DC"""
 
+    __slots__ = ()
+
     default_marker = 'dc'
 
 
 class K(CharacterMarkerElement):
     """K"""
 
+    __slots__ = ()
+
     default_marker = 'k'
 
 
 class ND(CharacterMarkerElement):
     """ND"""
 
+    __slots__ = ()
+
     default_marker = 'nd'
 
 
 class ORD(CharacterMarkerElement):
     """ORD"""
 
+    __slots__ = ()
+
     default_marker = 'ord'
 
 
 class PN(CharacterMarkerElement):
     """PN"""
 
+    __slots__ = ()
+
     default_marker = 'pn'
 
 
 class PNG(CharacterMarkerElement):
     """PNG"""
 
+    __slots__ = ()
+
     default_marker = 'png'
 
 
 class QT(CharacterMarkerElement):
     """QT"""
 
+    __slots__ = ()
+
     default_marker = 'qt'
 
 
 class WJ(CharacterMarkerElement):
     """An element for Words of Jesus"""
 
+    __slots__ = ()
+
     default_marker = 'wj'
 
 
@@ -1,15 +1,79 @@
 # -*- coding: UTF-8 -*-                                                                                            
+import weakref
+from collections.abc import MutableSequence
+
 from .Element import Element
 from ..Matchers import ElementMatcher
 
+
+class WeakList(MutableSequence):
+    """A list holding weak references to its items, which are given back as the items
+       themselves (None for an item that no longer exists)."""
+
+    __slots__ = ('refs',)
+
+    def __init__(self, items=()):
+        self.refs = [weakref.ref(x) for x in items]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [x() for x in self.refs[idx]]
+        return self.refs[idx]()
+
+    def __setitem__(self, idx, item):
+        if isinstance(idx, slice):
+            self.refs[idx] = [weakref.ref(x) for x in item]
+        else:
+            self.refs[idx] = weakref.ref(item)
+
+    def __delitem__(self, idx):
+        del self.refs[idx]
+
+    def __len__(self):
+        return len(self.refs)
+
+    def __iter__(self):
+        for ref in self.refs:
+            yield ref()
+
+    def insert(self, idx, item):
+        self.refs.insert(idx, weakref.ref(item))
+
+    def __eq__(self, other):
+        if isinstance(other, (WeakList, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __reduce__(self):
+        # Pickled as the items - whatever pickles this also pickles them
+        return (WeakList, (list(self),))
+
+    def __repr__(self):
+        return 'WeakList({})'.format(list(self))
+
+
 class ChildElement:
-    """A child element has parents. Base class for elements that are contained within other elements."""
-    # TODO gc circular refs
+    """A child element has parents. Base class for elements that are contained within other elements.
+
+       parents is a WeakList - parents hold their children, but children don't keep their
+       parents alive. Setting parents to a list (or tuple) makes a WeakList of it."""
+
+    __slots__ = ()
+    SLOTS = ('_parents',)       # declared by classes using this mixin (see Element)
+
+    @property
+    def parents(self):
+        return self._parents
+
+    @parents.setter
+    def parents(self, parents):
+        self._parents = WeakList(parents)
+
     def __init__(self, parents=(), *args, **kwargs):
         if isinstance(parents, Element):
             self.parents = [parents]
-        elif type(parents) in (list, tuple):
-            self.parents = list(parents)
+        elif type(parents) in (list, tuple, WeakList):
+            self.parents = parents
         elif not parents:
             self.parents = []
         else:
@@ -19,6 +83,11 @@ class ChildElement:
             if kwargs[k]:
                 setattr(self, k, kwargs[k])
     
+    def get_parent_markers(self):
+        """Markers of parents, upper case, for __repr__ - '?' for a parent that no longer
+           exists (see WeakList)"""
+        return [x.marker.upper() if x != None else '?' for x in self.parents]
+
     def find_above(self, cls=None, value=None, marker=None, text_eq=None, text_contains=None, text_matches=None):
         """Find and return the **first** Element with all specified class, marker, value, and text, from
            this element and higher in the tree. Return the Element or None."""
@@ -35,6 +104,8 @@ class ChildElement:
             return False
 
         parent = self.parents[0]
+        if parent == None:
+            return False
         if until and until.match(parent):
             return False
         if include.match(parent):
@@ -43,6 +114,8 @@ class ChildElement:
         parents = getattr(parent, 'parents', None)
         while parents:
             parent = parents[0]     # TODO which path to choose?
+            if parent == None:
+                return False
             if until and until.match(parent):
                 return False
             if include.match(parent):
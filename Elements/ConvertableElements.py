@@ -6,6 +6,8 @@ from .Text import Text
 class VerseNumberSequence:
     """Contiguous verse number sequence"""
 
+    __slots__ = ('first_verse', 'last_verse', '_iter_idx', '_iter_values')
+
     def __init__(self, first_verse, last_verse=None):
         assert(isinstance(first_verse, int))
         if last_verse != None:
@@ -100,6 +102,8 @@ class MultiVerseNumber:
 
 class IntConvertableElement:
 
+    __slots__ = ()
+
     @staticmethod
     def convert(value):
         if isinstance(value, int):
@@ -131,6 +135,8 @@ class IntConvertableElement:
 
 class VerseNumberSequenceConvertableElement:
 
+    __slots__ = ()
+
     @staticmethod
     def convert(value):
         if isinstance(value, str):
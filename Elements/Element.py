@@ -1,6 +1,8 @@
 # -*- coding: UTF-8 -*-
 
 import re
+import copyreg
+import weakref
 
 class Element:
     """Base class for all parser elements.
@@ -8,8 +10,25 @@ class Element:
        The start and end positions **in the source text** are kept, 
        a) to provide better errors and debugging information
        b) to round-trip from parse tree to source text 
+
+       Elements have __slots__ rather than a __dict__, to keep large parse trees small.
+       Every subclass declares __slots__ - its own attributes, or () if it has none (a class
+       without __slots__ gets a __dict__ again). Mixins (ParentElement, ChildElement,
+       NumberedElement) have empty __slots__, and list the attributes they use in SLOTS,
+       for the classes using them to declare.
+
+       References back up the tree (_root, and parents - see ChildElement) are weak, so a
+       tree has no reference cycles, and is freed as soon as it's no longer used. An
+       element kept after its ParserResults have been freed keeps its children, but
+       parents and _root may be None - e.g. V.get_text() then has only the paragraph the
+       verse is in (if that's kept) to take text from, and returns None without one. Keep
+       the ParserResults for as long as chapters and verses are used: a kept C has only
+       its verses, so C.get_text() returns None without them, as does V.get_text() of
+       a verse reached only through its chapter.
        """
 
+    __slots__ = ('start', 'end', '_depth', '_root_ref', '_flattened_idx', '__weakref__')
+
     def __init__(self, start=None, end=None, *args, **kwargs):
 
         # Allow creation of elements without setting everything at once.
@@ -22,9 +41,51 @@ class Element:
         for k in kwargs:
             setattr(self, k, kwargs[k])
 
+    @property
+    def _root(self):
+        """The ParserResults this element is in (None if they no longer exist)"""
+        return self._root_ref()
+
+    @_root.setter
+    def _root(self, root):
+        self._root_ref = weakref.ref(root)
+
+    @_root.deleter
+    def _root(self):
+        del self._root_ref
+
+    def __getstate__(self):
+        # Weak references can't be pickled, so _root is kept as what it refers to
+        state = {}
+        for name in copyreg._slotnames(self.__class__):
+            if name != '_root_ref' and hasattr(self, name):
+                state[name] = getattr(self, name)
+        if hasattr(self, '_root_ref') and self._root != None:
+            state['_root'] = self._root
+        return (None, state)        # no __dict__, and attributes set by pickle
+
     def get_range(self):
         return (self.start, self.end)
 
+    def get_root(self):
+        """The ParserResults this element is in - its own _root, or that of the nearest
+           ancestor with one - or None"""
+        elem = self
+        while elem != None:
+            if hasattr(elem, '_root_ref'):
+                return elem._root
+            parents = getattr(elem, 'parents', None)
+            elem = parents[0] if parents else None
+        return None
+
+    def get_location(self, end=False):
+        """Location(line, column) of the start (or end) of this element in the source, or
+           None if it isn't known (see ParserResults.get_location())"""
+        root = self.get_root()
+        if root == None:
+            return None
+        return root.get_location(self.end if end else self.start)
+
     # Every Element has two methods for retrieving contained text: 
     # get_text()    provides a 'cleaned', generally useful version, but preserves whitespace
     #               according to the spec
@@ -67,10 +128,24 @@ class Element:
 
 class ParsingFailedElement(Element):
     """"""
+
+    __slots__ = ('offset', 'e')
+
     def __init__(self, offset, e):
         self.offset = offset
         self.e = e
 
+    def get_location(self, end=False):
+        root = self.get_root()
+        if root == None:
+            return None
+        return root.get_location(self.offset)
+
     def __repr__(self):
-        return "ParsingFailedElement(offset={}, e='{}')".format(self.offset, self.e)
+        location = self.get_location()
+        if location == None:
+            return "ParsingFailedElement(offset={}, e='{}')".format(self.offset, self.e)
+        return "ParsingFailedElement(offset={}, line={}, column={}, e='{}')".format(
+            self.offset, location.line, location.column, self.e
+        )
 
@@ -8,6 +8,8 @@ class MarkerElement(Element):
        have Text and Character/Note children, but no parents, and e.g. F markers,
        which have Paragraph parents and e.g. FR/FT children."""
 
+    __slots__ = ('marker', 'marker_raw')
+
     def __init__(self, start=None, end=None, marker=None, marker_raw=None, *args, **kwargs):
         Element.__init__(self, start, end, *args, **kwargs)
         
@@ -16,12 +16,22 @@ from .ParagraphMarkerElements import MS, D, SP, Q, D
 FORWARD = 1
 BACKWARD = 2
 
+# Matchers for the text and words of chapters and verses. Shared, so each is compiled once
+# (see ElementMatcher.compile()) rather than on every call.
+_TEXT_MATCHER = ElementMatcher(cls=Text) | ElementMatcher(cls=Whitespace)
+_WORD_MATCHER = ElementMatcher(cls=W)
+_NOTE_MATCHER = ElementMatcher(cls=F) | ElementMatcher(cls=FE) | ElementMatcher(cls=X)
+_NOTE_OR_MS_MATCHER = _NOTE_MATCHER | ElementMatcher(cls=MS)
+_NOTE_OR_SP_MATCHER = _NOTE_MATCHER | ElementMatcher(cls=SP)
+
 
 # TODO do these need ChildElement?
 class MilestoneMarkerElement(MarkerElement, ChildElement):
     """Milestone marker class, including standalone elements. These occur in the parse tree,
        but they're not usable in the same way as tree elements (they're on a different axis)"""
 
+    __slots__ = ChildElement.SLOTS + ('_repr_children', 'value')
+
 
     DEFAULT_TRAVERSE_NUM_ANCESTORS = 5      # TODO customise
 
@@ -33,44 +43,108 @@ class MilestoneMarkerElement(MarkerElement, ChildElement):
     def get_text(self):
         return str(self.value)
 
+    def _get_cached_text(self):
+        # Text of the elements after this marker (see V.get_text()), cached with the
+        # ParserResults' count of changes (see ParentElement.invalidate()) when it was made
+        try:
+            changes, text = self._text
+        except AttributeError:
+            return None
+        root = self._get_containing_root()
+        if root == None or root.__dict__.get('_changes', 0) != changes:
+            return None
+        return text
+
+    def _set_cached_text(self, text):
+        # Only text made from the ParserResults, which invalidate() tracks changes to
+        root = self._get_containing_root()
+        if root != None:
+            self._text = (root.__dict__.get('_changes', 0), text)
+        return text
+
+    def _get_containing_root(self):
+        """The ParserResults this marker is in, or None if they no longer exist or it
+           isn't in their elements (e.g. it was yielded by Parser.yield_results())"""
+        root = self._root if hasattr(self, '_root_ref') else None
+        if root == None:
+            return None
+        all_flattened = root.get_flattened_forward()
+        idx = getattr(self, '_flattened_idx', None)
+        if idx != None and idx < len(all_flattened) and all_flattened[idx] is self:
+            return root
+        if any(x is self for x in all_flattened):
+            return root
+        return None
+
+    def _has_elements(self):
+        """Are there elements to take text from - ParserResults containing this marker,
+           or an ancestor that still exists? (see elements_from())"""
+        return self._get_containing_root() != None or self._get_top_ancestor() != None
+
+    def _get_top_ancestor(self):
+        """The furthest ancestor of this marker that still exists, following paragraphs,
+           or None. \\c isn't followed - its children are only its verses, not their text"""
+        ancestor = None
+        elem = self
+        while True:
+            parents = [x for x in getattr(elem, 'parents', ()) if x != None and not isinstance(x, C)]
+            if not parents:
+                return ancestor
+            elem = ancestor = parents[-1]
+
     def get_parsed(self, **kwargs):
         # To round-trip, we use marker_raw unless the element has children
         return self.marker_raw
 
     # does this naming working - nested milestone pairs?
 
-    def elements_from(self, direction=FORWARD, include=None, until=None, first=None, last=None):
+    def elements_from(self, direction=FORWARD, include=None, until=None, first=None, last=None,
+                      until_cls=None):
         """Get elements, beginning from this marker, traversing either forward 
            (MilestoneMarkerElement.FORWARD) or backward, including elements matched by 
            the ElementMatcher include, until the Element matched by until, returning
-           either first N or last N results, not including this marker and until."""
+           either first N or last N results, not including this marker and until.
+           until_cls (a class or tuple of classes) also stops at the next instance of
+           those classes, found with a precomputed index rather than matching each element."""
         if first != None and last != None:
             raise ValueError("elements_after() received both 'first' and 'last' arguments")
 
-        if include == None:
-            include = ElementMatcher()  # match any Element instance
-
-        if direction == FORWARD:
-            all_flattened = self._root.get_flattened_forward()
-            if hasattr(self, '_my_forward_idx'):         # assumes unchanging
-                my_idx = self._my_forward_idx
-            else:
-                my_idx = all_flattened.index(self)
-                self._my_forward_idx = my_idx
-            
-        elif direction == BACKWARD:
-            all_flattened = self._root.get_flattened_backward()
-            if hasattr(self, '_my_backward_idx'):         # assumes unchanging
-                my_idx = self._my_backward_idx
-            else:
-                my_idx = all_flattened.index(self)
-                self._my_backward_idx = my_idx
+        root = self._get_containing_root()
+        if root != None:
+            if direction == FORWARD:
+                all_flattened = root.get_flattened_forward()
+            elif direction == BACKWARD:
+                all_flattened = root.get_flattened_backward()
+            my_idx = root.get_flattened_index(self, direction)
+
+            stop = len(all_flattened)
+            if until_cls != None:
+                stop = root.get_next_index(until_cls, direction)[my_idx + 1]
+        else:
+            # Not in ParserResults - only the elements of its furthest ancestor are known
+            ancestor = self._get_top_ancestor()
+            if ancestor == None:
+                return []
+            all_flattened = ancestor.get_flattened_forward()
+            if direction == BACKWARD:
+                all_flattened.reverse()
+            my_idx = next((idx for idx, elem in enumerate(all_flattened) if elem is self), None)
+            if my_idx == None:
+                return []
+
+            stop = len(all_flattened)
+            if until_cls != None:
+                for idx in range(my_idx + 1, stop):
+                    if isinstance(all_flattened[idx], until_cls):
+                        stop = idx
+                        break
 
         ret = []
-        for elem in all_flattened[my_idx+1:]:
+        for idx in range(my_idx + 1, stop):
+            elem = all_flattened[idx]
             if until and until.match(elem):
                 break
-            if include.match(elem):
+            if include == None or include.match(elem):
                 ret.append(elem)
         if first != None:
             return ret[:first]
@@ -100,7 +174,7 @@ class MilestoneMarkerElement(MarkerElement, ChildElement):
             self.value
         )   
         if self.parents:
-            out += ", parents=[{}]".format(', '.join([x.marker.upper() for x in self.parents]))
+            out += ", parents=[{}]".format(', '.join(self.get_parent_markers()))
         out += ')' 
         return out 
 
@@ -115,6 +189,8 @@ class PairedMilestoneMarkerElement(MilestoneMarkerElement):
     """A milestone marker element that has a matching pair. If a milestone marker isn't paired,
        it's standalone."""
 
+    __slots__ = ('milestone_type', 'pair')
+
     TYPE_START = 1
     TYPE_END = 2
 
@@ -172,6 +248,8 @@ class PairedMilestoneMarkerElement(MilestoneMarkerElement):
 class C(MilestoneMarkerElement, IntConvertableElement, ParentElement):
     """Marker element representing chapter."""
 
+    __slots__ = ParentElement.SLOTS
+
     default_marker = 'c' 
     requires_following = True       # TODO needed?
     # TODO is instance Paragraph
@@ -190,17 +268,9 @@ class C(MilestoneMarkerElement, IntConvertableElement, ParentElement):
 
 
     def get_flattened_forward(self):
-        if hasattr(self, '_flattened_forward'):
-            return self._flattened_forward
-        else:
-            self._repr_children = False
-            flattened_forward = [self]
-
-
-
-            # No children included when flattening
-            self._flattened_forward = flattened_forward
-            return flattened_forward
+        # No children included when flattening
+        self._repr_children = False
+        return [self]
 
 
 
@@ -210,6 +280,14 @@ class C(MilestoneMarkerElement, IntConvertableElement, ParentElement):
     def get_verse(self, verse):
         assert(isinstance(verse, int))
 
+        # The ReferenceIndex of the results has it, unless this chapter (or the verse) isn't
+        # in them - e.g. a chapter yielded by yield_results()
+        root = self.get_root()
+        if root != None and root.chapters.get(self.value) is self:
+            found = root.get_references().get_verse(self.value, verse)
+            if found != None and found.parents and found.parents[0] is self:
+                return found
+
         for c in self.children:
             if isinstance(c, V):
                 if c.value == verse:
@@ -229,17 +307,11 @@ class C(MilestoneMarkerElement, IntConvertableElement, ParentElement):
 
     def get_first_text(self):
         """Return text between the \\c and \\v 1 (first verse) markers"""
-        m1 = ElementMatcher(cls=Text)
-        m2 = ElementMatcher(cls=Whitespace)
-
-        no_ancestor_include = ElementMatcher(cls=F)
-        no_ancestor_include |= ElementMatcher(cls=FE)
-        no_ancestor_include |= ElementMatcher(cls=X)
-        no_ancestor_include |= ElementMatcher(cls=MS)
+        no_ancestor_include = _NOTE_OR_MS_MATCHER
 
         first_text = ''.join([
             # confusing - from flattened/hierarchy
-            x.get_text() for x in self.elements_from(include=m1|m2, until=ElementMatcher(cls=V)) if not x.has_ancestor(include=no_ancestor_include)
+            x.get_text() for x in self.elements_from(include=_TEXT_MATCHER, until_cls=V) if not x.has_ancestor(include=no_ancestor_include)
         ])
         return self.normalize_whitespace(first_text)
 
@@ -250,21 +322,21 @@ class C(MilestoneMarkerElement, IntConvertableElement, ParentElement):
 
     def get_text(self):
         # Include a previous \d TODO ?
+        cached = self._get_cached_text()
+        if cached != None:
+            return cached
+        if not self._has_elements():
+            return None
 
-        m1 = ElementMatcher(cls=Text)
-        m2 = ElementMatcher(cls=Whitespace)
-
-        no_ancestor_include = ElementMatcher(cls=F)
-        no_ancestor_include |= ElementMatcher(cls=FE)
-        no_ancestor_include |= ElementMatcher(cls=X)
+        no_ancestor_include = _NOTE_MATCHER
 
 
 
         chapter_text = ''.join([
             # confusing - from flattened/hierarchy
-            x.get_text() for x in self.elements_from(include=m1|m2, until=ElementMatcher(cls=C)) if not x.has_ancestor(include=no_ancestor_include)
+            x.get_text() for x in self.elements_from(include=_TEXT_MATCHER, until_cls=C) if not x.has_ancestor(include=no_ancestor_include)
         ])
-        return self.normalize_whitespace(chapter_text)
+        return self._set_cached_text(self.normalize_whitespace(chapter_text))
 
     def __repr__(self):
         if not hasattr(self, '_depth'):
@@ -282,7 +354,7 @@ class C(MilestoneMarkerElement, IntConvertableElement, ParentElement):
         )   
 
         if self.parents:
-            out += ", parents=[{}]".format(', '.join([x.marker.upper() for x in self.parents]))
+            out += ", parents=[{}]".format(', '.join(self.get_parent_markers()))
 
         if self.children and self._repr_children:
             out += ", children=[\n"
@@ -307,6 +379,8 @@ Chapter = C
 class V(MilestoneMarkerElement, VerseNumberSequenceConvertableElement):
     """V"""
 
+    __slots__ = ('_text',)
+
     default_marker = 'v'
     requires_following = True
     # TODO isinstance character
@@ -339,37 +413,30 @@ class V(MilestoneMarkerElement, VerseNumberSequenceConvertableElement):
 
 
 
-        m1 = ElementMatcher(cls=W)
-        m2 = ElementMatcher(cls=C) | ElementMatcher(cls=V)
-
-        no_ancestor_include = ElementMatcher(cls=F)
-        no_ancestor_include |= ElementMatcher(cls=FE)
-        no_ancestor_include |= ElementMatcher(cls=X)
-        no_ancestor_include |= ElementMatcher(cls=SP)
+        m1 = _WORD_MATCHER
+        no_ancestor_include = _NOTE_OR_SP_MATCHER
 
 
 
-        return [x for x in self.elements_from(include=m1, until=m2|ElementMatcher(cls=D)) if not x.has_ancestor(include=no_ancestor_include) and not getattr(x, '_psalm_119_skip', False)]
+        return [x for x in self.elements_from(include=m1, until_cls=(C, V, D)) if not x.has_ancestor(include=no_ancestor_include) and not getattr(x, '_psalm_119_skip', False)]
 
 
     def get_text(self):
+        cached = self._get_cached_text()
+        if cached != None:
+            return cached
+        if not self._has_elements():
+            return None
 
-        m1 = ElementMatcher(cls=Text) | ElementMatcher(cls=Whitespace)
-
-
-        m2 = ElementMatcher(cls=C) | ElementMatcher(cls=V)
-
-        no_ancestor_include = ElementMatcher(cls=F)
-        no_ancestor_include |= ElementMatcher(cls=FE)
-        no_ancestor_include |= ElementMatcher(cls=X)
-        no_ancestor_include |= ElementMatcher(cls=SP)
+        m1 = _TEXT_MATCHER
+        no_ancestor_include = _NOTE_OR_SP_MATCHER
 
         verse_text = ''.join([
             # confusing - from flattened/hierarchy
-            x.get_text() for x in self.elements_from(include=m1, until=m2|ElementMatcher(cls=D)) if not x.has_ancestor(include=no_ancestor_include) and not getattr(x, '_psalm_119_skip', False)
+            x.get_text() for x in self.elements_from(include=m1, until_cls=(C, V, D)) if not x.has_ancestor(include=no_ancestor_include) and not getattr(x, '_psalm_119_skip', False)
         ])
 
-        return self.normalize_whitespace(verse_text)
+        return self._set_cached_text(self.normalize_whitespace(verse_text))
 
 
 
@@ -396,7 +463,9 @@ class V(MilestoneMarkerElement, VerseNumberSequenceConvertableElement):
                 if p_out:
                     p_out += ', '
                 value = getattr(p, 'value', '')
-                if value:
+                if p == None:
+                    p_out += '?'
+                elif value:
                     p_out += p.marker.upper() + '.' + str(value)
                 else:
                     p_out += p.marker.upper()
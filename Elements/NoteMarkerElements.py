@@ -5,6 +5,8 @@ from .SpanMarkerElement import SpanMarkerElement
 class NoteMarkerElement(SpanMarkerElement):
     """Note Markers"""
 
+    __slots__ = ()
+
 
 ###
 # Footnotes
@@ -13,63 +15,85 @@ class NoteMarkerElement(SpanMarkerElement):
 class F(NoteMarkerElement):
     """F"""
 
+    __slots__ = ()
+
     default_marker = 'f'
 
 
 class FE(NoteMarkerElement):
     """FE"""
 
+    __slots__ = ()
+
     default_marker = 'fe'
 
 
 class FR(NoteMarkerElement):
     """FR"""
 
+    __slots__ = ()
+
     default_marker = 'fr'
 
 class FQ(NoteMarkerElement):
 
+    __slots__ = ()
+
     default_marker = 'fq'
 
 
 class FQA(NoteMarkerElement):
 
+    __slots__ = ()
+
     default_marker = 'fqa'
 
 
 class FK(NoteMarkerElement):
     """FK"""
 
+    __slots__ = ()
+
     default_marker = 'fk'
 
 
 class FL(NoteMarkerElement):
     """FL"""
 
+    __slots__ = ()
+
     default_marker = 'fl'
 
 
 class FW(NoteMarkerElement):
     """FW"""
 
+    __slots__ = ()
+
     default_marker = 'fw'
 
 
 class FP(NoteMarkerElement):
     """FP"""
 
+    __slots__ = ()
+
     default_marker = 'fp'
 
 
 class FV(NoteMarkerElement):
     """FV"""
 
+    __slots__ = ()
+
     default_marker = 'fv'
    
 
 class FT(NoteMarkerElement):
     """FT"""
 
+    __slots__ = ()
+
     default_marker = 'ft'
     requires_following = True
 
@@ -77,12 +101,16 @@ class FT(NoteMarkerElement):
 class FDC(NoteMarkerElement):
     """FDC"""
 
+    __slots__ = ()
+
     default_marker = 'fdc'
 
 
 class FM(NoteMarkerElement):
     """FM"""
 
+    __slots__ = ()
+
     default_marker = 'fm'
 
 
@@ -96,30 +124,40 @@ FOOTNOTE_MARKERS = ('f', 'fe', 'fr', 'fk', 'fl', 'fw', 'fp', 'fv', 'ft', 'fdc',
 class X(NoteMarkerElement):
     """X"""
 
+    __slots__ = ()
+
     default_marker = 'x'
 
 
 class XO(NoteMarkerElement):
     """XO"""
 
+    __slots__ = ()
+
     default_marker = 'xo'
 
 
 class XQ(NoteMarkerElement):
     """XQ"""
 
+    __slots__ = ()
+
     default_marker = 'xq'
 
 
 class XOP(NoteMarkerElement):
     """XOP"""
 
+    __slots__ = ()
+
     default_marker = 'xop'
 
 
 class XT(NoteMarkerElement):
     """XT"""
 
+    __slots__ = ()
+
     default_marker = 'xt'
     default_attribute = 'link-href'
 
@@ -1,7 +1,10 @@
 # -*- coding: UTF-8 -*-
 
 class NumberedElement:
-    
+
+    __slots__ = ()
+    SLOTS = ('number',)         # declared by classes using this mixin (see Element)
+
     def __init__(self, number=1):
         if isinstance(number, str):
             self.number = int(number)
@@ -13,6 +13,8 @@ from ..Exceptions import ParserError
 class ParagraphMarkerElement(MarkerElement, ParentElement):
     """Class for Paragraph type markers."""
 
+    __slots__ = ParentElement.SLOTS + ('_repr_children', 'value')
+
     def __init__(self, start=None, end=None, marker=None, marker_raw=None, children=()):
         MarkerElement.__init__(self, start, end, marker, marker_raw)
         ParentElement.__init__(self, children)
@@ -54,10 +56,15 @@ class ParagraphMarkerElement(MarkerElement, ParentElement):
 
 
     def get_text(self, element_matcher=None, **kwargs):
-        # TODO
-        # Include any whitespace in self
+        # Include any whitespace in self. Cached until children change (see
+        # ParentElement.invalidate()).
+        try:
+            return self._text
+        except AttributeError:
+            pass
         ret = self.marker_raw[-1]
         ret += ''.join([x.get_text() for x in self.children])
+        self._text = ret
         return ret
 
     # TODO get_text_raw() impl that doesn't double spaces
@@ -95,6 +102,8 @@ class ParagraphMarkerElement(MarkerElement, ParentElement):
 
 class ID(ParagraphMarkerElement):
     """"""
+
+    __slots__ = ()
     
     default_marker = 'id'
     requires_following = True
@@ -129,6 +138,8 @@ class ID(ParagraphMarkerElement):
 class USFM(ParagraphMarkerElement):
     """USFM"""
 
+    __slots__ = ()
+
     default_marker = 'usfm'
     requires_following = True
 
@@ -136,6 +147,8 @@ class USFM(ParagraphMarkerElement):
 class IDE(ParagraphMarkerElement):
     """IDE"""
 
+    __slots__ = ()
+
     default_marker = 'ide'
     requires_following = True
 
@@ -143,6 +156,8 @@ class IDE(ParagraphMarkerElement):
 class H(ParagraphMarkerElement):
     """H"""
 
+    __slots__ = ()
+
     default_marker = 'h'
     requires_following = True
 
@@ -151,6 +166,8 @@ class H(ParagraphMarkerElement):
 class TOC(NumberedElement, ParagraphMarkerElement):
    """TOC"""
 
+   __slots__ = NumberedElement.SLOTS
+
    default_marker = 'toc'
    requires_following = True
 
@@ -164,6 +181,8 @@ class TOC(NumberedElement, ParagraphMarkerElement):
 class IP(ParagraphMarkerElement):
     """IP"""
 
+    __slots__ = ()
+
     default_marker = 'ip'
     requires_following = True
 
@@ -171,6 +190,8 @@ class IP(ParagraphMarkerElement):
 
 class IS(ParagraphMarkerElement):
 
+    __slots__ = ()
+
     default_marker = 'is'
     requires_following = True
 
@@ -182,6 +203,8 @@ class IS(ParagraphMarkerElement):
 class MT(NumberedElement, ParagraphMarkerElement):
     """MT"""
 
+    __slots__ = NumberedElement.SLOTS
+
     default_marker = 'mt'
     requires_following = True
 
@@ -193,6 +216,8 @@ class MT(NumberedElement, ParagraphMarkerElement):
 class MS(NumberedElement, ParagraphMarkerElement):
     """MS"""
 
+    __slots__ = NumberedElement.SLOTS
+
     default_marker = 'ms'
     requires_following = True
 
@@ -204,6 +229,8 @@ class MS(NumberedElement, ParagraphMarkerElement):
 class S(NumberedElement, ParagraphMarkerElement):
     """S"""
 
+    __slots__ = NumberedElement.SLOTS
+
     default_marker = 's'
     requires_following = True
 
@@ -215,12 +242,16 @@ class S(NumberedElement, ParagraphMarkerElement):
 class D(ParagraphMarkerElement):
     """D"""
 
+    __slots__ = ('_psalm_119_skip',)
+
     default_marker = 'd'
 
 
 class SP(ParagraphMarkerElement):
     """SP"""
 
+    __slots__ = ()
+
     default_marker = 'sp'
     requires_following = True
 
@@ -234,12 +265,16 @@ class SP(ParagraphMarkerElement):
 class CL(ParagraphMarkerElement):
     """CL"""
 
+    __slots__ = ()
+
     default_marker = 'cl'
 
 
 class CP(ParagraphMarkerElement):
     """CP"""
 
+    __slots__ = ()
+
     default_marker = 'cp'
 
 
@@ -251,18 +286,24 @@ class CP(ParagraphMarkerElement):
 class P(ParagraphMarkerElement):
     """P"""
 
+    __slots__ = ()
+
     default_marker = 'p'
 
 
 class M(ParagraphMarkerElement):
     """M"""
 
+    __slots__ = ()
+
     default_marker = 'm'
 
 
-class PI(ParagraphMarkerElement):
+class PI(NumberedElement, ParagraphMarkerElement):
     """PI"""
 
+    __slots__ = NumberedElement.SLOTS
+
     default_marker = 'pi'
     requires_following = True
 
@@ -274,12 +315,16 @@ class PI(ParagraphMarkerElement):
 class MI(ParagraphMarkerElement):
     """MI"""
 
+    __slots__ = ()
+
     default_marker = 'mi'
 
 
 class NB(ParagraphMarkerElement):
     """NB"""
 
+    __slots__ = ()
+
     default_marker = 'nb'
 
     def get_value(self):
@@ -295,12 +340,16 @@ class NB(ParagraphMarkerElement):
 class PC(ParagraphMarkerElement):
     """PC"""
 
+    __slots__ = ()
+
     default_marker = 'pc'
 
 
 class B(ParagraphMarkerElement):
     """B"""
 
+    __slots__ = ()
+
     default_marker = 'b'
 
     def get_value(self):
@@ -319,6 +368,8 @@ class B(ParagraphMarkerElement):
 class Q(NumberedElement, ParagraphMarkerElement):
     """Q"""
 
+    __slots__ = NumberedElement.SLOTS
+
     default_marker = 'q'
     requires_following = True
 
@@ -332,6 +383,8 @@ class Q(NumberedElement, ParagraphMarkerElement):
 class LI(NumberedElement, ParagraphMarkerElement):
     """LI"""
 
+    __slots__ = NumberedElement.SLOTS
+
     default_marker = 'li'
     requires_following = True
 
@@ -8,11 +8,18 @@ from ..Matchers import ElementMatcher
 class ParentElement:
     """A parent element has children. Base class for elements that can contain other elements (children)."""
 
+    __slots__ = ()
+    # Declared by classes using this mixin (see Element), which also declare _repr_children
+    SLOTS = ('children', '_flattened_forward', '_flattened_backward', '_flattened_forward_idx', '_text')
+
+    # Attributes cached from children, dropped by invalidate()
+    _CACHED = ('_text', '_flattened_forward', '_flattened_backward')
+
     def __init__(self, children=()):
         if isinstance(children, Element):
             self.children = [children]
         elif type(children) in (list, tuple):
-            self.children = list(children)          # TODO append - clear flattened
+            self.children = list(children)
         elif not children:
             self.children = []
         else:
@@ -25,30 +32,81 @@ class ParentElement:
     #    out += '\t' * self.children_level + ']\n'
     #    return out
 
-    # get_text* in specific classes
+    # get_text* in specific classes. Paragraph and span elements cache their text, and
+    # flattening caches descendants, so change children with these methods, which drop
+    # what's cached here and above (see invalidate()). The parser, building new elements,
+    # appends to children directly.
+
+    def add_child(self, child):
+        """Append child to children (child's parents aren't changed)"""
+        self.children.append(child)
+        self.invalidate()
+
+    def insert_child(self, idx, child):
+        self.children.insert(idx, child)
+        self.invalidate()
+
+    def remove_child(self, child):
+        """Remove child (the element itself, not one equal to it) from children"""
+        del self.children[self.child_index(child)]
+        self.invalidate()
+
+    def replace_child(self, old, new):
+        self.children[self.child_index(old)] = new
+        self.invalidate()
+
+    def set_children(self, children):
+        self.children = list(children)
+        self.invalidate()
+
+    def child_index(self, child):
+        """Index of child in children - ValueError if it isn't one"""
+        for idx, elem in enumerate(self.children):
+            if elem is child:
+                return idx
+        raise ValueError("{} is not a child".format(child.__class__.__name__))
+
+    def invalidate(self):
+        """Drop text and flattened elements cached by this element, its ancestors and
+           the ParserResults it's in. Call after changing an element within children."""
+        # Anything cached above was made from what's cached here, so stop where nothing is
+        cached = False
+        for name in self._CACHED:
+            if hasattr(self, name):
+                delattr(self, name)
+                cached = True
+        if not cached:
+            return
+        parents = getattr(self, 'parents', None)
+        if parents:
+            for parent in parents:
+                if isinstance(parent, ParentElement):
+                    parent.invalidate()
+        elif hasattr(self, '_root_ref') and self._root != None:
+            self._root.invalidate()
 
     def get_flattened(self):
         """Return all child Elements, recursively, in a flattened list"""
         return self.get_flattened_forward()
 
     def get_flattened_forward(self):
-        if hasattr(self, '_flattened_forward'):
-            return self._flattened_forward
-        else:
+        # Only descendants are kept, so the element doesn't refer to itself (see Element)
+        if not hasattr(self, '_flattened_forward'):
             self._repr_children = False
-            flattened_forward = [self]
-            flattened_forward.extend(self._get_flattened_forward(self.children))
-            self._flattened_forward = flattened_forward
-            return flattened_forward
+            self._flattened_forward = self._get_flattened_forward(self.children)
+        flattened_forward = [self]
+        flattened_forward.extend(self._flattened_forward)
+        return flattened_forward
 
     def get_flattened_backward(self):
-        if hasattr(self, '_flattened_backward'):
-            return self._flattened_backward
-        else:
-            backward = list(self.get_flattened_forward())
+        if not hasattr(self, '_flattened_backward'):
+            self.get_flattened_forward()
+            backward = list(self._flattened_forward)
             backward.reverse()
             self._flattened_backward = backward
-            return backward
+        flattened_backward = list(self._flattened_backward)
+        flattened_backward.append(self)
+        return flattened_backward
 
     def _get_flattened_forward(self, elems):
         all_elems = []
@@ -66,11 +124,13 @@ class ParentElement:
     def __next__(self):
         if not hasattr(self, '_flattened_forward'):
             self.get_flattened_forward()
-        if self._flattened_forward_idx == len(self._flattened_forward):
+        idx = self._flattened_forward_idx
+        if idx > len(self._flattened_forward):
             raise StopIteration
-        elem = self._flattened_forward[self._flattened_forward_idx]
-        self.flattened_forward_idx += 1
-        return elem
+        self._flattened_forward_idx += 1
+        if idx == 0:
+            return self
+        return self._flattened_forward[idx - 1]
 
     # TODO don't repr children if empty
 
@@ -42,6 +42,10 @@ class SpanMarkerElement(MarkerElement, ParentElement, ChildElement):
     """Marker elements spanning text. 'end' is required, 
        and this is the first class in the inheritance tree that's allowed to have parents."""
 
+    __slots__ = ParentElement.SLOTS + ChildElement.SLOTS + (
+        '_repr_children', 'attributes', 'attributes_raw', 'end_marker_raw'
+    )
+
     def __init__(self, start=None, end=None, marker=None, marker_raw=None, parents=(), children=(), attributes=None, attributes_raw=None, end_marker_raw=None):
         MarkerElement.__init__(self, start, end, marker, marker_raw)
         ParentElement.__init__(self, children)
@@ -70,10 +74,15 @@ class SpanMarkerElement(MarkerElement, ParentElement, ChildElement):
         return self.value
 
     def get_text(self, element_matcher=None, **kwargs):
-        # TODO
-        # Include any whitespace in self
+        # Include any whitespace in self. Cached until children change (see
+        # ParentElement.invalidate()).
+        try:
+            return self._text
+        except AttributeError:
+            pass
         ret = self.marker_raw[-1]
         ret += ''.join([x.get_text() for x in self.children])
+        self._text = ret
         return ret    
 
     def parse_attributes(self, attributes):
@@ -139,7 +148,7 @@ class SpanMarkerElement(MarkerElement, ParentElement, ChildElement):
             out += ", ".join(["'" + k + "': '" + self.attributes[k] + "'" for k in self.attributes.keys()])
             out += "}"
         if self.parents:
-            out += ", parents=[{}]".format(', '.join([x.marker.upper() for x in self.parents]))
+            out += ", parents=[{}]".format(', '.join(self.get_parent_markers()))
         if self.children and self._repr_children:
             out += ", children=[\n"
             for child in self.children:
@@ -7,6 +7,8 @@ from ..Exceptions import InvalidElementError
 class Text(Element, ChildElement):
     """Class for Text elements. No children - only contains text."""
 
+    __slots__ = ChildElement.SLOTS + ('text',)
+
     def __init__(self, start, end, parents=(), text=''):
         Element.__init__(self, start, end)
         ChildElement.__init__(self, parents)
@@ -38,7 +40,7 @@ class Text(Element, ChildElement):
         )
         if self.parents:
             out += ", parents=[{}]".format(
-                ','.join([x.marker.upper() for x in self.parents]),
+                ','.join(self.get_parent_markers()),
             )
         out += ", text='{}')".format(
             self.value_for_output(self.get_text())
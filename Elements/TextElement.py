@@ -6,6 +6,8 @@ class TextElement(Element):
     """Base class for text elements (not beginning with a marker). Text can contain marker
        elements within it."""
 
+    __slots__ = ('text',)
+
     def __init__(self, start, end, parents=(), children=()):
         Element.__init__(self, start, end, parents)
         self.text = text
@@ -7,6 +7,8 @@ from ..Exceptions import InvalidElementError
 class Whitespace(Element, ChildElement):
     """Class for whitespace elements"""
 
+    __slots__ = ChildElement.SLOTS + ('text',)
+
     def __init__(self, start, end, parents=(), text=''):
         Element.__init__(self, start, end)
         ChildElement.__init__(self, parents)
@@ -36,7 +38,7 @@ class Whitespace(Element, ChildElement):
         )
         if self.parents:
             out += ", parents=[{}]".format(
-                ','.join([x.marker.upper() for x in self.parents]),
+                ','.join(self.get_parent_markers()),
             )
         out += ", text='{}')".format(
             self.value_for_output(self.get_text())
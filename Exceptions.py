@@ -29,3 +29,6 @@ class NonExistentMarkerError(ParserError):
 class InvalidAttributeError(ParserError):
     """This attribute contains invalid content"""
 
+
+class InvalidReferenceError(USFMException):
+    """This chapter and verse reference is not valid (e.g. '3:16-4:2' is)"""
@@ -0,0 +1,79 @@
+# -*- coding: UTF-8 -*-
+# Line and column of offsets in a source text, from an index of its newlines.
+#
+#   lines = LineIndex()
+#   lines.add(text)                 # as many times as text arrives
+#   lines.location(offset)          # Location(line=3, column=1)
+#
+# Nothing is counted while parsing. Text added is kept until a location is asked for (or
+# MAX_PENDING characters are waiting), then the offsets of its newlines are found and
+# kept in an array, and a location is a binary search of that.
+
+import re
+import bisect
+import collections
+from array import array
+
+
+# Lines and columns count from 1
+Location = collections.namedtuple('Location', ['line', 'column'])
+
+_NEWLINE_REGEX = re.compile('\n')
+
+
+class LineIndex:
+    """Offsets of the newlines in a source, given in chunks with add(). offset is the
+       offset in the source of the first text added, which starts line number line
+       (1, unless the text is part of a larger source)."""
+
+    # Index text waiting to be indexed once there's this much, so streaming a long
+    # source doesn't keep all of it
+    MAX_PENDING = 1024 * 1024
+
+    def __init__(self, offset=0, line=1):
+        self.offset = offset
+        self.first_line = line
+        self.newlines = array('q')  # offset of each newline in the source, in order
+        self.end = offset           # offset in the source of the end of the indexed text
+        self._pending = []          # text added but not yet indexed
+        self._pending_len = 0
+
+    def add(self, text):
+        if not text:
+            return
+        self._pending.append(text)
+        self._pending_len += len(text)
+        if self._pending_len >= self.MAX_PENDING:
+            self.index()
+
+    def index(self):
+        """Index any text added since the last call"""
+        for text in self._pending:
+            end = self.end
+            self.newlines.extend(end + m.start() for m in _NEWLINE_REGEX.finditer(text))
+            self.end = end + len(text)
+        self._pending = []
+        self._pending_len = 0
+
+    def location(self, offset):
+        """Location(line, column) of offset in the source. Offsets past the text added
+           are on its last line."""
+        if self._pending:
+            self.index()
+        # Newlines before offset
+        idx = bisect.bisect_left(self.newlines, offset)
+        line_start = self.newlines[idx - 1] + 1 if idx else self.offset
+        return Location(self.first_line + idx, offset - line_start + 1)
+
+    def line(self, offset):
+        return self.location(offset).line
+
+    def __len__(self):
+        """Number of lines"""
+        if self._pending:
+            self.index()
+        return len(self.newlines) + 1
+
+    def __getstate__(self):
+        self.index()
+        return self.__dict__.copy()
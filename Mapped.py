@@ -0,0 +1,189 @@
+# -*- coding: UTF-8 -*-
+# Read-only access to a serialized book (see Serialization) through a memory map.
+#
+#   Serialization.dump(results, open('GEN.usfb', 'wb'))
+#   ...
+#   with MappedResults('GEN.usfb') as book:
+#       book.get_verse_text(1, 1)       # from the verse table - nothing decoded
+#       book.get_verse(1, 1)            # \c 1 is decoded, the rest of the book isn't
+#
+# The file is mapped read-only, so processes using the same file share one copy of it
+# in the page cache. Verse text and offsets come from the VERSES section without reading
+# any elements. Elements are read a chapter at a time, when asked for.
+
+import mmap
+import collections
+
+from .Parser import ParserResults
+from .Serialization import Reader, NO_CHAPTER
+
+from .Elements.ParentElement import ParentElement
+from .Elements.MilestoneMarkerElements import C
+
+
+class MappedResults:
+    """A read-only, ParserResults-like view of a file written by Serialization.dump().
+
+       Chapters are read when first used, and the most recently used max_chapters are kept.
+       Elements refer to the ParserResults of their chapter (see get_chapter_results())
+       weakly, so keep those while using methods that need _root, such as V.get_text()."""
+
+    DEFAULT_MAX_CHAPTERS = 16
+
+    def __init__(self, path, max_chapters=DEFAULT_MAX_CHAPTERS):
+        self.path = path
+        self.max_chapters = max_chapters
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.reader = Reader(self._mmap)
+        # chapter => ParserResults, least recently used first
+        self._chapters = collections.OrderedDict()
+        self._preamble = None
+
+    def close(self):
+        if self._mmap == None:
+            return
+        self._chapters.clear()
+        self._preamble = None
+        self.reader.release()
+        self._mmap.close()
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Chapters
+
+    def get_chapter_numbers(self):
+        return self.reader.get_chapters()
+
+    def get_number_of_chapters(self):
+        return len(self.reader.get_chapters())
+
+    def get_chapter_results(self, chapter):
+        """ParserResults with the elements of \\c chapter (to the next \\c), or None"""
+        if chapter in self._chapters:
+            self._chapters.move_to_end(chapter)
+            return self._chapters[chapter]
+        try:
+            results = self.reader.read_chapter(chapter)
+        except KeyError:
+            return None
+        self._chapters[chapter] = results
+        while self.max_chapters != None and len(self._chapters) > self.max_chapters:
+            self._chapters.popitem(last=False)
+        return results
+
+    def get_chapter(self, chapter):
+        assert(isinstance(chapter, int))
+        results = self.get_chapter_results(chapter)
+        if results == None:
+            return None
+        return results.get_chapter(chapter)
+
+    def get_chapters(self):
+        """Every C element (reading every chapter)"""
+        return [self.get_chapter(x) for x in self.get_chapter_numbers()]
+
+    # Verses - from the verse table, unless elements are asked for
+
+    def get_number_of_verses(self, chapter):
+        assert(isinstance(chapter, int))
+        reader = self.reader
+        return sum(1 for idx in range(reader.num_verses) if reader.verse(idx)[0] == chapter)
+
+    def get_verse(self, chapter, verse):
+        assert(isinstance(verse, int))
+        chapter = self.get_chapter(chapter)
+        if not chapter:
+            return None
+        return chapter.get_verse(verse)
+
+    def get_verse_text(self, chapter, verse):
+        """Text of a verse, the same as V.get_text(), or None. verse is an int, or a
+           VerseNumberSequence for a verse range."""
+        idx = self.reader.find_verse(chapter, verse)
+        if idx == None:
+            return None
+        return self.reader.verse(idx)[5]
+
+    def get_verse_range(self, chapter, verse):
+        """(start, end) offsets of a verse in the source - from the \\v to the next \\c,
+           \\v or \\d - or None"""
+        idx = self.reader.find_verse(chapter, verse)
+        if idx == None:
+            return None
+        return self.reader.verse(idx)[3:5]
+
+    def iter_verse_texts(self):
+        """Yield (chapter, verse, text) for every verse, as ParserResults.iter_verses()
+           does but without words, reading no elements"""
+        reader = self.reader
+        for idx in range(reader.num_verses):
+            chapter, verse, segment, start, end, text = reader.verse(idx)
+            yield chapter, verse, text
+
+    def iter_verses(self):
+        """Yield VerseText(chapter, verse, text, words) for every verse, as
+           ParserResults.iter_verses() does. Chapters are read one at a time."""
+        for idx in range(len(self.reader.segments)):
+            yield from self._segment_results(idx).iter_verses()
+
+    # Queries
+
+    def find_all(self, element_matcher, chapter=None):
+        """Yield every element matched by element_matcher (an ElementMatcher), in order,
+           in \\c chapter or the whole book. Chapters are read one at a time."""
+        if chapter != None:
+            results = self.get_chapter_results(chapter)
+            segments = [results] if results != None else []
+        else:
+            segments = (self._segment_results(x) for x in range(len(self.reader.segments)))
+        for results in segments:
+            for elem in self._iter_elements(results):
+                if element_matcher.match(elem):
+                    yield elem
+
+    def _iter_elements(self, results):
+        # Document order, like get_flattened_forward(), without caching flattened lists
+        stack = list(reversed(results))
+        while stack:
+            elem = stack.pop()
+            yield elem
+            if isinstance(elem, ParentElement) and not isinstance(elem, C):
+                stack.extend(reversed(elem.children))
+
+    def _segment_results(self, idx):
+        chapter, offset, length = self.reader.segments[idx]
+        if chapter == NO_CHAPTER:
+            return self.get_preamble()
+        return self.get_chapter_results(chapter)
+
+    # Identification - the elements before the first \c
+
+    def get_preamble(self):
+        """ParserResults with the elements before the first \\c"""
+        if self._preamble == None:
+            segments = self.reader.segments
+            if segments and segments[0][0] == NO_CHAPTER:
+                self._preamble = self.reader.read_segment(segments[0], ParserResults())
+            else:
+                self._preamble = ParserResults()
+        return self._preamble
+
+    def get_id(self):
+        return self.get_preamble().get_id() if self.get_preamble() else None
+
+    def get_h(self):
+        return self.get_preamble().get_h() if self.get_preamble() else None
+
+    def get_toc(self, number=1):
+        return self.get_preamble().get_toc(number) if self.get_preamble() else None
+
+    def __repr__(self):
+        return "MappedResults('{}', {} chapters, {} verses)".format(
+            self.path, self.get_number_of_chapters(), self.reader.num_verses
+        )
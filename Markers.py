@@ -0,0 +1,131 @@
+# -*- coding: UTF-8 -*-
+# What each marker token is, worked out once per distinct token value.
+#
+#   info = marker_info('\\+w ')
+#   info.marker, info.plus, info.cls      # 'w', True, W
+#   info.paired, info.boundary            # True, False
+#
+# The parser looks at every marker token several times (is it a paragraph marker? \c?
+# \v? a span with an end marker?), and a book uses only a few dozen distinct marker
+# tokens, so each is classified when first seen and the MarkerInfo kept in a table keyed
+# by token value. After one dict lookup per token, the parser's loops only test flags.
+
+import re
+import sys
+
+from .Elements.SpanMarkerElement import CHARACTER_NOTE_MARKERS_NO_END
+from .Elements.ParagraphMarkerElements import PARAGRAPH_MARKER_ELEMENTS
+from .Elements.CharacterMarkerElements import CHARACTER_MARKER_ELEMENTS
+from .Elements.NoteMarkerElements import NOTE_MARKER_ELEMENTS
+from .Elements.MilestoneMarkerElements import MILESTONE_MARKER_ELEMENTS
+
+
+ALL_EXISTING_MARKERS = {x.default_marker:1 for x in
+    list(PARAGRAPH_MARKER_ELEMENTS.values()) +
+    list(CHARACTER_MARKER_ELEMENTS.values()) +
+    list(NOTE_MARKER_ELEMENTS.values())
+}
+
+
+SPAN_MARKERS_PAIR = set(list(CHARACTER_MARKER_ELEMENTS.keys()) + list(NOTE_MARKER_ELEMENTS.keys())) - set(CHARACTER_NOTE_MARKERS_NO_END)
+
+MILESTONE_NONE = 0
+MILESTONE_START = 1      # \qt-s ...
+MILESTONE_END = 2        # \qt-e ...
+
+# Distinct token values kept in the table. Real books use far fewer; this only bounds
+# the table for text full of made-up markers.
+MAX_MARKER_INFO = 4096
+
+_STRIP_REGEX = re.compile(r'\s+|\d+')
+_NUMBER_REGEX = re.compile(r'[^\d]*(\d+)')
+
+
+def marker_class(marker):
+    """Element class for a marker (e.g. 'p'), as Parser.get_marker_class() gives, or None"""
+    for elements in (PARAGRAPH_MARKER_ELEMENTS, CHARACTER_MARKER_ELEMENTS, NOTE_MARKER_ELEMENTS):
+        if marker in elements:
+            return elements[marker]
+    if '-' in marker:
+        marker = marker.replace('-s', '').replace('-e', '')
+    return MILESTONE_MARKER_ELEMENTS.get(marker)
+
+
+class MarkerInfo:
+    """A marker token, classified. Markers are interned, so comparing them with 'is'
+       works as well as ==.
+
+       marker           as Parser.marker_from_token() gives ('\\+w ' -> 'w')
+       marker_matching  with any + kept ('\\+w ' -> '+w')
+       close_value      the value of the matching end marker token ('\\+w*')
+       number           of a numbered marker ('\\q2 ' -> 2), or None
+       plus             has a + prefix (a nested character marker)
+       end              is an end marker ('\\w*', '\\qt-e\\*')
+       milestone        MILESTONE_START or MILESTONE_END for '-s' / '-e' markers, or MILESTONE_NONE
+       cls              element class, or None for markers that aren't USFM
+
+       and flags for the tests the parser makes: paragraph, is_c, is_v, boundary (a
+       paragraph marker or \\c, which closes any open paragraph), span (a character or
+       note marker), no_end (one without an end marker, such as \\ft), paired (one with
+       an end marker) and existing (a paragraph, character or note marker in USFM)."""
+
+    __slots__ = (
+        'value', 'marker', 'marker_matching', 'close_value', 'number', 'plus', 'end',
+        'milestone', 'cls', 'paragraph', 'is_c', 'is_v', 'boundary', 'span', 'no_end',
+        'paired', 'existing'
+    )
+
+    def __init__(self, value):
+        self.value = value
+        if value.startswith('\\'):
+            marker_matching = value.replace('\\', '').replace('*', '')
+            marker_matching = _STRIP_REGEX.sub('', marker_matching).lower()
+        else:
+            marker_matching = ''
+        marker = marker_matching.replace('+', '')
+        self.marker = sys.intern(marker)
+        self.marker_matching = sys.intern(marker_matching)
+        self.close_value = '\\' + marker_matching + '*'
+
+        m = _NUMBER_REGEX.match(value)
+        self.number = int(m.group(1)) if m else None
+        self.plus = '+' in marker_matching
+        self.end = value.endswith('*')
+        if marker.endswith('-s'):
+            self.milestone = MILESTONE_START
+        elif marker.endswith('-e'):
+            self.milestone = MILESTONE_END
+        else:
+            self.milestone = MILESTONE_NONE
+        self.cls = marker_class(marker) if marker else None
+
+        self.paragraph = marker in PARAGRAPH_MARKER_ELEMENTS
+        self.is_c = marker == 'c'
+        self.is_v = marker == 'v'
+        self.boundary = self.paragraph or self.is_c
+        self.span = marker in CHARACTER_MARKER_ELEMENTS or marker in NOTE_MARKER_ELEMENTS
+        self.no_end = marker in CHARACTER_NOTE_MARKERS_NO_END
+        self.paired = marker in SPAN_MARKERS_PAIR
+        self.existing = marker in ALL_EXISTING_MARKERS
+
+    def __repr__(self):
+        return 'MarkerInfo({!r})'.format(self.value)
+
+
+# For None, and text, whitespace and attribute tokens
+NOT_A_MARKER = MarkerInfo('')
+
+# token value => MarkerInfo
+_MARKER_INFO = {}
+
+
+def marker_info(value):
+    """MarkerInfo for a token value, from the table (see MAX_MARKER_INFO)"""
+    info = _MARKER_INFO.get(value)
+    if info is None:
+        if not value.startswith('\\'):
+            return NOT_A_MARKER
+        info = MarkerInfo(value)
+        if len(_MARKER_INFO) < MAX_MARKER_INFO:
+            _MARKER_INFO[sys.intern(value)] = info
+    return info
@@ -22,108 +22,143 @@ class ElementMatcher:
         self._logic_func = logic_func
         self._use_issubclass = use_issubclass
 
+    def __setattr__(self, name, value):
+        # Changing what to match recompiles on next match(). (Lists and tuples given as
+        # criteria are copied when compiling, so modify them by setting the attribute.)
+        object.__setattr__(self, name, value)
+        if name != '_compiled':
+            object.__setattr__(self, '_compiled', None)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_compiled'] = None       # closures don't pickle
+        return state
+
     def match(self, other):
-        if not isinstance(other, Element):
-            return False
+        compiled = self._compiled
+        if compiled == None:
+            compiled = self._compiled = self.compile()
+        return compiled(other)
+
+    def class_tuple(self):
+        """If this matcher only matches by class (with use_issubclass), the classes as a
+           tuple for isinstance(), else None. Used to merge matchers combined with |."""
+        if self.cls == None or not self._use_issubclass \
+        or self._logic_func not in (all, any) or any([
+            x != None for x in (self.marker, self.instance, self.value, self.number,
+                self.text_eq, self.text_contains, self.text_re_search, self.text_re_match)
+        ]):
+            return None
+        if type(self.cls) in (list, tuple):
+            return tuple(self.cls)
+        return (self.cls,)
+
+    def compile(self):
+        """Return a function of one argument that does what match() does. match() compiles
+           once, on first use, and again after any attribute changes."""
+        checks = []         # (function of other, needs text)
+
+        def any_or_equal(values, attr):
+            if type(values) in (list, tuple):
+                values = tuple(values)
+                return lambda other: getattr(other, attr) in values
+            return lambda other: values == getattr(other, attr)
 
-        results = []
         if self.cls != None:
-            if type(self.cls) in (list, tuple):
-                inner = []
-                for cls in self.cls:
-                    if self._use_issubclass:
-                        inner.append(issubclass(other.__class__, cls))
-                    else:
-                        inner.append(cls == other.__class__)
-                results.append(any(inner))
+            classes = tuple(self.cls) if type(self.cls) in (list, tuple) else (self.cls,)
+            if self._use_issubclass:
+                checks.append(lambda other: isinstance(other, classes))
             else:
-                if self._use_issubclass:
-                    results.append(issubclass(other.__class__, self.cls))
-                else:
-                    results.append(self.cls == other.__class__)
+                checks.append(lambda other: other.__class__ in classes)
 
         if self.marker != None:
-            if type(self.marker) in (list, tuple):
-                inner = []
-                for marker in self.marker:
-                    inner.append(marker == other.marker)
-                results.append(any(inner))
-            else:
-                results.append(self.marker == other.marker)
-            
+            checks.append(any_or_equal(self.marker, 'marker'))
+
         if self.instance != None:
-            if type(self.instance) in (list, tuple):
-                inner = []
-                for instance in self.instance:
-                    inner.append(self.instance == other)
-                results.append(any(inner))
+            instances = self.instance
+            if type(instances) in (list, tuple):
+                instances = tuple(instances)
+                checks.append(lambda other: any([x == other for x in instances]))
             else:
-                results.append(self.instance == other)
+                checks.append(lambda other: instances == other)
 
         if self.value != None:
             # a list of integer values is compared with any(),
             # a list of anything else is compared directly
-            if type(self.value) in (list, tuple):
-                if any(map(lambda x: type(x) != int, self.value)):
-                    results.append(self.value == other.value)
-                else:
-                    inner = []
-                    for value in self.value:
-                        inner.append(value == other.value)
-                    results.append(any(inner))
+            values = self.value
+            if type(values) in (list, tuple) and any(map(lambda x: type(x) != int, values)):
+                checks.append(lambda other: values == other.value)
             else:
-                results.append(self.value == other.value)
+                checks.append(any_or_equal(values, 'value'))
 
         if self.number != None:
-            if type(self.number) in (list, tuple):
-                inner = []
-                for number in self.number:
-                    inner.append(number == other.number)
-                results.append(any(inner))
-            else:       
-                results.append(self.number == other.number)
-        
-        if self.text_eq != None or self.text_contains != None \
-        or self.text_re_search != None or self.text_re_match != None:
-            other_text = other.get_text()
+            checks.append(any_or_equal(self.number, 'number'))
 
-        if self.text_eq != None:
-            if type(self.text_eq) in (list, tuple):
-                inner = []
-                for text_eq in self.text_eq:
-                    inner.append(text_eq == other_text)
-                results.append(any(inner))
-            else:
-                results.append(self.text_eq == other_text)
+        # Text checks share one other.get_text(), done only if cheaper checks allow
+        text_checks = []
 
-        if self.text_contains != None:
-            if type(self.text_contains) in (list, tuple):
-                inner = []
-                for text_contains in self.text_contains:
-                    inner.append(text_contains in other_text)
-                results.append(any(inner))
-            else:
-                results.append(self.text_contains in other_text)
+        def as_tuple(criteria):
+            return tuple(criteria) if type(criteria) in (list, tuple) else (criteria,)
 
+        if self.text_eq != None:
+            texts = as_tuple(self.text_eq)
+            text_checks.append(lambda text: text in texts)
+        if self.text_contains != None:
+            substrings = as_tuple(self.text_contains)
+            text_checks.append(lambda text: any([x in text for x in substrings]))
         if self.text_re_search != None:
-            if type(self.text_re_search) in (list, tuple):
-                inner = []
-                for text_re_search in self.text_re_search:
-                    inner.append(re.search(text_re_search, other_text))
-                results.append(any(inner))
-            else:
-                results.append(re.search(self.text_re_search, other_text))
-
+            searches = tuple([re.compile(x).search for x in as_tuple(self.text_re_search)])
+            text_checks.append(lambda text: any([search(text) for search in searches]))
         if self.text_re_match != None:
-            if type(self.text_re_match) in (list, tuple):
-                inner = []
-                for text_re_match in self.text_re_match:
-                    inner.append(re.match(text_re_match, other_text))
-                results.append(any(inner))
+            matches = tuple([re.compile(x).match for x in as_tuple(self.text_re_match)])
+            text_checks.append(lambda text: any([match(text) for match in matches]))
+
+        logic_func = self._logic_func
+        if logic_func not in (all, any):
+            # Unknown logic - all criteria, in order, passed to logic_func
+            def match(other):
+                if not isinstance(other, Element):
+                    return False
+                results = [check(other) for check in checks]
+                if text_checks:
+                    other_text = other.get_text()
+                    results.extend([check(other_text) for check in text_checks])
+                return logic_func(results)
+            return match
+
+        if text_checks:
+            if logic_func == all:
+                checks.append(lambda other: _all_text(text_checks, other.get_text()))
             else:
-                results.append(re.match(self.text_re_match, other_text))
-
-        return self._logic_func(results)
+                checks.append(lambda other: _any_text(text_checks, other.get_text()))
+
+        # Specialize the common cases
+        if not checks:
+            if logic_func == all:
+                return lambda other: isinstance(other, Element)
+            return lambda other: False
+        if len(checks) == 1:
+            check = checks[0]
+            return lambda other: isinstance(other, Element) and bool(check(other))
+
+        checks = tuple(checks)
+        if logic_func == all:
+            def match(other):
+                if not isinstance(other, Element):
+                    return False
+                for check in checks:
+                    if not check(other):
+                        return False
+                return True
+        else:
+            def match(other):
+                if not isinstance(other, Element):
+                    return False
+                for check in checks:
+                    if check(other):
+                        return True
+                return False
+        return match
 
     def __or__(self, other):
         return ElementMatcherCombined((self, other), any)
@@ -132,21 +167,71 @@ class ElementMatcher:
         return ElementMatcherCombined((self, other), all)
 
 
+def _all_text(text_checks, text):
+    for check in text_checks:
+        if not check(text):
+            return False
+    return True
+
+
+def _any_text(text_checks, text):
+    for check in text_checks:
+        if check(text):
+            return True
+    return False
+
 
 class ElementMatcherCombined(ElementMatcher):
     def __init__(self, matchers=(), logic_func=None):
-        if matchers:
-            self.matchers = list(matchers)
         if logic_func:
             self.logic_func = logic_func
-
-
-
-
-
-
-
-    def match(self, other):
-        results = [x.match(other) for x in self.matchers]
-        return self.logic_func(results)
-
+        # Flatten a | b | c (or a & b & c) into one level
+        flattened = []
+        for matcher in matchers:
+            if isinstance(matcher, ElementMatcherCombined) and logic_func in (all, any) \
+            and getattr(matcher, 'logic_func', None) == logic_func:
+                flattened.extend(matcher.matchers)
+            else:
+                flattened.append(matcher)
+        self.matchers = flattened
+
+    def class_tuple(self):
+        return None
+
+    def compile(self):
+        logic_func = self.logic_func
+        if logic_func not in (all, any):
+            matchers = tuple(self.matchers)
+            return lambda other: logic_func([x.match(other) for x in matchers])
+
+        funcs = []
+        if logic_func == any:
+            # Matchers that only check class become one isinstance()
+            classes = ()
+            for matcher in self.matchers:
+                class_tuple = matcher.class_tuple()
+                if class_tuple == None:
+                    funcs.append(matcher.match)
+                else:
+                    classes += class_tuple
+            if classes:
+                funcs.insert(0, lambda other: isinstance(other, Element) and isinstance(other, classes))
+        else:
+            funcs = [x.match for x in self.matchers]
+
+        if len(funcs) == 1:
+            return funcs[0]
+        funcs = tuple(funcs)
+        if logic_func == all:
+            def match(other):
+                for func in funcs:
+                    if not func(other):
+                        return False
+                return True
+        else:
+            def match(other):
+                for func in funcs:
+                    if func(other):
+                        return True
+                return False
+        return match
@@ -4,10 +4,11 @@
 # TODO include file name in exceptions
 
 import re
+import weakref
 import collections
 
 from .Exceptions import (
-        ParserError, InvalidMarkerError, 
+        USFMException, ParserError, InvalidMarkerError, 
         NonExistentMarkerError, NoTokenError,
         USFMSyntaxError
 )
@@ -46,20 +47,22 @@ from .Elements.NoteMarkerElements import (
 )
 
 from .Elements.MilestoneMarkerElements import (
-    C, V,
+    C, V, FORWARD, BACKWARD,
     MilestoneMarkerElement,
     PairedMilestoneMarkerElement,
     MILESTONE_MARKER_ELEMENTS
 )
 
-ALL_EXISTING_MARKERS = {x.default_marker:1 for x in 
-    list(PARAGRAPH_MARKER_ELEMENTS.values()) + 
-    list(CHARACTER_MARKER_ELEMENTS.values()) +
-    list(NOTE_MARKER_ELEMENTS.values())
-}
+from .Markers import ALL_EXISTING_MARKERS, SPAN_MARKERS_PAIR, NOT_A_MARKER, marker_info
+from .References import ReferenceIndex, Passage, parse_reference
 
 
-SPAN_MARKERS_PAIR = set(list(CHARACTER_MARKER_ELEMENTS.keys()) + list(NOTE_MARKER_ELEMENTS.keys())) - set(CHARACTER_NOTE_MARKERS_NO_END)
+# One verse from ParserResults.iter_verses()
+VerseText = collections.namedtuple('VerseText', ['chapter', 'verse', 'text', 'words'])
+
+# A problem found parsing with recover=True (see Parser), where exception is what
+# would have been raised
+Diagnostic = collections.namedtuple('Diagnostic', ['offset', 'line', 'column', 'exception'])
 
 
 class ParserResults(collections.deque):
@@ -74,6 +77,106 @@ class ParserResults(collections.deque):
 
         self.milestones = {}
         self.chapters = {}
+        self.lines = None       # LineIndex of the source, set by the Parser
+        self.diagnostics = []   # Diagnostic for each problem, if parsed with recover=True
+        self.references = None  # ReferenceIndex, built while parsing (see get_references())
+        self._source = None     # chunks of the source text, if kept (see source)
+
+    # The Parser that produced these results is referred to weakly, as it refers to them
+    @property
+    def parser(self):
+        parser_ref = self.__dict__.get('_parser_ref')
+        return parser_ref() if parser_ref != None else None
+
+    @parser.setter
+    def parser(self, parser):
+        self._parser_ref = weakref.ref(parser) if parser != None else None
+
+    @parser.deleter
+    def parser(self):
+        self.__dict__.pop('_parser_ref', None)
+
+    def get_location(self, offset):
+        """Location(line, column) of offset in the source, or None if it isn't known
+           (results not from a Parser, e.g. read by Serialization)"""
+        lines = self.__dict__.get('lines')
+        if lines == None:
+            return None
+        return lines.location(offset)
+
+    @property
+    def source(self):
+        """The USFM text parsed, or None if it isn't kept - results from yield_results(),
+           or not from a Parser, e.g. read by Serialization"""
+        chunks = self.__dict__.get('_source')
+        if not chunks:
+            return None
+        if len(chunks) > 1:
+            chunks[:] = [''.join(chunks)]
+        return chunks[0]
+
+    @source.setter
+    def source(self, text):
+        self._source = [text] if text != None else None
+
+    def add_source(self, text):
+        """Add text to the end of source, if it's kept"""
+        chunks = self.__dict__.get('_source')
+        if chunks != None:
+            chunks.append(text)
+
+    def get_references(self):
+        """ReferenceIndex of the verses - built while parsing, or from the elements
+           when first asked for (e.g. results read by Serialization)"""
+        references = self.__dict__.get('references')
+        if references == None:
+            references = ReferenceIndex.from_results(self)
+            self.references = references
+        return references
+
+    def get_passage(self, reference):
+        """Passage for a reference such as '3:16', '3:16-18', '3:16-4:2' or '3' (see
+           References.parse_reference()), or None if its first verse (or chapter) isn't
+           found. A verse is found by any number in its range, so '1:4' finds \\v 3-4.
+
+           The passage runs from the first verse's \\v (or the \\c of a whole chapter)
+           to the next \\c, \\v or \\d after the last verse, or to the end of the last
+           chapter for a whole chapter, or a last verse that isn't found."""
+        first_chapter, first_verse, last_chapter, last_verse = parse_reference(reference)
+        references = self.get_references()
+
+        if first_verse == None:
+            first = self.get_chapter(first_chapter)
+        else:
+            first = references.find_verse(first_chapter, first_verse)
+        if first == None:
+            return None
+        start = first.start
+
+        last = references.find_verse(last_chapter, last_verse) if last_verse != None else None
+        if last != None and last.start >= start:
+            end = references.get_verse_end(last)
+        else:
+            # To the end of last_chapter
+            chapter = self.get_chapter(last_chapter)
+            end = references.get_chapter_end(chapter) if chapter != None else references.end
+
+        return Passage(self, reference, start, end, references.get_verses_between(start, end))
+
+    def __getitem__(self, key):
+        # results['3:16-18'] is get_passage(), raising KeyError for a passage not found
+        if isinstance(key, str):
+            passage = self.get_passage(key)
+            if passage == None:
+                raise KeyError(key)
+            return passage
+        return collections.deque.__getitem__(self, key)
+
+    def __reduce__(self):
+        # Elements after the state, as they refer back to the results. The parser isn't kept.
+        state = dict(self.__dict__)
+        state.pop('_parser_ref', None)
+        return (self.__class__, (), state, iter(self))
     
     # element , int
     def get_chapter(self, chapter):
@@ -111,6 +214,60 @@ class ParserResults(collections.deque):
 
         return len(chapter.get_verses())
 
+    def iter_verses(self):
+        """Yield VerseText(chapter, verse, text, words) for every verse, in order, where
+           chapter is the number of the last \\c (None before the first), verse is the
+           VerseNumberSequence of the \\v (V.value - e.g. 3-4 for a range, see first_verse),
+           and text and words are the same as V.get_text() and V.get_words() give. Done in
+           one pass over the flattened elements."""
+        excluded_classes = (F, FE, X, SP)
+        # id(element) => whether an ancestor is excluded_classes (see ChildElement.has_ancestor())
+        excluded = {}
+
+        def has_excluded_ancestor(elem):
+            key = id(elem)
+            if key not in excluded:
+                parents = getattr(elem, 'parents', None)
+                if parents:
+                    parent = parents[0]
+                    excluded[key] = isinstance(parent, excluded_classes) \
+                        or has_excluded_ancestor(parent)
+                else:
+                    excluded[key] = False
+            return excluded[key]
+
+        chapter = None
+        verse = None
+        texts = None            # None when not in a verse
+        for elem in self.get_flattened_forward():
+            if isinstance(elem, (C, V, D)):
+                if texts != None:
+                    yield VerseText(chapter, verse.value, verse.normalize_whitespace(''.join(texts)), words)
+                    texts = None
+                if isinstance(elem, C):
+                    chapter = elem.value
+                elif isinstance(elem, V):
+                    verse = elem
+                    texts = []
+                    words = []
+            elif texts != None and isinstance(elem, (Text, Whitespace, W)):
+                # (_psalm_119_skip, checked by V.get_text(), is only set on D)
+                if has_excluded_ancestor(elem):
+                    continue
+                if isinstance(elem, W):
+                    words.append(elem)
+                else:
+                    texts.append(elem.get_text())
+        if texts != None:
+            yield VerseText(chapter, verse.value, verse.normalize_whitespace(''.join(texts)), words)
+
+    def invalidate(self):
+        """Drop the flattened elements cached here, and verse and chapter text cached
+           by the elements (see MilestoneMarkerElement). Call after changing the results."""
+        for name in ('_flattened_forward', '_flattened_backward', '_next_index'):
+            self.__dict__.pop(name, None)
+        self.__dict__['_changes'] = self.__dict__.get('_changes', 0) + 1
+
     def get_flattened(self):
         return self.get_flattened_forward()
 
@@ -125,9 +282,46 @@ class ParserResults(collections.deque):
                 all_elems.extend(elem.get_flattened_forward())
             else:
                 all_elems.append(elem)
+        # Each element's position in flattened order, for get_flattened_index().
+        # Backwards, so an element that occurs twice gets its first position.
+        for idx in range(len(all_elems) - 1, -1, -1):
+            all_elems[idx]._flattened_idx = idx
         self._flattened_forward = all_elems
         return all_elems
 
+    def get_flattened_index(self, elem, direction=FORWARD):
+        """Index of elem in get_flattened_forward() (or get_flattened_backward())."""
+        all_flattened = self.get_flattened_forward()
+        idx = getattr(elem, '_flattened_idx', None)
+        if idx == None or idx >= len(all_flattened) or all_flattened[idx] is not elem:
+            idx = all_flattened.index(elem)     # not from this tree - ValueError as list
+        if direction == BACKWARD:
+            return len(all_flattened) - 1 - idx
+        return idx
+
+    def get_next_index(self, classes, direction=FORWARD):
+        """For the flattened elements in direction, a list where item i is the index of
+           the first element at or after i that is an instance of classes (a class or
+           tuple of classes), or the number of elements if there isn't one."""
+        if not hasattr(self, '_next_index'):
+            self._next_index = {}
+        key = (classes, direction)
+        if key in self._next_index:
+            return self._next_index[key]
+
+        if direction == FORWARD:
+            all_flattened = self.get_flattened_forward()
+        else:
+            all_flattened = self.get_flattened_backward()
+        next_idx = len(all_flattened)
+        next_index = [next_idx] * (next_idx + 1)
+        for idx in range(len(all_flattened) - 1, -1, -1):
+            if isinstance(all_flattened[idx], classes):
+                next_idx = idx
+            next_index[idx] = next_idx
+        self._next_index[key] = next_index
+        return next_index
+
     def get_flattened_backward(self):
         if hasattr(self, '_flattened_backward'):
             return self._flattened_backward
@@ -141,12 +335,12 @@ class ParserResults(collections.deque):
         """"""
         # TODO P crossing chapter?
         milestone = self.get_chapter_milestone(self, chapter)
-        return milestone.elements_from(until=ElementMatcher(cls=C))
+        return milestone.elements_from(until_cls=C)
 
     def get_chapter_verse_elements(self, chapter, verse):
         """"""
         chapter_verse_milestone = self.get_chapter_verse_milestone(chapter, verse)
-        return chapter_verse_milestone.elements_from(until=ElementMatcher(cls=V))
+        return chapter_verse_milestone.elements_from(until_cls=V)
 
     # These methods correspond to markers in 'Identification'
 
@@ -217,10 +411,29 @@ class Parser:
 
        Parsing doesn't happen automatically - parse() must be called."""
 
-    DEFAULT_MAX_DEPTH = 3
+    # Maximum nesting of character / note markers (None for no limit), unless max_depth=N
+    # is given to the constructor
+    DEFAULT_MAX_DEPTH = None
+
+    # Tokens that are never markers (see marker_info())
+    _NOT_MARKER_TYPES = (Token.TYPE_TEXT, Token.TYPE_SPACE, Token.TYPE_NEWLINE, Token.TYPE_ATTRIBUTE)
+
+    # Events passed to trace() (see __init__)
+    TRACE_PARAGRAPH_START = 'paragraph start'
+    TRACE_PARAGRAPH_END = 'paragraph end'
+    TRACE_SPAN_START = 'span start'
+    TRACE_SPAN_END = 'span end'
+    TRACE_MILESTONE = 'milestone'
 
     def __init__(self, text='', **kwargs):
-        self.tokenizer = Tokenizer()    # discard?
+        # columnar=True keeps tokens in a TokenStore (see Tokenizer)
+        # offset=N parses text as part of a larger source, starting at offset N in it,
+        # and line=L (with offset) at line L of it, for locations and error messages
+        self.tokenizer = Tokenizer(
+            columnar=kwargs.get('columnar', False), offset=kwargs.get('offset', 0),
+            line=kwargs.get('line', 1)
+        )
+        self._unsupported_newlines = '\r' in text
         if text:
             self.tokenizer.add(text)
 
@@ -229,7 +442,16 @@ class Parser:
         self.try_bound = 0
 
         self.results = ParserResults()
-        self.results.parser = self      # requires reference to use line num
+        self.results.parser = self      # weak - see ParserResults
+        self.results.lines = self.tokenizer.lines
+        self.results.references = ReferenceIndex()
+        # Offsets of a source starting at offset=N don't index text, so it isn't kept
+        if not kwargs.get('offset', 0):
+            self.results.source = text
+
+        # When set, tokens at or after this index aren't parsed (see yield_results())
+        self.token_limit = None
+        self._boundary_scan_bound = 0
         
         self._last_paired_milestone_markers = {}
         self._current_chapter_marker = None
@@ -238,14 +460,19 @@ class Parser:
 
         self._prev_d_text = None
 
-        for k in kwargs:
-            setattr(self, k, kwargs[k])
+        # trace=callable is called as trace(event, element, depth) while parsing, where event
+        # is one of the TRACE_* constants and depth is the number of character/note markers
+        # the element is within. e.g. Parser(text, trace=print)
+        self.trace = None
 
-        self.DEBUG = 1
+        # recover=True records parse errors in results.diagnostics, rather than raising
+        # them, skipping to the next paragraph marker or \c (see _recover())
+        self.recover = False
+        self._failed = None
+        self._current_paragraph = None
 
-        #if self.DEBUG:
-        #    self.tokenizer.DEBUG = 1
-        #    print('\n\n\nPARSER CONSTRUCT: {}'.format(text))
+        for k in kwargs:
+            setattr(self, k, kwargs[k])
 
     def __getattr__(self, name):
         if name.startswith('r'):
@@ -259,15 +486,25 @@ class Parser:
 
     def add(self, text):
         self.tokenizer.add(text)
-        if self.DEBUG:
-            print('\n\n\nPARSER ADD: {}'.format(text))
+        self.results.add_source(text)
+        if '\r' in text:
+            self._unsupported_newlines = True
 
     def reset(self):
         """Reset entire state of parser"""
         self.tokenizer.reset()
+        self._unsupported_newlines = False
         self.parsing_bound = 0
         self.try_bound = 0
+        self.token_limit = None
+        self._boundary_scan_bound = 0
         self.results = ParserResults()
+        self.results.parser = self
+        self.results.lines = self.tokenizer.lines
+        self.results.references = ReferenceIndex()
+        # As in __init__(), the source isn't kept if it's part of a larger one
+        if not self.tokenizer.lines.offset:
+            self.results.source = ''
 
     def get_marker_class(self, marker):
         """Get a marker class from the marker (e.g. 'p')"""
@@ -292,7 +529,7 @@ class Parser:
                 self.line_num, marker
             ))
 
-    def parse(self):
+    def parse(self, final=True):
         """Parse using tokens we have so far. If text added doesn't form complete
            tokens, only the complete tokens will be parsed, taking into consideration 
            things like \\h (which needs a following space), or \\c (which needs a following
@@ -305,26 +542,23 @@ class Parser:
            
            'All new character marker starts (without the + prefix) close all existing nesting.'
 
+           final=False if more text may be added, so text at the end isn't tokenized until
+           it's known to be complete (see Tokenizer.tokenize()).
         """
-        self.line_num = 1
-        self.tokenizer.tokenize()
+        self.tokenizer.tokenize(final)
 
         # TODO
-        if '\r' in self.tokenizer.text:
+        if self._unsupported_newlines:
             raise ParserError("unsupported newlines")
 
-        if self.DEBUG:
-            print(self.tokenizer.tokens)
 
         self.try_bound = self.parsing_bound
+        # The only existing chapter verses parsed now can be added to
+        chapter = self._current_chapter_marker
 
-        #if self.DEBUG:
-        #    print('nearly main loop, tokens = {}'.format(self.tokenizer.tokens))
 
         while self.current_token():
             token = self.current_token()
-            if self.DEBUG:
-                print("MAIN LOOP token = {}".format(token))
 
             # Text and whitespace. Don't collapse this, because processors are 
             # written in terms of parsers, and processors need to preserve significant whitespace.
@@ -335,8 +569,6 @@ class Parser:
                 whitespace._depth = 1
                 self.results.append(whitespace)
                 self.advance_token()
-                if token.type == Token.TYPE_NEWLINE:
-                    self.line_num += 1
                 continue
             elif token.type == Token.TYPE_TEXT:
                 text = Text(token.start, token.end, (), token.value)
@@ -351,92 +583,103 @@ class Parser:
 
             # Handle markers, attributes. 
 
-            if token.type != Token.TYPE_ATTRIBUTE:
-                marker = self.marker_from_token(token)
-            if self.DEBUG:
-                print('\tmarker = {}'.format(marker))
-            if token.type == Token.TYPE_MARKER_START and marker not in ('c', 'v'):
-                # Parse USFM as a series of paragraph markers.
-
-                # Avoid handling \c specially. Provide a better mechanism for handling
-                # \c and \v "contents" that respects USFM structure (e.g. handles overlapping)
-                # Because of this, Paragraph elements have children - Text and Character/Note
-                # elements intermingled, and certain Character / Note elements have children
-                # (e.g. \f \ft some text \f*), but Paragraphs don't have a parent, to support
-                # e.g. quotations going across chapter bounds
-
-                if marker in PARAGRAPH_MARKER_ELEMENTS:
-                    if self.DEBUG:
-                        print('\t parsing paragraph, token={}, marker={}'.format(token, marker))
-                    paragraph = self.parse_paragraph_marker()
-                    # paragraphs are top-level elements. If generating, don't reference .results
-                    self.results.append(paragraph)
-                # Handle \v, and \fr, \ft and similar character markers without an end 
-                # all together in parse_span_marker()
-
-                elif marker[0].lower() == 'z':
-                    if self.DEBUG:
-                        print('\t custom = {}'.format(token))
-                    pass
+            try:
+                if token.type != Token.TYPE_ATTRIBUTE:
+                    info = self.marker_info(token)
+                    marker = info.marker
+                if token.type == Token.TYPE_MARKER_START and not (info.is_c or info.is_v):
+                    # Parse USFM as a series of paragraph markers.
+
+                    # Avoid handling \c specially. Provide a better mechanism for handling
+                    # \c and \v "contents" that respects USFM structure (e.g. handles overlapping)
+                    # Because of this, Paragraph elements have children - Text and Character/Note
+                    # elements intermingled, and certain Character / Note elements have children
+                    # (e.g. \f \ft some text \f*), but Paragraphs don't have a parent, to support
+                    # e.g. quotations going across chapter bounds
+
+                    if info.paragraph:
+                        paragraph = self.parse_paragraph_marker()
+                        # paragraphs are top-level elements. If generating, don't reference .results
+                        self.results.append(paragraph)
+                    # Handle \v, and \fr, \ft and similar character markers without an end 
+                    # all together in parse_span_marker()
+
+                    elif marker[0].lower() == 'z':
+                        pass
 
-                else:
-                    if marker in ALL_EXISTING_MARKERS or marker.endswith('-s') or marker.endswith('-e'):
-                        e = USFMSyntaxError("[~ {}] \\{} marker cannot occur in this context".format(
-                            self.line_num, marker
-                        ))
-                        self.results.append(ParsingFailedElement(token.start, e))
-                        raise e
                     else:
-                        e = NonExistentMarkerError("[~ {}] \\{} is not a marker in USFM".format(
-                            self.line_num, marker
-                        ))
-                        self.results.append(ParsingFailedElement(token.start, e))
-                        raise e
-
+                        if info.existing or info.milestone:
+                            e = USFMSyntaxError("[~ {}] \\{} marker cannot occur in this context".format(
+                                self.line_num, marker
+                            ))
+                            self._add_failed(token.start, e)
+                            raise e
+                        else:
+                            e = NonExistentMarkerError("[~ {}] \\{} is not a marker in USFM".format(
+                                self.line_num, marker
+                            ))
+                            self._add_failed(token.start, e)
+                            raise e
+
+
+                # C occurs only at top level (no parents, handled by main loop)
+                # V occurs only within paragraph
+                elif token.type == Token.TYPE_MARKER_START and info.is_c:
+                    c_milestone = self.milestone_c_v()
+                    c_milestone._depth = 1
+                    self.results.chapters[ c_milestone.value ] = c_milestone
+                    self.results.append(c_milestone)
+                    self.advance_token()
 
-            # C occurs only at top level (no parents, handled by main loop)
-            # V occurs only within paragraph
-            elif token.type == Token.TYPE_MARKER_START and marker == 'c':
-                if self.DEBUG:
-                    print('\tdoing milestone_c_v()')
-                c_milestone = self.milestone_c_v()
-                c_milestone._depth = 1
-                self.results.chapters[ c_milestone.value ] = c_milestone
-                self.results.append(c_milestone)
-                self.advance_token()
+                elif token.type == Token.TYPE_MARKER_START and info.is_v:
+                    e = USFMSyntaxError("[~ {}] \\v cannot occur in this context".format(
+                        self.line_num
+                    ))
+                    self._add_failed(token.start, e)
+                    raise e
 
-            elif token.type == Token.TYPE_MARKER_START and marker == 'v':
-                e = USFMSyntaxError("[~ {}] \\v cannot occur in this context".format(
-                    self.line_num
-                ))
-                self.results.append(ParsingFailedElement(token.start, e))
-                raise e
+                elif token.type == Token.TYPE_MARKER_END:
+                    self.advance_token()
+                    if self.current_token():
+                        # handle milestones
+                        self.retreat_token()
+                        if token.value.endswith('\\*'):
+                            milestone = self.milestone()
+                        elif self.marker_from_token(token.value) in ('c', 'v'):
+                            milestone = self.milestone_c_v()
+                            if isinstance(milestone, C):
+                                self.results.chapters[milestone.value] = milestone
+                        else:
+                            raise ParserError("[~ {}] Unhandled".format(self.line_num))
+                        milestone._depth = 1
+                        self.results.append(milestone)
+                        self.advance_token()
 
-            elif token.type == Token.TYPE_MARKER_END:
-                self.advance_token()
-                if not self.current_token():
-                    if self.DEBUG:
-                        print('MAIN LOOP DONE token = {}'.format(token))
                 else:
-                    # handle milestones
-                    self.retreat_token()
-                    if token.value.endswith('\\*'):
-                        milestone = self.milestone()
-                    elif self.marker_from_token(token.value) in ('c', 'v'):
-                        milestone = self.milestone_c_v()
-                        if isinstance(milestone, C):
-                            self.results.chapters[milestone.value] = milestone
-                    else:
-                        raise ParserError("[~ {}] Unhandled".format(self.line_num))
-                    milestone._depth = 1
-                    self.results.append(milestone)
-                    self.advance_token()
+                    raise ParserError("[~ {}] Unhandled, token = {}".format(self.line_num, token))
 
-            else:
-                raise ParserError("[~ {}] Unhandled, token = {}".format(self.line_num, token))
+            except (USFMException, ValueError) as e:
+                if not self.recover:
+                    raise
+                self._recover(e)
 
         if self.try_bound > self.parsing_bound:
             self.parsing_bound = self.try_bound
+            # Elements were appended to the results (and verses to chapter) directly
+            self.results.invalidate()
+            if chapter != None:
+                chapter.invalidate()
+
+        # The end of the last token parsed - not of the last element, which may be a
+        # ParsingFailedElement (see recover), without an end
+        references = self.results.references
+        consumed = min(self.try_bound, len(self.tokenizer.tokens))
+        if references != None and consumed:
+            references.end = max(references.end, self.tokenizer.tokens[consumed - 1].end)
+
+        # Parsed tokens aren't needed again - Elements keep their own text and offsets
+        if self.tokenizer.discard_after_tokenizing:
+            self._discard_parsed_tokens()
 
     def marker_from_token(self, token, matching=False):
         """Return marker (not Element) for provided token (e.g. '\\p ' -> 'p', '\\w*' -> 'w'),
@@ -449,16 +692,16 @@ class Parser:
             return ''
         if not isinstance(token, Token):
             raise ParserError("marker_from_token() got non-Token, not None")
-        if not token.value.startswith('\\'):
-            return ''
-        tmp = token.value.replace('\\', '')
-        tmp = tmp.replace('*', '')
-        if not matching:
-            tmp = tmp.replace('+', '')
-        tmp = re.sub(r'\s+|\d+', '', tmp)
-        # don't strip -
-        tmp = tmp.lower()
-        return tmp
+        info = marker_info(token.value)
+        return info.marker_matching if matching else info.marker
+
+    def marker_info(self, token):
+        """MarkerInfo (see Markers) for token - NOT_A_MARKER for None, and for text,
+           whitespace and attribute tokens"""
+        # 'is', as Token.__eq__ is slow enough to matter here
+        if token is None or token.type in self._NOT_MARKER_TYPES:
+            return NOT_A_MARKER
+        return marker_info(token.value)
 
     def _marker_number_from_token(self, token):
         m = re.search(r'\d+', token.value)
@@ -475,10 +718,16 @@ class Parser:
         else:
             return None
 
+    def _num_tokens(self):
+        """Number of tokens available to parse - all tokens, unless token_limit is set"""
+        if self.token_limit == None:
+            return len(self.tokenizer.tokens)
+        return self.token_limit
+
     def current_token(self):
         """Retrieve the current token without advancing through tokens. This returns
            a Token or None."""
-        if self.try_bound < len(self.tokenizer.tokens):
+        if self.try_bound < self._num_tokens():
             return self.tokenizer.tokens[self.try_bound]
         else:
             return None
@@ -487,7 +736,7 @@ class Parser:
         """Retrieve next token. Calling this means we expect there to be a next token,
            so raise exception if there isn't one."""
         self.try_bound += 1
-        if self.try_bound < len(self.tokenizer.tokens):
+        if self.try_bound < self._num_tokens():
             return self.tokenizer.tokens[self.try_bound]
         else:
             raise NoTokenError("No next token but next token requested")
@@ -499,20 +748,151 @@ class Parser:
         self.try_bound -= 1
 
     def last_token(self):
-        if self.tokenizer.tokens:
-            return self.tokenizer.tokens[-1]
+        num_tokens = self._num_tokens()
+        if num_tokens:
+            return self.tokenizer.tokens[num_tokens - 1]
         else:
             raise NoTokenError("Last token not retrievable")
 
     def get_results(self):
         return self.results
 
-    def yield_results(self):
-        # TODO
+    def get_location(self, offset=None):
+        """Location(line, column) of offset in the source (see Locations) - by default,
+           of the current token"""
+        if offset == None:
+            token = self.current_token()
+            offset = token.start if token else self.tokenizer.tokenizing_bound
+        return self.tokenizer.lines.location(offset)
+
+    @property
+    def line_num(self):
+        """Line of the current token, for error messages"""
+        return self.get_location().line
+
+    def _add_failed(self, offset, e):
+        """Add a ParsingFailedElement for e, raised at offset, to the results. When
+           recovering, _recover() adds it, after any paragraph it's in."""
+        failed = ParsingFailedElement(offset, e)
+        failed._root = self.results
+        if self.recover:
+            self._failed = failed
+        else:
+            self.results.append(failed)
+
+    @property
+    def diagnostics(self):
+        return self.results.diagnostics
+
+    def _recover(self, e):
+        """Record e, raised while parsing, as a Diagnostic and a ParsingFailedElement, and
+           skip to the next paragraph marker or \\c after where it was raised. A paragraph
+           being parsed keeps the elements parsed before e, and ends there."""
+        failed = self._failed
+        self._failed = None
+        if failed == None or failed.e is not e:
+            token = self.current_token()
+            offset = token.start if token else self.tokenizer.tokenizing_bound
+            failed = ParsingFailedElement(offset, e)
+            failed._root = self.results
+        location = self.get_location(failed.offset)
+        self.results.diagnostics.append(
+            Diagnostic(failed.offset, location.line, location.column, e)
+        )
+
+        token = self.current_token()
+        while token and (token.start <= failed.offset or not self.is_boundary_token(token)):
+            self.advance_token()
+            token = self.current_token()
+
+        paragraph = self._current_paragraph
+        self._current_paragraph = None
+        if paragraph != None:
+            paragraph.end = token.start if token else self.last_token().end
+            paragraph._root = self.results
+            if self.trace:
+                self.trace(self.TRACE_PARAGRAPH_END, paragraph, 0)
+            self.results.append(paragraph)
+        self.results.append(failed)
+        return failed
+
+    def is_boundary_token(self, token):
+        """Is token a paragraph marker or \\c? These close whatever top-level element precedes them."""
+        if token.type != Token.TYPE_MARKER_START:
+            return False
+        return marker_info(token.value).boundary
+
+    def _last_boundary(self):
+        """Index of the last boundary token after the current parsing_bound, or None."""
+        tokens = self.tokenizer.tokens
+        start = max(self._boundary_scan_bound, self.parsing_bound + 1)
+        last = None
+        for idx in range(start, len(tokens)):
+            if self.is_boundary_token(tokens[idx]):
+                last = idx
+        self._boundary_scan_bound = len(tokens)
+        return last
+
+    def yield_results(self, final=False):
+        """Parse text added so far, yielding each top-level element (paragraphs, \\c milestones,
+           and any whitespace / text between them) as soon as it's known to be complete - that
+           is, when a following paragraph marker or \\c has been seen. Use with add():
+
+               for chunk in chunks:
+                   parser.add(chunk)
+                   for element in parser.yield_results():
+                       ...
+               for element in parser.yield_results(final=True):
+                   ...
+
+           final=True parses everything remaining. Yielded elements are removed from
+           .results, and parsed tokens are discarded, so memory use is bounded by the
+           largest paragraph (or chapter, since \\c milestones reference their verses)
+           rather than the whole text. So neither .results.source nor a ReferenceIndex of
+           the verses is kept.
+
+           Yielded elements aren't in .results, so the text of a yielded verse (V.get_text())
+           is taken from the paragraph it's in, and a verse continuing into the next
+           paragraph has only its text in the first."""
+        self.results.source = None
+        self.results.references = None
+        self.tokenizer.tokenize(final)
+
+        if final:
+            self.token_limit = None
+        else:
+            limit = self._last_boundary()
+            if limit == None:
+                return
+            self.token_limit = limit
+
+        try:
+            self.parse(final)
+        finally:
+            self.token_limit = None
+
+        self._discard_parsed_tokens()
+
+        # Elements flattened before are yielded now (see MilestoneMarkerElement.elements_from())
+        self.results.invalidate()
         while self.results:
             element = self.results.popleft()
+            if isinstance(element, C) and self.results.chapters.get(element.value) is element:
+                # the caller owns it now
+                del self.results.chapters[element.value]
             yield element
 
+    def _discard_parsed_tokens(self):
+        """Discard tokens up to parsing_bound, adjusting token indices."""
+        if not self.parsing_bound:
+            return
+        # Spans left open at the end of the text leave parsing_bound past the last token
+        discarded = min(self.parsing_bound, len(self.tokenizer.tokens))
+        self.tokenizer.discard_tokens(discarded)
+        self.parsing_bound = 0
+        self.try_bound = 0
+        self._boundary_scan_bound = max(0, self._boundary_scan_bound - discarded)
+
     # These methods parse using tokens, the element classes themselves can (sometimes) parse from strings
     # Element class parse methods are not used here.
 
@@ -557,8 +937,8 @@ class Parser:
         else:
             return None
 
-    def milestone(self):
-        """Return a Milestone, **except** C and V."""
+    def milestone(self, depth=0):
+        """Return a Milestone, **except** C and V. depth is for trace()."""
         token = self.current_token()
         if '-' in token.value:
             # start/end milestone
@@ -579,10 +959,10 @@ class Parser:
                     marker=marker, marker_raw=token.value, 
                     milestone_type=PairedMilestoneMarkerElement.TYPE_START
                 )
-                if self.DEBUG:
-                    print('(converted) {}'.format(elem))
                 elem._root = self.results
                 self._last_paired_milestone_markers[marker] = elem
+                if self.trace:
+                    self.trace(self.TRACE_MILESTONE, elem, depth)
                 return elem
                 
             elif parts[1].lower() == 'e':
@@ -596,9 +976,9 @@ class Parser:
                     marker=marker, marker_raw=token.value,
                     milestone_type=PairedMilestoneMarkerElement.TYPE_END
                 )
-                if self.DEBUG:
-                    print('(converted) {}'.format(elem))
                 elem._root = self.results
+                if self.trace:
+                    self.trace(self.TRACE_MILESTONE, elem, depth)
                 return elem
             else:
                 raise InvalidMarkerError("Marker is not valid ({}). Not start/end, and standalone marker should not contain -".format(token.value))
@@ -610,26 +990,26 @@ class Parser:
             marker_class = MILESTONE_MARKER_ELEMENTS[marker]
             elem = marker_class(token.start, token.end, marker, token.value)
             elem._root = self.results
-            if self.DEBUG:
-                print('\t(converted) {}'.format(elem))
+            if self.trace:
+                self.trace(self.TRACE_MILESTONE, elem, depth)
             return elem
 
-    def milestone_c_v(self):
+    def milestone_c_v(self, depth=0):
         """Insert \\c or \\v milestones (not handled above since they don't use syntax
-           of milestones). they parse as milestones."""
+           of milestones). they parse as milestones. depth is for trace()."""
         token = self.current_token()
-        marker = self.marker_from_token(token)
+        info = self.marker_info(token)
+        marker = info.marker
         marker_raw = token.value
         self.advance_token()
         while self.current_token().type in (Token.TYPE_SPACE, Token.TYPE_NEWLINE):
             marker_raw += self.current_token().value
             self.advance_token()
         
-        marker_class = self.get_marker_class(marker)
-        if self.DEBUG:
-            print('\tmilestone_c_v: token = {}, marker = {}, marker_class = {}, advanced to {}'.format(
-                token, marker, marker_class, self.current_token()
-            ))
+        marker_class = info.cls or self.get_marker_class(marker)
+        if info.is_c:
+            # Until this parses - verses after a bad \c aren't in the previous chapter
+            self._current_chapter_marker = None
         
         value = marker_class.convert(self.current_token().value)
         marker_class.validate(value)
@@ -641,9 +1021,12 @@ class Parser:
                 value=value
         )
         elem._root = self.results
+        references = self.results.references
         if isinstance(elem, C):
             self._current_chapter_marker = elem
             self._current_verse_marker = None
+            if references != None:
+                references.add_chapter(elem)
 
         # set current chapter if C, attach chapter marker if V
         elif isinstance(elem, V):
@@ -653,25 +1036,22 @@ class Parser:
             if self._current_chapter_marker != None:
                 elem.parents.append(self._current_chapter_marker)
                 self._current_chapter_marker.children.append(elem)
-        if self.DEBUG:
-            print("\t(converted) {}".format(elem))
+            if references != None:
+                chapter = self._current_chapter_marker
+                references.add_verse(chapter.value if chapter != None else None, elem)
+        if self.trace:
+            self.trace(self.TRACE_MILESTONE, elem, depth)
         return elem
 
     def parse_paragraph_marker(self):
         # Non-recursive - paragraph elements are not contained in other paragraph elements.
         start_token = self.current_token()
-        if self.DEBUG:
-            print('PARA, start token = {}'.format(start_token))
 
-        self.line_num += start_token.value.count('\n')  # TODO
 
-        start_ctm = self.marker_from_token(start_token)
-        if self.DEBUG:
-            print('\tstart ctm = {}'.format(start_ctm))
+        start_info = self.marker_info(start_token)
+        start_ctm = start_info.marker
 
-        start_marker_class = self.get_marker_class(start_ctm)
-        if self.DEBUG:
-            print('\tstart marker class = {}'.format(start_marker_class.__name__))
+        start_marker_class = start_info.cls or self.get_marker_class(start_ctm)
 
         # start_marker_class cannot be a milestone.
         assert(not issubclass(start_marker_class, MilestoneMarkerElement))
@@ -680,49 +1060,55 @@ class Parser:
         # These don't have parents
         start_elem = start_marker_class(start_token.start, 0, start_ctm, start_token.value, ())
         start_elem._depth = 1
+        if start_marker_class == D and self.results.references != None:
+            # \d ends a verse (see References)
+            self.results.references.add_boundary(start_token.start)
+        if self.trace:
+            self.trace(self.TRACE_PARAGRAPH_START, start_elem, 0)
 
         # Handle numbering
         if issubclass(start_marker_class, NumberedElement):
-            number = self._first_number_in_string(start_token.value)
+            number = start_info.number
             if number == None:
                 if start_ctm in ('toc', 'toca'):
-                    e = InvalidMarkerError("\\{} must be numbered (e.g. \\{}1)".format(
-                        start_ctm, start_ctm
+                    e = InvalidMarkerError("[~ {}] \\{} must be numbered (e.g. \\{}1)".format(
+                        self.get_location(start_token.start).line, start_ctm, start_ctm
                     ))
-                    self.results.append(ParsingFailedElement(start_token.start, e))
+                    self._add_failed(start_token.start, e)
                     raise e
                 else:
                     start_elem.number = 1
             else:
-                start_elem.number = int(number)
+                start_elem.number = number
 
         # Handle elements until another paragraph element is found.
+        self._current_paragraph = start_elem
         self.advance_token()
         token = self.current_token()
         if not token:
+            self._current_paragraph = None
             start_elem.end = start_token.end
+            if self.trace:
+                self.trace(self.TRACE_PARAGRAPH_END, start_elem, 0)
             return start_elem
         else:
-            self.line_num += token.value.count('\n')    # TODO
-            marker = self.marker_from_token(token)
+            info = self.marker_info(token)
+            marker = info.marker
 
-        if self.DEBUG: print('PARA LOOP starting, token = {}, marker = {}'.format(token, marker))
 
-        while token and marker not in PARAGRAPH_MARKER_ELEMENTS and marker != 'c':
+        while token and not info.boundary:
             # Collapse the longest run of text (without marker) we can
             plain_text = self.collapse_text((Token.TYPE_SPACE, Token.TYPE_NEWLINE, Token.TYPE_TEXT))
             if plain_text:
-                self.line_num += plain_text.text.count('\n')    # TODO
-                if self.DEBUG: print('\t(para) collapsed [{}]'.format(plain_text.get_text()))
                 plain_text._depth = 2
                 plain_text.parents.append(start_elem)
                 start_elem.children.append(plain_text)
                 if start_marker_class == D and self._current_verse_marker and self._current_verse_marker.value != 1:
                     start_elem._psalm_119_skip = True
                     self._prev_d_text = plain_text
-            elif token.type == Token.TYPE_MARKER_START and marker == 'c':
+            elif token.type == Token.TYPE_MARKER_START and info.is_c:
                 raise ParserError("[~ {}] Should not occur".format(self.line_num))
-            elif token.type == Token.TYPE_MARKER_START and marker == 'v':
+            elif token.type == Token.TYPE_MARKER_START and info.is_v:
                 v_milestone = self.milestone_c_v()
                 v_milestone._depth = 2
                 v_milestone.parents.append(start_elem)
@@ -733,7 +1119,7 @@ class Parser:
                     start_elem.children.append(self._prev_d_text)
                     self._prev_d_text = None
             elif token.type == Token.TYPE_MARKER_START \
-            and (marker in CHARACTER_MARKER_ELEMENTS or marker in NOTE_MARKER_ELEMENTS):
+            and info.span:
                 span = self.parse_span_marker()
                 span.parents.append(start_elem)
                 start_elem.children.append(span)
@@ -743,183 +1129,187 @@ class Parser:
                 start_elem.children.append(milestone)
                 # TODO useful API for self-closing and start/end milestones that aren't c/v?
             else:
-                if marker in ALL_EXISTING_MARKERS:
+                if info.existing:
                     raise ParserError("[~line {}] Should not occur, token={}".format(
                         self.line_num, token
                     ))
                 else:
-                    raise NonExistentMarkerError("Marker \\{} does not exist in USFM".format(marker))
+                    raise NonExistentMarkerError("[~ {}] Marker \\{} does not exist in USFM".format(
+                        self.line_num, marker
+                    ))
 
             self.advance_token()
             token = self.current_token()
-            marker = self.marker_from_token(token)
+            info = self.marker_info(token)
+            marker = info.marker
 
-        if self.DEBUG:
-            print('PARA LOOP finishing, token = {}, marker = {}'.format(token, marker))
 
         # Determine exit cond
         if not token:
             # Finish whole parse, not just paragraph
             last_token = self.last_token()
             start_elem.end = last_token.end
-            if self.DEBUG:
-                print('PARSE finishing (para)')
-        elif marker in PARAGRAPH_MARKER_ELEMENTS or marker == 'c':
+        elif info.boundary:
             start_elem.end = token.start
         else:
             raise ParserError("[~ line {}] Should not occur - impossible".format(self.line_num))
 
+        self._current_paragraph = None
         start_elem._root = self.results
+        if self.trace:
+            self.trace(self.TRACE_PARAGRAPH_END, start_elem, 0)
         return start_elem
             
         # TODO adjust self.parsing_bound
 
 
     def parse_span_marker(self, depth=0):
-        """A recursive method to parse span (character, note) markers.
-           Returns a SpanMarkerElement subclass."""
+        """Parse span (character, note) markers, and the spans nested in them.
+           Returns a SpanMarkerElement subclass.
+
+           Nested spans are kept on a stack rather than parsed recursively, so nesting
+           isn't limited unless max_depth=N is given to the Parser constructor."""
+
+        max_depth = getattr(self, 'max_depth', self.DEFAULT_MAX_DEPTH)
+        if max_depth != None:
+            max_depth = int(max_depth)
+
+        # (element, MarkerInfo of its start token, start token, depth) of each span
+        # containing the one being parsed, outermost first
+        stack = []
+        start_elem, start_info, start_token = self._start_span(depth, max_depth)
+
+        # Handle all elements & attributes, and nested spans.
+        token = self.next_token()
+        info = self.marker_info(token)
+        marker = info.marker
+
+        while True:
+            while token and not info.boundary:
+
+                # Collapse the longest run of text (without marker) we can
+                plain_text = self.collapse_text((Token.TYPE_SPACE, Token.TYPE_NEWLINE, Token.TYPE_TEXT))
+                if plain_text:
+                    plain_text._depth = start_elem._depth + 1
+                    plain_text.parents.append(start_elem)
+                    start_elem.children.append(plain_text)
+
+                elif info.is_v:
+                    v_milestone = self.milestone_c_v(depth + 1)
+                    v_milestone._depth = start_elem._depth + 1
+                    v_milestone.parents.append(start_elem)
+                    start_elem.children.append(v_milestone)
+                elif info.no_end:
+                    # Handle this here because a) doesn't nest b) simpler to keep parents
+                    self.advance_token()
+                    text = self.collapse_text((Token.TYPE_SPACE, Token.TYPE_NEWLINE, Token.TYPE_TEXT))
+                    if not text:
+                        e = USFMSyntaxError("[{} ~line {}] {} requires following text".format(
+                            getattr(self, '_file', ''), self.get_location(token.start).line, marker
+                        ))
+                        self._add_failed(token.start, e)
+                        raise e
+                    text._depth = start_elem._depth + 2
+                    marker_class = info.cls or self.get_marker_class(marker)
+                    elem = marker_class(token.start, text.end, marker, token.value + text.text, (start_elem), (text,))
+                    text.parents.append(elem)
+                    elem._depth = start_elem._depth + 1
+                    start_elem.children.append(elem)
+                elif info.paired and token.type == Token.TYPE_MARKER_START:
+                    # Parse the nested span, then carry on with this one
+                    stack.append((start_elem, start_info, start_token, depth))
+                    depth += 1
+                    start_elem, start_info, start_token = self._start_span(depth, max_depth)
+                    token = self.next_token()
+                    info = self.marker_info(token)
+                    marker = info.marker
+                    continue
+                elif token.type == Token.TYPE_ATTRIBUTE:
+                    # Attributes belong to this Character / Note marker
+                    if start_elem.attributes:
+                        e = InvalidMarkerError("Marker {} contains more than 1 set of attributes".format(
+                            start_info.marker
+                        ))
+                        self._add_failed(token.start, e)
+                        raise e
+                    start_elem.attributes = start_elem.parse_attributes(token.value)
+                    start_elem.attributes_raw = token.value
+                elif token.type == Token.TYPE_MARKER_END:
+                    if token.value.endswith('\\*'):
+                        start_elem.children.append(self.milestone(depth + 1))
+                    else:
+                        # Close - verify
+                        if token.value != start_info.close_value:
+                            e = ParserError("[~ {}] Close token {} doesn't match opening token {}".format(
+                                self.line_num, token, start_token
+                            ))
+                            self._add_failed(token.start, e)
+                            raise e
+                        start_elem.end = token.end
+                        # Include end marker raw in start elem
+                        start_elem.end_marker_raw = token.value
+
+                        # If we have a matching close marker, we've completed span parse.
+                        # Don't advance token - the containing span or paragraph does that.
+                        break
+                else:
+                    raise ParserError("[~ {}] Should not occur, token = {}, marker = {}".format(
+                        self.line_num, token, marker
+                    ))
 
-        if hasattr(self, 'max_depth'):
-            max_depth = int(self.max_depth)
-        else:
-            max_depth = int(self.DEFAULT_MAX_DEPTH)
+                self.advance_token()
+                token = self.current_token()
+                info = self.marker_info(token)
+                marker = info.marker
+
+            else:
+                # Not closed - by the end of the text, or before the paragraph ended
+                if not token:
+                    last_token = self.last_token()
+                    start_elem.end = last_token.end
+
+            start_elem._root = self.results
+            if self.trace:
+                self.trace(self.TRACE_SPAN_END, start_elem, depth)
+            if not stack:
+                return start_elem
+
+            # Back to the containing span
+            span_marker = start_elem
+            start_elem, start_info, start_token, depth = stack.pop()
+            span_marker.parents.append(start_elem)
+            start_elem.children.append(span_marker)
 
-        if depth > max_depth:
+            self.advance_token()
+            token = self.current_token()
+            info = self.marker_info(token)
+            marker = info.marker
+
+    def _start_span(self, depth, max_depth):
+        """Start a span at the current token, returning (element, MarkerInfo, start token)"""
+        if max_depth != None and depth > max_depth:
             e = ParserError("Maximum depth ({}) reached in parse_span_marker(), parsing failed. You might need to provide max_depth=N to the Parser constructor.".format(max_depth))
-            self.results.append(ParsingFailedElement(self.current_token().start, e))
+            self._add_failed(self.current_token().start, e)
             raise e
 
         start_token = self.current_token()
-        if self.DEBUG:
-            print('SPAN, start token = {}'.format(start_token))
-
-        self.line_num += start_token.value.count('\n')  # TODO
 
         # Sometimes, but not always, we ensure the span marker has
         # the appropriate closing marker (e.g. \add ... \add*, but not \v or \fr)
-        start_ctm = self.marker_from_token(start_token);
-        start_ctm_matching = self.marker_from_token(start_token, matching=True)
-        if self.DEBUG:
-            print('\tstart ctm = {}, start_ctm_matching = {}'.format(start_ctm, start_ctm_matching))
+        start_info = self.marker_info(start_token)
+        start_ctm = start_info.marker
 
-        start_marker_class = self.get_marker_class(start_ctm)
+        start_marker_class = start_info.cls or self.get_marker_class(start_ctm)
 
         # start_marker_class cannot be a milestone.
         assert(not issubclass(start_marker_class, MilestoneMarkerElement))
 
         start_elem = start_marker_class(start_token.start, 0, start_ctm, start_token.value, (), ())
         start_elem._depth = depth + 2
+        if self.trace:
+            self.trace(self.TRACE_SPAN_START, start_elem, depth)
+        return start_elem, start_info, start_token
 
-        # Handle all elements & attributes, recursively.
-        token = self.next_token()        
-        marker = self.marker_from_token(token)
-        self.line_num += token.value.count('\n')    # TODO
-
-        if self.DEBUG:
-            print('SPAN LOOP starting, token = {}, marker = {}'.format(token, marker))
-
-        while token and marker not in PARAGRAPH_MARKER_ELEMENTS and marker != 'c':
-
-            # Collapse the longest run of text (without marker) we can
-            plain_text = self.collapse_text((Token.TYPE_SPACE, Token.TYPE_NEWLINE, Token.TYPE_TEXT))
-            if plain_text:
-                self.line_num += plain_text.text.count('\n')    # TODO
-                if self.DEBUG:
-                    print('\t(span) collapsed [{}]'.format(plain_text.get_text()))
-                plain_text._depth = start_elem._depth + 1
-                plain_text.parents.append(start_elem)
-                start_elem.children.append(plain_text)
-                if self.DEBUG:
-                    print('\t after collapse token = {}'.format(self.current_token()))
-                
-            elif marker == 'v':
-                v_milestone = self.milestone_c_v()
-                v_milestone._depth = start_elem._depth + 1
-                v_milestone.parents.append(start_elem)
-                start_elem.children.append(v_milestone)
-            elif marker in CHARACTER_NOTE_MARKERS_NO_END:
-                # Handle this here because a) doesn't recurse b) simpler to keep parents
-                self.advance_token()
-                text = self.collapse_text((Token.TYPE_SPACE, Token.TYPE_NEWLINE, Token.TYPE_TEXT))
-                if not text:
-                    e = USFMSyntaxError("[{} ~line {}] {} requires following text".format(
-                        getattr(self, '_file', ''), self.line_num, marker
-                    ))
-                    self.results.append(ParsingFailedElement(token.start, e))
-                    raise e
-                self.line_num += text.text.count('\n')  # TODO
-                text._depth = start_elem._depth + 2
-                marker_class = self.get_marker_class(marker)
-                elem = marker_class(token.start, text.end, marker, token.value + text.text, (start_elem), (text,))
-                text.parents.append(elem)
-                elem._depth = start_elem._depth + 1
-                if self.DEBUG:
-                    print('\t(converted no end) {}'.format(elem))
-                start_elem.children.append(elem)
-            elif marker in SPAN_MARKERS_PAIR and token.type == Token.TYPE_MARKER_START:
-                if self.DEBUG:
-                    print('\t recursion, token = {}'.format(self.current_token()))
-                span_marker = self.parse_span_marker(depth+1)
-                span_marker.parents.append(start_elem)
-                start_elem.children.append(span_marker)
-            elif token.type == Token.TYPE_ATTRIBUTE:
-                # Attributes belong to this Character / Note marker
-                if start_elem.attributes:
-                    e = InvalidMarkerError("Marker {} contains more than 1 set of attributes".format(ctm))
-                    self.results.append(ParsingFailedElement(token.start, e))
-                    raise e
-                start_elem.attributes = start_elem.parse_attributes(token.value)
-                start_elem.attributes_raw = token.value
-                if self.DEBUG:
-                    print('\tgot attributes = {}'.format(start_elem.attributes))
-            elif token.type == Token.TYPE_MARKER_END:
-                if token.value.endswith('\\*'):
-                    start_elem.children.append(self.milestone())
-                else:
-                    # Close - verify
-                    if token.value != '\\' + start_ctm_matching + '*':
-                        e = ParserError("[~ {}] Close token {} doesn't match opening token {}".format(
-                            self.line_num, token, start_token
-                        ))
-                        self.results.append(ParsingFailedElement(token.start, e))
-                        raise e
-                    if self.DEBUG:
-                        print('\tverified marker end ctm = {}, token = {}'.format(
-                            start_ctm, token
-                        ))
-                    start_elem.end = token.end
-                    # Include end marker raw in start elem
-                    start_elem.end_marker_raw = token.value
-                    # no span loop, drop back to para loop
-                    if self.DEBUG:
-                        print('SPAN LOOP finishing, found matching \\{}'.format(start_ctm))
-                    
-                    # If we have a matching close marker, we've completed span parse
-                    # don't advance token - we return to parse_paragraph and that does it
-                    start_elem._root = self.results
-                    return start_elem
-            else:
-                raise ParserError("[~ {}] Should not occur, token = {}, marker = {}".format(
-                    self.line_num, token, marker
-                ))
-
-            self.advance_token()
-            token = self.current_token()
-            marker = self.marker_from_token(token)
-
-        # Determine exit cond
-        if not token:
-            last_token = self.last_token()
-            start_elem.end = last_token.end
-            if self.DEBUG:
-                print('SPAN LOOP finishing, no more tokens')
-        elif marker in PARAGRAPH_MARKER_ELEMENTS or marker == 'c':
-            if self.DEBUG:
-                print('SPAN LOOP finishing, got paragraph marker or c, token = {}'.format(token))
-            
-        start_elem._root = self.results
-        return start_elem
-    
 
 
 # TODO self-closing and non c/v milestone API doesn't exist
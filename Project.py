@@ -0,0 +1,226 @@
+# -*- coding: UTF-8 -*-
+# The books of a Bible project, by \id code, and references across them.
+#
+#   project = Project('/path/to/usfm/')         # reads each book's \id, parses none
+#   project['JHN 3:16'].get_text()              # parses JHN when first used
+#   project.get_usfm('PSA 119:1-8')
+#   project.get_book('GEN').get_chapter(1)
+#
+# Books are parsed when first used, and the most recently used max_books are kept. The
+# offsets of every verse of each book parsed are kept in one index for the project, so
+# the USFM of a reference (get_range(), get_usfm()) doesn't need its book parsed again
+# once it has been evicted.
+
+import re
+import collections
+
+from .Corpus import find_usfm_files, parse_file
+from .References import parse_reference
+from .Attributes import AttributeIndex
+from .Search import TextIndex
+from .Exceptions import InvalidReferenceError
+
+
+# \id must be the first marker in a book, so the start of a file is enough to find it
+_ID_REGEX = re.compile(r'^\s*\\id\s+(\S+)')
+_ID_READ_SIZE = 4096
+
+_BOOK_REFERENCE_REGEX = re.compile(r'^\s*(\w+)(?:\s+(\S.*?))?\s*$')
+
+
+def read_book_code(path):
+    """\\id code of a USFM file (e.g. 'GEN'), upper case, or None if it has no \\id"""
+    with open(path, encoding='utf-8-sig') as f:
+        m = _ID_REGEX.match(f.read(_ID_READ_SIZE))
+    return m.group(1).upper() if m else None
+
+
+def parse_book_reference(reference):
+    """(book code, chapter and verse reference) for a reference such as 'GEN 1:1-3',
+       or (book code, None) for a book ('GEN'). The chapter and verse reference is
+       checked by References.parse_reference()."""
+    m = _BOOK_REFERENCE_REGEX.match(reference)
+    if not m:
+        raise InvalidReferenceError("Not a book reference: '{}'".format(reference))
+    code, chapter_verse = m.groups()
+    if chapter_verse != None:
+        parse_reference(chapter_verse)
+    return code.upper(), chapter_verse
+
+
+class Project:
+    """USFM books in paths (files and/or directories, see Corpus.find_usfm_files()),
+       by \\id code. Where two files have the same code, the first is used.
+
+       cache=ParseCache(...) loads books through a Cache. Other keyword arguments are
+       passed to the Parser."""
+
+    DEFAULT_MAX_BOOKS = 8
+
+    def __init__(self, paths, max_books=DEFAULT_MAX_BOOKS, cache=None, **parser_kwargs):
+        self.max_books = max_books
+        self.cache = cache
+        self.parser_kwargs = parser_kwargs
+        self.paths = collections.OrderedDict()  # code => path, in order
+        for path in find_usfm_files(paths):
+            code = read_book_code(path)
+            if code != None and code not in self.paths:
+                self.paths[code] = path
+        # code => ParserResults, least recently used first
+        self._books = collections.OrderedDict()
+
+        # The index of verses in the project, added to as books are parsed:
+        # (code, chapter, verse number) => (start, end) offsets of the verse in its book,
+        # for each number a verse covers, and (code, chapter) => (start, end) of a chapter
+        self.verses = {}
+        self.chapters = {}
+        self._ends = {}         # code => end of the book, for each book in verses
+        # code => text of the book's file, read for get_usfm(), least recently used first
+        self._sources = collections.OrderedDict()
+
+    # Books
+
+    def get_codes(self):
+        return list(self.paths.keys())
+
+    def __contains__(self, code):
+        return code in self.paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def get_book(self, code):
+        """ParserResults of a book, parsing it if it isn't loaded, or None if there
+           isn't one with that code"""
+        code = code.upper()
+        if code in self._books:
+            self._books.move_to_end(code)
+            return self._books[code]
+        path = self.paths.get(code)
+        if path == None:
+            return None
+        if self.cache != None:
+            results = self.cache.parse_file(path, **self.parser_kwargs)
+        else:
+            results = parse_file(path, **self.parser_kwargs)
+        self._index_book(code, results)
+        self._books[code] = results
+        while self.max_books != None and len(self._books) > self.max_books:
+            self._books.popitem(last=False)
+        return results
+
+    def get_loaded_codes(self):
+        """Codes of the books loaded, least recently used first"""
+        return list(self._books.keys())
+
+    def _index_book(self, code, results):
+        if code in self._ends:
+            return
+        references = results.get_references()
+        for (chapter, number), verse in references.verses.items():
+            self.verses[(code, chapter, number)] = (verse.start, references.get_verse_end(verse))
+        for chapter in results.get_chapters():
+            self.chapters[(code, chapter.value)] = (chapter.start, references.get_chapter_end(chapter))
+        self._ends[code] = references.end
+
+    def build_attribute_index(self, codes=None):
+        """AttributeIndex (see Attributes) of the \\w in books codes (default: every
+           book), in order. Books are loaded one at a time."""
+        index = AttributeIndex()
+        for code in (codes if codes != None else self.get_codes()):
+            results = self.get_book(code)
+            if results != None:
+                index.add_results(results, code.upper())
+        return index
+
+    def build_text_index(self, codes=None):
+        """TextIndex (see Search) of the verse text of books codes (default: every
+           book), in order. Books are loaded one at a time."""
+        index = TextIndex()
+        for code in (codes if codes != None else self.get_codes()):
+            results = self.get_book(code)
+            if results != None:
+                index.add_results(results, code.upper())
+        return index
+
+    # References
+
+    def get_passage(self, reference):
+        """Passage (see References) for a reference such as 'GEN 1:1-3' or 'PSA 119', or
+           None if the book or its first verse isn't found"""
+        code, chapter_verse = parse_book_reference(reference)
+        if chapter_verse == None:
+            raise InvalidReferenceError("No chapter in reference: '{}'".format(reference))
+        results = self.get_book(code)
+        if results == None:
+            return None
+        return results.get_passage(chapter_verse)
+
+    def get_text(self, reference):
+        """Text of the verses of a reference (see Passage.get_text()), or None"""
+        passage = self.get_passage(reference)
+        return passage.get_text() if passage != None else None
+
+    def get_range(self, reference):
+        """(code, start, end) - offsets of a reference in its book's file - or None. From
+           the index of the project, once the book has been parsed."""
+        code, chapter_verse = parse_book_reference(reference)
+        if chapter_verse == None:
+            raise InvalidReferenceError("No chapter in reference: '{}'".format(reference))
+        if code not in self._ends and self.get_book(code) == None:
+            return None
+        first_chapter, first_verse, last_chapter, last_verse = parse_reference(chapter_verse)
+
+        if first_verse == None:
+            first = self.chapters.get((code, first_chapter))
+        else:
+            first = self.verses.get((code, first_chapter, first_verse))
+        if first == None:
+            return None
+        start = first[0]
+
+        # As ParserResults.get_passage()
+        last = self.verses.get((code, last_chapter, last_verse)) if last_verse != None else None
+        if last == None or last[0] < start:
+            last = self.chapters.get((code, last_chapter))
+        end = last[1] if last != None else self._ends[code]
+        return code, start, end
+
+    def get_usfm(self, reference):
+        """USFM source of a reference (e.g. 'JHN 3:16'), read from its book's file, or None"""
+        found = self.get_range(reference)
+        if found == None:
+            return None
+        code, start, end = found
+        return self._get_source(code)[start:end]
+
+    def _get_source(self, code):
+        # Offsets are in the text as parsed - the loaded book's source if it's kept, or
+        # else the file's text, read once and kept for as many books as are loaded
+        results = self._books.get(code)
+        source = results.source if results != None else None
+        if source != None:
+            return source
+        if code in self._sources:
+            self._sources.move_to_end(code)
+            return self._sources[code]
+        with open(self.paths[code], encoding='utf-8-sig') as f:
+            source = f.read()
+        self._sources[code] = source
+        while self.max_books != None and len(self._sources) > self.max_books:
+            self._sources.popitem(last=False)
+        return source
+
+    def __getitem__(self, reference):
+        # project['GEN'] is a book, project['GEN 1:1-3'] a Passage - KeyError if not found
+        code, chapter_verse = parse_book_reference(reference)
+        if chapter_verse == None:
+            found = self.get_book(code)
+        else:
+            found = self.get_passage(reference)
+        if found == None:
+            raise KeyError(reference)
+        return found
+
+    def __repr__(self):
+        return 'Project({} books, {} loaded)'.format(len(self.paths), len(self._books))
@@ -0,0 +1,203 @@
+# -*- coding: UTF-8 -*-
+# Chapter and verse references, and an index of where each verse is.
+#
+#   results.get_references().get_verse(3, 16)      # V, without scanning \c 3's children
+#   passage = results['3:16-4:2']
+#   passage.verses                                  # V milestones, in order
+#   passage.get_usfm()                              # the source, from \v 16 to after 4:2
+#
+# The parser builds a ReferenceIndex as it parses (see ParserResults.get_references()).
+# A verse runs from its \v to the next \c, \v or \d, as in the verse table of
+# Serialization, so the USFM of a passage is one slice of the source.
+
+import re
+import bisect
+from array import array
+
+from .Exceptions import InvalidReferenceError
+
+from .Elements.ParagraphMarkerElements import D
+from .Elements.MilestoneMarkerElements import C, V
+
+
+_REFERENCE_REGEX = re.compile(r'^\s*(\d+)(?:\s*:\s*(\d+))?(?:\s*-\s*(\d+)(?:\s*:\s*(\d+))?)?\s*$')
+
+
+def parse_reference(reference):
+    """(first chapter, first verse, last chapter, last verse) for a reference such as
+       '3', '3:16', '3:16-18', '3:16-4:2' or '3-4'. Verses are None for whole chapters."""
+    m = _REFERENCE_REGEX.match(reference)
+    if not m:
+        raise InvalidReferenceError("Not a chapter and verse reference: '{}'".format(reference))
+    first_chapter, first_verse, end, last_verse = [
+        int(x) if x != None else None for x in m.groups()
+    ]
+    if end == None:
+        last_chapter, last_verse = first_chapter, first_verse
+    elif last_verse == None and first_verse != None:
+        last_chapter, last_verse = first_chapter, end      # 3:16-18
+    else:
+        last_chapter = end                                  # 3-4, 3:16-4:2, 3-4:2
+    if (last_chapter, last_verse or 0) < (first_chapter, first_verse or 0):
+        raise InvalidReferenceError("Reference ends before it starts: '{}'".format(reference))
+    return first_chapter, first_verse, last_chapter, last_verse
+
+
+class ReferenceIndex:
+    """Each verse of a book by (chapter, verse number), and the offsets of the \\c, \\v
+       and \\d markers, which end verses. A bridged verse (\\v 3-4) is found by each
+       number it covers. Verses before the first \\c have chapter None.
+
+       Elements are added in the order they occur in the source."""
+
+    def __init__(self):
+        self.verses = {}            # (chapter, verse number) => V, for each number a V covers
+        self.single_verses = {}     # (chapter, verse number) => V, for V with that value
+        self.verse_list = []        # every V, in order
+        self.verse_starts = array('q')  # start of each of verse_list
+        self.chapter_starts = array('q')    # start of each \c, in order
+        self.boundaries = array('q')    # start of each \c, \v and \d, in order
+        self.end = 0                # end of the indexed source
+
+    @classmethod
+    def from_results(cls, results):
+        """Index ParserResults (e.g. read by Serialization), walking their elements once"""
+        index = cls()
+        for elem in results.get_flattened_forward():
+            if isinstance(elem, C):
+                index.add_chapter(elem)
+            elif isinstance(elem, V):
+                parents = elem.parents
+                chapter = parents[0] if parents and isinstance(parents[0], C) else None
+                index.add_verse(chapter.value if chapter != None else None, elem)
+            elif isinstance(elem, D):
+                index.add_boundary(elem.start)
+        # The last element with an end - a ParsingFailedElement (see Parser, recover) has none
+        for elem in reversed(results):
+            end = getattr(elem, 'end', None)
+            if end != None:
+                index.end = max(index.end, end)
+                break
+        return index
+
+    def add_chapter(self, chapter):
+        self.chapter_starts.append(chapter.start)
+        self.add_boundary(chapter.start)
+
+    def add_verse(self, chapter, verse):
+        """Add V verse, in chapter (a number, or None)"""
+        value = verse.value
+        if value.last_verse == None:
+            self.single_verses.setdefault((chapter, value.first_verse), verse)
+            self.verses.setdefault((chapter, value.first_verse), verse)
+        else:
+            for number in range(value.first_verse, value.last_verse + 1):
+                self.verses.setdefault((chapter, number), verse)
+        self.verse_list.append(verse)
+        self.verse_starts.append(verse.start)
+        self.add_boundary(verse.start)
+
+    def add_boundary(self, offset):
+        self.boundaries.append(offset)
+        if offset > self.end:
+            self.end = offset
+
+    def update(self, other):
+        """Add the entries of other, an index of the source after this one's"""
+        for key, verse in other.verses.items():
+            self.verses.setdefault(key, verse)
+        for key, verse in other.single_verses.items():
+            self.single_verses.setdefault(key, verse)
+        self.verse_list.extend(other.verse_list)
+        self.verse_starts.extend(other.verse_starts)
+        self.chapter_starts.extend(other.chapter_starts)
+        self.boundaries.extend(other.boundaries)
+        self.end = max(self.end, other.end)
+
+    def get_verse(self, chapter, verse):
+        """V of \\v verse in chapter - as C.get_verse(), not a range that includes it - or None"""
+        return self.single_verses.get((chapter, verse))
+
+    def find_verse(self, chapter, verse):
+        """V of the verse in chapter with number verse, including a range (\\v 3-4) that
+           covers it, or None"""
+        return self.verses.get((chapter, verse))
+
+    def get_verse_end(self, verse):
+        """Offset of the next \\c, \\v or \\d after V verse (or the end of the source)"""
+        idx = bisect.bisect_right(self.boundaries, verse.start)
+        return self.boundaries[idx] if idx < len(self.boundaries) else self.end
+
+    def get_chapter_end(self, chapter):
+        """Offset of the next \\c after C chapter (or the end of the source)"""
+        idx = bisect.bisect_right(self.chapter_starts, chapter.start)
+        return self.chapter_starts[idx] if idx < len(self.chapter_starts) else self.end
+
+    def get_range(self, chapter, verse):
+        """(start, end) offsets of a verse in the source, or None"""
+        elem = self.find_verse(chapter, verse)
+        if elem == None:
+            return None
+        return (elem.start, self.get_verse_end(elem))
+
+    def get_verses_between(self, start, end):
+        """V of each verse starting at or after start and before end"""
+        return self.verse_list[
+            bisect.bisect_left(self.verse_starts, start):bisect.bisect_left(self.verse_starts, end)
+        ]
+
+
+class Passage:
+    """The verses of a reference (see ParserResults.get_passage()), from start to end in
+       the source"""
+
+    __slots__ = ('results', 'reference', 'start', 'end', 'verses')
+
+    def __init__(self, results, reference, start, end, verses):
+        self.results = results
+        self.reference = reference
+        self.start = start
+        self.end = end
+        self.verses = verses
+
+    def get_usfm(self):
+        """The USFM source of the passage, or None if the source wasn't kept (see
+           ParserResults.source)"""
+        source = self.results.source
+        if source == None:
+            return None
+        return source[self.start:self.end]
+
+    def get_elements(self):
+        """Flattened elements (see ParserResults.get_flattened_forward()) from the
+           passage's first \\c or \\v to its end"""
+        results = self.results
+        flattened = results.get_flattened_forward()
+        first_chapter, first_verse = parse_reference(self.reference)[:2]
+        if first_verse == None:
+            # A whole chapter, with its headings before the first verse
+            first = results.get_chapter(first_chapter)
+        else:
+            first = self.verses[0] if self.verses else None
+        if first == None:
+            return []
+        elements = []
+        for idx in range(results.get_flattened_index(first), len(flattened)):
+            elem = flattened[idx]
+            start = getattr(elem, 'start', None)
+            if start == None:
+                # A ParsingFailedElement (see Parser, recover) has no offsets
+                continue
+            if start >= self.end:
+                break
+            elements.append(elem)
+        return elements
+
+    def get_text(self):
+        """Text of the verses, as V.get_text() gives, joined by spaces"""
+        return ' '.join(x.get_text() for x in self.verses)
+
+    def __repr__(self):
+        return "Passage('{}', start={}, end={}, verses={})".format(
+            self.reference, self.start, self.end, len(self.verses)
+        )
@@ -0,0 +1,416 @@
+# -*- coding: UTF-8 -*-
+# A full-text index of verse text, with word, phrase and proximity queries.
+#
+#   index = TextIndex()
+#   index.add_results(results)                  # book code from \id
+#   index.find('light')                         # [Hit(verse=VerseRef('GEN', 1, 3, None), positions=(3,)), ...]
+#   index.find_phrase('let there be light')
+#   index.find_near(['God', 'light'], distance=5)
+#
+#   index.dump(open('bible.usft', 'wb'))
+#   with TextIndex.open('bible.usft') as index:  # postings are read when a word is used
+#       index.find_phrase('in the beginning')
+#
+# Verse text is what V.get_text() gives (from ParserResults.iter_verses()), split into words
+# by PlainText.Tokenizer. Words are normalized (see normalize_word()), and a word's
+# position is its number in the verse, from 0.
+#
+# Postings of a word are varints (see Serialization): for each verse it occurs in, the
+# verse id (less the previous one), the number of positions, then the positions (each
+# less the previous one). The index keeps them encoded, as they're stored on disk, and
+# decodes a word's postings when it is queried.
+#
+# File format. A header and a directory of sections, as in Serialization (magic 'USFT'):
+#
+#   BOOKS       varint count, then each book code (varint length, UTF-8)
+#   VERSES      varint count, then for each verse: book, chapter + 1 (0 if none), verse,
+#               last verse + 1 (0 if not a range) (varints)
+#   WORDS       varint count, then for each word, sorted: the word, offset in POSTINGS
+#               (less the previous word's), length and last verse id (varints)
+#   POSTINGS    the postings of each word
+#
+# Opening a file reads BOOKS, VERSES and WORDS. POSTINGS is read a word at a time,
+# through a memory map.
+
+import mmap
+import collections
+import unicodedata
+from array import array
+
+from .Serialization import (
+    HEADER, SECTION, SerializationError, write_varint, read_varint, _write_string, _read_string
+)
+from .PlainText.Tokenizer import Tokenizer
+from .PlainText.Token import Token
+
+
+MAGIC = b'USFT'
+FORMAT_VERSION = 1
+
+SECTION_BOOKS = 1
+SECTION_VERSES = 2
+SECTION_WORDS = 3
+SECTION_POSTINGS = 4
+
+# A verse of the index. verse is the first verse number of a range (\v 3-4), and
+# last_verse the last (or None).
+VerseRef = collections.namedtuple('VerseRef', ['book', 'chapter', 'verse', 'last_verse'])
+
+# A verse found, with the positions (word numbers) of the matches in it
+Hit = collections.namedtuple('Hit', ['verse', 'positions'])
+
+# Characters that may start or end a word token, but aren't part of the word
+_WORD_EDGES = "-’'"
+
+
+def normalize_word(word):
+    """Form of word that is indexed and searched for: NFC, case folded, without leading
+       or trailing hyphens and apostrophes. May be ''."""
+    return unicodedata.normalize('NFC', word).casefold().strip(_WORD_EDGES)
+
+
+def iter_words(text):
+    """Yield each word of text (see normalize_word()), as PlainText.Tokenizer finds them"""
+    tokenizer = Tokenizer(text)
+    while True:
+        tokenizer.tokenize()
+        for token in tokenizer.tokens:
+            if token.type == Token.TYPE_WORD:
+                word = normalize_word(token.value)
+                if word:
+                    yield word
+        tokenizer.tokens.clear()
+        if tokenizer.tokenizing_bound >= len(text):
+            break
+        # The tokenizer stops at characters it doesn't know (e.g. '['). Skip one.
+        tokenizer.tokenizing_bound += 1
+
+
+def decode_postings(data):
+    """[(verse id, positions), ...] from encoded postings"""
+    ret = []
+    pos = 0
+    end = len(data)
+    verse_id = 0
+    while pos < end:
+        delta, pos = read_varint(data, pos)
+        verse_id += delta
+        count, pos = read_varint(data, pos)
+        positions = []
+        position = 0
+        for _ in range(count):
+            delta, pos = read_varint(data, pos)
+            position += delta
+            positions.append(position)
+        ret.append((verse_id, positions))
+    return ret
+
+
+class TextIndex:
+    """An index of the words of each verse of books added with add_results() (or
+       read by open() / loads())"""
+
+    def __init__(self):
+        self.books = []         # book codes, in the order added
+        self.verses = []        # VerseRef of each verse id
+        self._verse_books = array('I')  # book number of each verse id
+        self._postings = {}     # word => encoded postings: bytearray, or a memoryview of data
+        self._last_verse = {}   # word => id of the last verse it's in
+        self._data = None       # data read, or None
+        self._mmap = None
+
+    # Building
+
+    def add_results(self, results, code=None):
+        """Index the verses of ParserResults, as book code (default: the \\id code).
+           Returns the book number."""
+        if code == None:
+            id_elem = results.get_id() if results else None
+            code = id_elem.get_code() if id_elem != None else None
+        book = len(self.books)
+        self.books.append(code)
+        for chapter, verse, text, words in results.iter_verses():
+            self._add_verse(book, VerseRef(code, chapter, verse.first_verse, verse.last_verse), text)
+        return book
+
+    def _add_verse(self, book, ref, text):
+        verse_id = len(self.verses)
+        self.verses.append(ref)
+        self._verse_books.append(book)
+        positions = collections.OrderedDict()
+        for position, word in enumerate(iter_words(text)):
+            if word in positions:
+                positions[word].append(position)
+            else:
+                positions[word] = [position]
+
+        postings = self._postings
+        last_verse = self._last_verse
+        for word, word_positions in positions.items():
+            out = postings.get(word)
+            if out == None:
+                out = postings[word] = bytearray()
+                write_varint(out, verse_id)
+            else:
+                if not isinstance(out, bytearray):
+                    out = postings[word] = bytearray(out)   # read from data - copy to add to it
+                write_varint(out, verse_id - last_verse[word])
+            last_verse[word] = verse_id
+            write_varint(out, len(word_positions))
+            prev = 0
+            for position in word_positions:
+                write_varint(out, position - prev)
+                prev = position
+        return verse_id
+
+    # Queries
+
+    def get_postings(self, word):
+        """[(verse id, positions), ...] of a word (normalized, see normalize_word())"""
+        data = self._postings.get(word)
+        if data == None:
+            return []
+        return decode_postings(data)
+
+    def count(self, word):
+        """Number of verses word is in (see find())"""
+        words = list(iter_words(word))
+        if len(words) != 1:
+            return len(self.find_phrase(word))
+        return len(self.get_postings(words[0]))
+
+    def find(self, word):
+        """Hit for each verse word is in, in order. word is split into words as verse text
+           is (see iter_words()) - if that gives more than one (e.g. "God's"), they're
+           found as a phrase (see find_phrase())."""
+        words = list(iter_words(word))
+        if len(words) != 1:
+            return self.find_phrase(word)
+        verses = self.verses
+        return [Hit(verses[verse_id], tuple(positions))
+                for verse_id, positions in self.get_postings(words[0])]
+
+    def _postings_of(self, words):
+        # [{verse id: positions}, ...] of each word of words, in order, and the indices of
+        # those from the rarest word to the most common
+        words = [x for text in words for x in iter_words(text)]
+        postings = [dict(self.get_postings(x)) for x in words]
+        order = sorted(range(len(words)), key=lambda x: len(postings[x]))
+        return postings, order
+
+    def find_all(self, words):
+        """Hit for each verse all of words are in, with the positions of the first"""
+        postings, order = self._postings_of(words)
+        if not postings:
+            return []
+        ret = []
+        for verse_id in sorted(postings[order[0]]):
+            if all(verse_id in postings[x] for x in order[1:]):
+                ret.append(Hit(self.verses[verse_id], tuple(postings[0][verse_id])))
+        return ret
+
+    def find_any(self, words):
+        """Hit for each verse any of words is in, with the positions of all of them"""
+        postings, order = self._postings_of(words)
+        found = {}
+        for word_postings in postings:
+            for verse_id, positions in word_postings.items():
+                found.setdefault(verse_id, set()).update(positions)
+        return [Hit(self.verses[x], tuple(sorted(found[x]))) for x in sorted(found)]
+
+    def find_phrase(self, phrase):
+        """Hit for each verse with the words of phrase, in order and next to each other,
+           with the position of the first word of each match"""
+        postings, order = self._postings_of([phrase])
+        if not postings:
+            return []
+        ret = []
+        for verse_id in sorted(postings[order[0]]):
+            if not all(verse_id in postings[x] for x in order[1:]):
+                continue
+            others = [set(postings[x][verse_id]) for x in range(1, len(postings))]
+            starts = tuple(
+                start for start in postings[0][verse_id]
+                if all(start + offset + 1 in positions for offset, positions in enumerate(others))
+            )
+            if starts:
+                ret.append(Hit(self.verses[verse_id], starts))
+        return ret
+
+    def find_near(self, words, distance):
+        """Hit for each verse where each of words is within distance words (before or
+           after) of the first of them, with the positions of the first"""
+        postings, order = self._postings_of(words)
+        if not postings:
+            return []
+        ret = []
+        for verse_id in sorted(postings[order[0]]):
+            if not all(verse_id in postings[x] for x in order[1:]):
+                continue
+            others = [postings[x][verse_id] for x in range(1, len(postings))]
+            starts = tuple(
+                start for start in postings[0][verse_id]
+                if all(any(abs(x - start) <= distance for x in positions) for positions in others)
+            )
+            if starts:
+                ret.append(Hit(self.verses[verse_id], starts))
+        return ret
+
+    def get_words(self):
+        """Words indexed, sorted"""
+        return sorted(self._postings)
+
+    def __len__(self):
+        """Number of words"""
+        return len(self._postings)
+
+    # Reading and writing
+
+    def dumps(self):
+        """The index as bytes, in the format at the top of this module"""
+        books = bytearray()
+        write_varint(books, len(self.books))
+        for code in self.books:
+            _write_string(books, code or '')
+
+        verses = bytearray()
+        write_varint(verses, len(self.verses))
+        for book, ref in zip(self._verse_books, self.verses):
+            write_varint(verses, book)
+            write_varint(verses, ref.chapter + 1 if ref.chapter != None else 0)
+            write_varint(verses, ref.verse)
+            write_varint(verses, ref.last_verse + 1 if ref.last_verse != None else 0)
+
+        words = bytearray()
+        postings = bytearray()
+        write_varint(words, len(self._postings))
+        prev = 0
+        for word in sorted(self._postings):
+            data = self._postings[word]
+            _write_string(words, word)
+            write_varint(words, len(postings) - prev)
+            write_varint(words, len(data))
+            write_varint(words, self._last_verse[word])
+            prev = len(postings)
+            postings += data
+
+        sections = [
+            (SECTION_BOOKS, books),
+            (SECTION_VERSES, verses),
+            (SECTION_WORDS, words),
+            (SECTION_POSTINGS, postings),
+        ]
+        out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(sections)))
+        offset = HEADER.size + SECTION.size * len(sections)
+        for section_id, data in sections:
+            out += SECTION.pack(section_id, offset, len(data))
+            offset += len(data)
+        for section_id, data in sections:
+            out += data
+        return bytes(out)
+
+    def dump(self, f):
+        f.write(self.dumps())
+
+    @classmethod
+    def loads(cls, data):
+        """TextIndex from bytes (or a buffer, such as an mmap) written by dumps(). Postings
+           refer to data, and are decoded when used."""
+        index = cls()
+        data = memoryview(data).cast('B')
+        index._data = data
+        try:
+            if len(data) < HEADER.size:
+                raise SerializationError("Too short to be a TextIndex")
+            magic, version, flags, num_sections = HEADER.unpack_from(data, 0)
+            if magic != MAGIC:
+                raise SerializationError("Not a TextIndex (magic {!r})".format(magic))
+            if version != FORMAT_VERSION:
+                raise SerializationError("TextIndex format version {} isn't supported".format(version))
+            sections = {}
+            for idx in range(num_sections):
+                section_id, offset, length = SECTION.unpack_from(data, HEADER.size + idx * SECTION.size)
+                if offset + length > len(data):
+                    raise SerializationError("Section {} is truncated".format(section_id))
+                sections[section_id] = offset
+            for section_id in (SECTION_BOOKS, SECTION_VERSES, SECTION_WORDS, SECTION_POSTINGS):
+                if section_id not in sections:
+                    raise SerializationError("Section {} is missing".format(section_id))
+
+            count, pos = read_varint(data, sections[SECTION_BOOKS])
+            for _ in range(count):
+                code, pos = _read_string(data, pos)
+                index.books.append(code or None)
+
+            count, pos = read_varint(data, sections[SECTION_VERSES])
+            books = index.books
+            for _ in range(count):
+                book, pos = read_varint(data, pos)
+                chapter, pos = read_varint(data, pos)
+                verse, pos = read_varint(data, pos)
+                last_verse, pos = read_varint(data, pos)
+                index.verses.append(VerseRef(
+                    books[book], chapter - 1 if chapter else None,
+                    verse, last_verse - 1 if last_verse else None
+                ))
+                index._verse_books.append(book)
+
+            count, pos = read_varint(data, sections[SECTION_WORDS])
+            postings = sections[SECTION_POSTINGS]
+            offset = 0
+            for _ in range(count):
+                word, pos = _read_string(data, pos)
+                delta, pos = read_varint(data, pos)
+                length, pos = read_varint(data, pos)
+                last_verse, pos = read_varint(data, pos)
+                offset += delta
+                index._postings[word] = data[postings + offset:postings + offset + length]
+                index._last_verse[word] = last_verse
+        except Exception:
+            index.close()     # so an mmap of data can be closed
+            raise
+        return index
+
+    @classmethod
+    def load(cls, f):
+        return cls.loads(f.read())
+
+    @classmethod
+    def open(cls, path):
+        """TextIndex of a file written by dump(), through a memory map. close() it (or
+           use it in a with statement) when done."""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            index = cls.loads(mapped)
+        except Exception:
+            mapped.close()
+            raise
+        index._mmap = mapped
+        return index
+
+    def close(self):
+        """Release data read (see loads()). Postings not added to since are dropped."""
+        if self._data == None:
+            return
+        for word, data in list(self._postings.items()):
+            if isinstance(data, memoryview):
+                data.release()
+                del self._postings[word]
+                del self._last_verse[word]
+        self._data.release()
+        self._data = None
+        if self._mmap != None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return 'TextIndex({} books, {} verses, {} words)'.format(
+            len(self.books), len(self.verses), len(self._postings)
+        )
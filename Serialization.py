@@ -0,0 +1,774 @@
+# -*- coding: UTF-8 -*-
+# A compact binary format for ParserResults, with a writer and a reader.
+#
+#   data = dumps(results)
+#   results = loads(data)
+#   results = Reader(data).read_chapter(3)      # only the elements of \c 3
+#
+# Format (little-endian). A header, a directory of sections, then the sections:
+#
+#   header      magic 'USFB', format version (uint16), flags (uint16, 0),
+#               number of sections (uint32)
+#   directory   for each section: section id, offset in the data, length (uint32 each)
+#
+#   CLASSES     varint count, then each element class name (see STRING below)
+#   MARKERS     varint count, then each marker ('p', 'w', ...)
+#   STRINGS     uint32 count, uint32 offsets of count + 1 strings into the UTF-8 bytes
+#               that follow (string i is bytes[offsets[i]:offsets[i + 1]]). Each
+#               distinct text, raw marker, attribute name and value is stored once.
+#   SEGMENTS    uint32 count, then for each segment: chapter (int32, -1 for elements
+#               before the first \c), offset and length in NODES (uint32 each)
+#   NODES       for each segment, varint number of top-level elements, then the elements
+#               in document order (each followed by its children, recursively)
+#   VERSES      uint32 count, then for each verse in order: chapter (-1 if none), first
+#               verse, last verse (-1 if not a range) (int32 each), then segment, start
+#               (of the \v), end (start of the next \c, \v or \d) and text string id
+#               (uint32 each). The text is what ParserResults.iter_verses() gives, so it
+#               can be looked up without reading the segment.
+#   DIAGNOSTICS varint count, then for each of results.diagnostics (see Parser, recover):
+#               offset, line and column (varints), and exception class name and message
+#               string ids. Only written if there are any.
+#
+# A segment is a \c and the top-level elements after it, up to the next \c, so chapters
+# can be read on their own. Unknown sections are skipped by the reader, so sections
+# can be added without changing FORMAT_VERSION.
+#
+# Integers in nodes are varints (7 bits per byte, low bits first, high bit set on all
+# but the last byte). STRING is a varint length and UTF-8 bytes. Each element is:
+#
+#   kind        0 (REF), or class id + 1. REF is followed by the index, in the segment,
+#               of an element that is at more than one place in the tree (e.g. the text
+#               of a \d, which the parser adds after the next \v too)
+#   flags       varint of NODE_* bits
+#   start       zigzag varint, difference from the previous element's start
+#   length      end - start
+#   then        depth                   if NODE_DEPTH
+#               marker id               for marker elements
+#               marker_raw string id    if NODE_MARKER_RAW
+#               text string id          for Text and Whitespace
+#               number + 1 (0 if None)  for numbered elements (\toc1, \q2, ...)
+#               value + 1               for \c
+#               first verse + 1, last verse + 1 (0 if not a range)   for \v
+#               milestone type          for paired milestones (\qt-s, \qt-e, ...)
+#               value string id         if NODE_VALUE_STRING
+#               attributes_raw string id + 1 (0 if None), varint count, then
+#                   name and value string ids for each attribute    if NODE_ATTRIBUTES
+#               end_marker_raw string id    if NODE_END_MARKER_RAW
+#               offset, exception class name and message string ids   for ParsingFailedElement
+#               number of children      for parent elements (not \c - its children are
+#                                       its verses, which are found within paragraphs)
+#
+# Parents aren't stored: a child's parent is the element it's within, and a verse's
+# first parent is its chapter, as when parsing (none if NODE_NO_CHAPTER - a verse after
+# a \c that failed to parse, see Parser, recover). results.milestones isn't stored (the
+# parser doesn't fill it in), nor is PairedMilestoneMarkerElement.pair.
+
+import sys
+import struct
+import builtins
+import collections
+from array import array
+
+from . import Exceptions
+from .Exceptions import ParserError
+from .Parser import ParserResults, Diagnostic
+
+from .Elements.Element import Element, ParsingFailedElement
+from .Elements.Text import Text
+from .Elements.Whitespace import Whitespace
+from .Elements.ChildElement import ChildElement
+from .Elements.ParentElement import ParentElement
+from .Elements.MarkerElement import MarkerElement
+from .Elements.NumberedElement import NumberedElement
+from .Elements.SpanMarkerElement import SpanMarkerElement
+from .Elements.ConvertableElements import VerseNumberSequence
+from .Elements.ParagraphMarkerElements import PARAGRAPH_MARKER_ELEMENTS, D, SP
+from .Elements.CharacterMarkerElements import CHARACTER_MARKER_ELEMENTS
+from .Elements.NoteMarkerElements import NOTE_MARKER_ELEMENTS, F, FE, X
+from .Elements.MilestoneMarkerElements import (
+    MILESTONE_MARKER_ELEMENTS, MilestoneMarkerElement, PairedMilestoneMarkerElement, C, V
+)
+
+
+MAGIC = b'USFB'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<4sHHI')
+SECTION = struct.Struct('<III')
+SEGMENT = struct.Struct('<iII')
+VERSE = struct.Struct('<iiiIIII')
+UINT32 = struct.Struct('<I')
+
+SECTION_CLASSES = 1
+SECTION_MARKERS = 2
+SECTION_STRINGS = 3
+SECTION_SEGMENTS = 4
+SECTION_NODES = 5
+SECTION_VERSES = 6
+SECTION_DIAGNOSTICS = 7
+
+NO_CHAPTER = -1
+NO_VERSE = -1
+
+REF = 0
+
+# Text within these isn't part of verse text (as in ParserResults.iter_verses())
+VERSE_EXCLUDED_CLASSES = (F, FE, X, SP)
+
+# Bits in node flags
+NODE_DEPTH = 1
+NODE_ROOT = 2
+NODE_MARKER_RAW = 4
+NODE_ATTRIBUTES = 8
+NODE_END_MARKER_RAW = 16
+NODE_PSALM_119_SKIP = 32
+NODE_VALUE_STRING = 64
+NODE_NO_CHAPTER = 128
+
+
+def _element_classes():
+    classes = {}
+    for cls in (Text, Whitespace, ParsingFailedElement, PairedMilestoneMarkerElement):
+        classes[cls.__name__] = cls
+    for elements in (PARAGRAPH_MARKER_ELEMENTS, CHARACTER_MARKER_ELEMENTS,
+                     NOTE_MARKER_ELEMENTS, MILESTONE_MARKER_ELEMENTS):
+        for cls in elements.values():
+            classes[cls.__name__] = cls
+    return classes
+
+# Class name => class, for reading
+ELEMENT_CLASSES = _element_classes()
+
+
+class SerializationError(ParserError):
+    """Data isn't in the serialization format, or can't be read"""
+
+
+# What to read for an element of a class (see _plan())
+PLAN_MARKER = 1
+PLAN_PARENTS = 2
+PLAN_CHILDREN = 4
+PLAN_REPR_CHILDREN = 8
+PLAN_TEXT = 16
+PLAN_NUMBER = 32
+PLAN_C = 64
+PLAN_V = 128
+PLAN_PAIRED = 256
+PLAN_ATTRIBUTES = 512
+PLAN_FAILED = 1024
+
+
+def _plan(cls):
+    """PLAN_* bits for cls, so reading an element doesn't check its class each time"""
+    plan = 0
+    if issubclass(cls, MarkerElement):
+        plan |= PLAN_MARKER
+    if issubclass(cls, ChildElement):
+        plan |= PLAN_PARENTS
+    if issubclass(cls, ParentElement) and not issubclass(cls, C):
+        plan |= PLAN_CHILDREN
+    if issubclass(cls, (ParentElement, MilestoneMarkerElement)):
+        plan |= PLAN_REPR_CHILDREN
+    if issubclass(cls, (Text, Whitespace)):
+        plan |= PLAN_TEXT
+    if issubclass(cls, NumberedElement):
+        plan |= PLAN_NUMBER
+    if issubclass(cls, C):
+        plan |= PLAN_C
+    if issubclass(cls, V):
+        plan |= PLAN_V
+    if issubclass(cls, PairedMilestoneMarkerElement):
+        plan |= PLAN_PAIRED
+    if issubclass(cls, SpanMarkerElement):
+        plan |= PLAN_ATTRIBUTES
+    if issubclass(cls, ParsingFailedElement):
+        plan |= PLAN_FAILED
+    return plan
+
+
+def _get_chapter(verse):
+    """The C a verse is in (its first parent, see Parser.milestone_c_v()), or None"""
+    parents = verse.parents
+    return parents[0] if parents and isinstance(parents[0], C) else None
+
+
+def _exception_class(name):
+    """Exception class called name (from Exceptions, or built in), or ParserError"""
+    cls = getattr(Exceptions, name, None) or getattr(builtins, name, None)
+    if isinstance(cls, type) and issubclass(cls, Exception):
+        return cls
+    return ParserError
+
+
+def write_varint(out, value):
+    """Append value (an int >= 0) to out (a bytearray) as a varint"""
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    """Read a varint from data at pos, returning (value, position after it)"""
+    byte = data[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+    value = byte & 0x7f
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _write_string(out, s):
+    b = s.encode('utf-8', 'surrogatepass')
+    write_varint(out, len(b))
+    out += b
+
+
+def _read_string(data, pos):
+    length, pos = read_varint(data, pos)
+    return bytes(data[pos:pos + length]).decode('utf-8', 'surrogatepass'), pos + length
+
+
+class Writer:
+    """Serializes ParserResults (see the format at the top of this module)"""
+
+    def __init__(self):
+        self.classes = []
+        self._class_ids = {}
+        self.markers = []
+        self._marker_ids = {}
+        self.strings = []
+        self._string_ids = {}
+        self.segments = []          # (chapter, nodes offset, length)
+        self.nodes = bytearray()
+        self.verses = []            # VERSE fields of each verse
+        # The verse being written - [chapter, first verse, last verse, segment, start, texts]
+        self._verse = None
+        self._end = 0               # end of the last element written
+        self.diagnostics = bytearray()
+        self._num_diagnostics = 0
+
+    def _id(self, table, ids, key):
+        if key not in ids:
+            ids[key] = len(table)
+            table.append(key)
+        return ids[key]
+
+    def string_id(self, s):
+        return self._id(self.strings, self._string_ids, s)
+
+    def write(self, results):
+        """Serialize results, returning bytes"""
+        segment = []
+        chapter = NO_CHAPTER
+        for elem in results:
+            if isinstance(elem, C):
+                if segment or chapter != NO_CHAPTER:
+                    self.write_segment(chapter, segment)
+                segment = []
+                chapter = elem.value
+            segment.append(elem)
+        if segment or chapter != NO_CHAPTER:
+            self.write_segment(chapter, segment)
+        self._end_verse(self._end)
+        for diagnostic in results.__dict__.get('diagnostics') or ():
+            self.write_diagnostic(diagnostic)
+        return self.getvalue()
+
+    def write_diagnostic(self, diagnostic):
+        out = self.diagnostics
+        write_varint(out, diagnostic.offset)
+        write_varint(out, diagnostic.line)
+        write_varint(out, diagnostic.column)
+        write_varint(out, self.string_id(diagnostic.exception.__class__.__name__))
+        write_varint(out, self.string_id(str(diagnostic.exception)))
+        self._num_diagnostics += 1
+
+    def write_segment(self, chapter, elements):
+        start = len(self.nodes)
+        out = self.nodes
+        write_varint(out, len(elements))
+        # Elements already written in this segment => index
+        written = {}
+        prev_start = 0
+        # (element, whether it's within an element excluded from verse text)
+        stack = [(x, False) for x in reversed(elements)]
+        while stack:
+            elem, excluded = stack.pop()
+            self._add_to_verse(chapter, elem, excluded)
+            key = id(elem)
+            if key in written:
+                write_varint(out, REF)
+                write_varint(out, written[key])
+                continue
+            written[key] = len(written)
+            prev_start = self.write_node(out, elem, prev_start)
+            self._end = max(self._end, getattr(elem, 'end', 0))
+            if isinstance(elem, ParentElement) and not isinstance(elem, C):
+                excluded = excluded or isinstance(elem, VERSE_EXCLUDED_CLASSES)
+                stack.extend((x, excluded) for x in reversed(elem.children))
+        self.segments.append((chapter, start, len(out) - start))
+
+    def _add_to_verse(self, chapter, elem, excluded):
+        """Keep the text of each verse as ParserResults.iter_verses() gives it, for the
+           VERSES section"""
+        if isinstance(elem, (C, V, D)):
+            self._end_verse(elem.start)
+            if isinstance(elem, V):
+                if _get_chapter(elem) == None:
+                    chapter = NO_CHAPTER
+                self._verse = [chapter, elem.value.first_verse, elem.value.last_verse,
+                               len(self.segments), elem.start, []]
+        elif self._verse != None and not excluded and isinstance(elem, (Text, Whitespace)):
+            self._verse[-1].append(elem.text)
+
+    def _end_verse(self, end):
+        if self._verse == None:
+            return
+        chapter, first_verse, last_verse, segment, start, texts = self._verse
+        text = Element.normalize_whitespace(None, ''.join(texts))
+        self.verses.append((
+            chapter, first_verse, NO_VERSE if last_verse == None else last_verse,
+            segment, start, end, self.string_id(text)
+        ))
+        self._verse = None
+
+    def write_node(self, out, elem, prev_start):
+        """Write elem (not its children), returning its start"""
+        cls = elem.__class__
+        write_varint(out, self._id(self.classes, self._class_ids, cls.__name__) + 1)
+
+        flags = 0
+        if hasattr(elem, '_depth'):
+            flags |= NODE_DEPTH
+        if hasattr(elem, '_root'):
+            flags |= NODE_ROOT
+        if getattr(elem, 'marker_raw', None) != None:
+            flags |= NODE_MARKER_RAW
+        attributes = getattr(elem, 'attributes', None)
+        if attributes or getattr(elem, 'attributes_raw', None) != None:
+            flags |= NODE_ATTRIBUTES
+        if getattr(elem, 'end_marker_raw', None) != None:
+            flags |= NODE_END_MARKER_RAW
+        if getattr(elem, '_psalm_119_skip', False):
+            flags |= NODE_PSALM_119_SKIP
+        value = getattr(elem, 'value', None)
+        if isinstance(value, str):
+            flags |= NODE_VALUE_STRING
+        if isinstance(elem, V) and _get_chapter(elem) == None:
+            flags |= NODE_NO_CHAPTER
+        write_varint(out, flags)
+
+        start = getattr(elem, 'start', prev_start)
+        write_varint(out, zigzag(start - prev_start))
+        write_varint(out, getattr(elem, 'end', start) - start)
+
+        if flags & NODE_DEPTH:
+            write_varint(out, elem._depth)
+        if isinstance(elem, MarkerElement):
+            write_varint(out, self._id(self.markers, self._marker_ids, elem.marker))
+        if flags & NODE_MARKER_RAW:
+            write_varint(out, self.string_id(elem.marker_raw))
+        if isinstance(elem, (Text, Whitespace)):
+            write_varint(out, self.string_id(elem.text))
+        if isinstance(elem, NumberedElement):
+            number = getattr(elem, 'number', None)
+            write_varint(out, 0 if number == None else number + 1)
+        if isinstance(elem, C):
+            write_varint(out, elem.value + 1)
+        elif isinstance(elem, V):
+            write_varint(out, elem.value.first_verse + 1)
+            last_verse = elem.value.last_verse
+            write_varint(out, 0 if last_verse == None else last_verse + 1)
+        if isinstance(elem, PairedMilestoneMarkerElement):
+            write_varint(out, getattr(elem, 'milestone_type', 0) or 0)
+        if flags & NODE_VALUE_STRING:
+            write_varint(out, self.string_id(value))
+        if flags & NODE_ATTRIBUTES:
+            attributes_raw = getattr(elem, 'attributes_raw', None)
+            write_varint(out, 0 if attributes_raw == None else self.string_id(attributes_raw) + 1)
+            attributes = attributes or {}
+            write_varint(out, len(attributes))
+            for name in attributes:
+                write_varint(out, self.string_id(name))
+                write_varint(out, self.string_id(attributes[name]))
+        if flags & NODE_END_MARKER_RAW:
+            write_varint(out, self.string_id(elem.end_marker_raw))
+        if isinstance(elem, ParsingFailedElement):
+            write_varint(out, elem.offset)
+            write_varint(out, self.string_id(elem.e.__class__.__name__))
+            write_varint(out, self.string_id(str(elem.e)))
+        if isinstance(elem, ParentElement) and not isinstance(elem, C):
+            write_varint(out, len(elem.children))
+        return start
+
+    def sections(self):
+        """(section id, bytes) of each section"""
+        classes = bytearray()
+        write_varint(classes, len(self.classes))
+        for name in self.classes:
+            _write_string(classes, name)
+
+        markers = bytearray()
+        write_varint(markers, len(self.markers))
+        for marker in self.markers:
+            _write_string(markers, marker)
+
+        encoded = [s.encode('utf-8', 'surrogatepass') for s in self.strings]
+        offsets = array('I', [0])
+        for b in encoded:
+            offsets.append(offsets[-1] + len(b))
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        strings = bytearray(UINT32.pack(len(encoded)))
+        strings += offsets.tobytes()
+        strings += b''.join(encoded)
+
+        segments = bytearray(UINT32.pack(len(self.segments)))
+        for segment in self.segments:
+            segments += SEGMENT.pack(*segment)
+
+        verses = bytearray(UINT32.pack(len(self.verses)))
+        for verse in self.verses:
+            verses += VERSE.pack(*verse)
+
+        sections = [
+            (SECTION_CLASSES, classes),
+            (SECTION_MARKERS, markers),
+            (SECTION_STRINGS, strings),
+            (SECTION_SEGMENTS, segments),
+            (SECTION_NODES, self.nodes),
+            (SECTION_VERSES, verses),
+        ]
+        if self._num_diagnostics:
+            diagnostics = bytearray()
+            write_varint(diagnostics, self._num_diagnostics)
+            sections.append((SECTION_DIAGNOSTICS, diagnostics + self.diagnostics))
+        return sections
+
+    def getvalue(self):
+        sections = self.sections()
+        out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(sections)))
+        offset = HEADER.size + SECTION.size * len(sections)
+        for section_id, data in sections:
+            out += SECTION.pack(section_id, offset, len(data))
+            offset += len(data)
+        for section_id, data in sections:
+            out += data
+        return bytes(out)
+
+
+class Reader:
+    """Reads ParserResults from data in the serialization format (bytes, or anything
+       supporting the buffer protocol, such as an mmap). Chapters can be read on their
+       own (see read_chapter()), and nothing is read until asked for."""
+
+    def __init__(self, data):
+        self.data = memoryview(data).cast('B')
+        if len(self.data) < HEADER.size:
+            raise SerializationError("Too short to be serialized ParserResults")
+        magic, version, flags, num_sections = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise SerializationError("Not serialized ParserResults (magic {!r})".format(magic))
+        if version != FORMAT_VERSION:
+            raise SerializationError("Serialization format version {} isn't supported".format(version))
+
+        # section id => (offset, length)
+        self.sections = {}
+        for idx in range(num_sections):
+            section_id, offset, length = SECTION.unpack_from(self.data, HEADER.size + idx * SECTION.size)
+            if offset + length > len(self.data):
+                raise SerializationError("Section {} is truncated".format(section_id))
+            self.sections[section_id] = (offset, length)
+        for section_id in (SECTION_CLASSES, SECTION_MARKERS, SECTION_STRINGS,
+                           SECTION_SEGMENTS, SECTION_NODES):
+            if section_id not in self.sections:
+                raise SerializationError("Section {} is missing".format(section_id))
+
+        self.classes = []
+        for name in self._read_table(SECTION_CLASSES):
+            if name not in ELEMENT_CLASSES:
+                raise SerializationError("Unknown element class {}".format(name))
+            self.classes.append(ELEMENT_CLASSES[name])
+        self.markers = self._read_table(SECTION_MARKERS)
+        self._plans = [_plan(cls) for cls in self.classes]
+
+        offset, length = self.sections[SECTION_STRINGS]
+        self._num_strings = UINT32.unpack_from(self.data, offset)[0]
+        self._string_offsets = self.data[offset + 4:offset + 8 + self._num_strings * 4].cast('I')
+        if sys.byteorder != 'little':
+            self._string_offsets = array('I', self._string_offsets)
+            self._string_offsets.byteswap()
+        self._string_data = offset + 8 + self._num_strings * 4
+        self._strings = [None] * self._num_strings
+
+        offset, length = self.sections[SECTION_SEGMENTS]
+        num_segments = UINT32.unpack_from(self.data, offset)[0]
+        # (chapter, nodes offset, length)
+        self.segments = [SEGMENT.unpack_from(self.data, offset + 4 + idx * SEGMENT.size)
+                         for idx in range(num_segments)]
+        self._nodes_offset = self.sections[SECTION_NODES][0]
+
+        self.num_verses = 0
+        if SECTION_VERSES in self.sections:
+            offset, length = self.sections[SECTION_VERSES]
+            self.num_verses = UINT32.unpack_from(self.data, offset)[0]
+            self._verses_offset = offset + 4
+        self._verse_index = None
+
+    def _read_table(self, section_id):
+        offset, length = self.sections[section_id]
+        count, pos = read_varint(self.data, offset)
+        table = []
+        for _ in range(count):
+            s, pos = _read_string(self.data, pos)
+            table.append(s)
+        return table
+
+    def string(self, idx):
+        """String idx of the string table"""
+        s = self._strings[idx]
+        if s == None:
+            start = self._string_data + self._string_offsets[idx]
+            end = self._string_data + self._string_offsets[idx + 1]
+            s = bytes(self.data[start:end]).decode('utf-8', 'surrogatepass')
+            self._strings[idx] = s
+        return s
+
+    def verse(self, idx):
+        """Verse idx of the VERSES section, as (chapter, VerseNumberSequence, segment,
+           start, end, text)"""
+        chapter, first_verse, last_verse, segment, start, end, text = VERSE.unpack_from(
+            self.data, self._verses_offset + idx * VERSE.size
+        )
+        return (
+            None if chapter == NO_CHAPTER else chapter,
+            VerseNumberSequence(first_verse, None if last_verse == NO_VERSE else last_verse),
+            self.segments[segment], start, end, self.string(text)
+        )
+
+    def find_verse(self, chapter, verse):
+        """Index in the VERSES section of \\v verse (an int, or a VerseNumberSequence
+           for a range) in \\c chapter, or None"""
+        if self._verse_index == None:
+            self._verse_index = {}
+            for idx in range(self.num_verses - 1, -1, -1):     # first of duplicates wins
+                key = VERSE.unpack_from(self.data, self._verses_offset + idx * VERSE.size)[:3]
+                self._verse_index[key] = idx
+        if chapter == None:
+            chapter = NO_CHAPTER
+        if isinstance(verse, VerseNumberSequence):
+            last_verse = NO_VERSE if verse.last_verse == None else verse.last_verse
+            key = (chapter, verse.first_verse, last_verse)
+        else:
+            key = (chapter, verse, NO_VERSE)
+        return self._verse_index.get(key)
+
+    def release(self):
+        """Release the data (e.g. so an mmap can be closed). The Reader can't be used after."""
+        if isinstance(self._string_offsets, memoryview):
+            self._string_offsets.release()
+        self.data.release()
+
+    def get_chapters(self):
+        """Numbers of the chapters, in order"""
+        return [x[0] for x in self.segments if x[0] != NO_CHAPTER]
+
+    def read(self):
+        """All the ParserResults"""
+        results = ParserResults()
+        for segment in self.segments:
+            self.read_segment(segment, results)
+        # As when parsing, a diagnostic and its ParsingFailedElement share the exception
+        failed = dict((x.offset, x.e) for x in results if isinstance(x, ParsingFailedElement))
+        results.diagnostics = [
+            x._replace(exception=failed[x.offset]) if x.offset in failed else x
+            for x in self.read_diagnostics()
+        ]
+        return results
+
+    def read_diagnostics(self):
+        """Diagnostic (see Parser) for each of results.diagnostics"""
+        if SECTION_DIAGNOSTICS not in self.sections:
+            return []
+        data = self.data
+        string = self.string
+        pos = self.sections[SECTION_DIAGNOSTICS][0]
+        count, pos = read_varint(data, pos)
+        diagnostics = []
+        for _ in range(count):
+            offset, pos = read_varint(data, pos)
+            line, pos = read_varint(data, pos)
+            column, pos = read_varint(data, pos)
+            name, pos = read_varint(data, pos)
+            message, pos = read_varint(data, pos)
+            exception = _exception_class(string(name))(string(message))
+            diagnostics.append(Diagnostic(offset, line, column, exception))
+        return diagnostics
+
+    def read_chapter(self, chapter):
+        """ParserResults with the elements of \\c chapter (up to the next \\c)"""
+        results = ParserResults()
+        for segment in self.segments:
+            if segment[0] == chapter:
+                self.read_segment(segment, results)
+                return results
+        raise KeyError(chapter)
+
+    def read_segment(self, segment, results):
+        """Read segment's elements, appending them to results"""
+        chapter, offset, length = segment
+        data = self.data
+        pos = self._nodes_offset + offset
+        end_pos = pos + length
+        classes = self.classes
+        plans = self._plans
+        markers = self.markers
+        string = self.string
+
+        num_top_level, pos = read_varint(data, pos)
+        elements = []           # in order, for REF
+        stack = []              # [parent, children still to read]
+        chapter_element = None
+        prev_start = 0
+        while num_top_level or stack:
+            if pos >= end_pos:
+                raise SerializationError("Segment for chapter {} is truncated".format(chapter))
+            kind, pos = read_varint(data, pos)
+            if kind == REF:
+                idx, pos = read_varint(data, pos)
+                elem = elements[idx]
+                plan = 0
+            else:
+                cls = classes[kind - 1]
+                plan = plans[kind - 1]
+                elem = cls.__new__(cls)
+                elements.append(elem)
+
+                flags, pos = read_varint(data, pos)
+                delta, pos = read_varint(data, pos)
+                length, pos = read_varint(data, pos)
+                prev_start += unzigzag(delta)
+                if not plan & PLAN_FAILED:
+                    elem.start = prev_start
+                    elem.end = prev_start + length
+                if flags & NODE_DEPTH:
+                    elem._depth, pos = read_varint(data, pos)
+                if flags & NODE_ROOT:
+                    elem._root = results
+                if plan & PLAN_MARKER:
+                    idx, pos = read_varint(data, pos)
+                    elem.marker = markers[idx]
+                if flags & NODE_MARKER_RAW:
+                    idx, pos = read_varint(data, pos)
+                    elem.marker_raw = string(idx)
+                if plan & PLAN_CHILDREN:
+                    elem.children = []
+                if plan & PLAN_REPR_CHILDREN:
+                    elem._repr_children = True
+                if plan & PLAN_TEXT:
+                    idx, pos = read_varint(data, pos)
+                    elem.text = string(idx)
+                if plan & PLAN_NUMBER:
+                    number, pos = read_varint(data, pos)
+                    elem.number = None if number == 0 else number - 1
+                if plan & PLAN_C:
+                    value, pos = read_varint(data, pos)
+                    elem.value = value - 1
+                    elem.children = []
+                    chapter_element = elem
+                    results.chapters[elem.value] = elem
+                elif plan & PLAN_V:
+                    first_verse, pos = read_varint(data, pos)
+                    last_verse, pos = read_varint(data, pos)
+                    elem.value = VerseNumberSequence(
+                        first_verse - 1, None if last_verse == 0 else last_verse - 1
+                    )
+                if plan & PLAN_PAIRED:
+                    milestone_type, pos = read_varint(data, pos)
+                    if milestone_type:
+                        elem.milestone_type = milestone_type
+                if flags & NODE_VALUE_STRING:
+                    idx, pos = read_varint(data, pos)
+                    elem.value = string(idx)
+                if flags & NODE_ATTRIBUTES:
+                    idx, pos = read_varint(data, pos)
+                    if idx:
+                        elem.attributes_raw = string(idx - 1)
+                    count, pos = read_varint(data, pos)
+                    attributes = collections.OrderedDict()
+                    for _ in range(count):
+                        name, pos = read_varint(data, pos)
+                        value, pos = read_varint(data, pos)
+                        attributes[string(name)] = string(value)
+                    elem.attributes = attributes
+                elif plan & PLAN_ATTRIBUTES:
+                    elem.attributes = collections.OrderedDict()
+                if flags & NODE_END_MARKER_RAW:
+                    idx, pos = read_varint(data, pos)
+                    elem.end_marker_raw = string(idx)
+                if flags & NODE_PSALM_119_SKIP:
+                    elem._psalm_119_skip = True
+                if plan & PLAN_FAILED:
+                    elem.offset, pos = read_varint(data, pos)
+                    name, pos = read_varint(data, pos)
+                    message, pos = read_varint(data, pos)
+                    elem.e = _exception_class(string(name))(string(message))
+
+                if plan & PLAN_PARENTS:
+                    parents = []
+                    if plan & PLAN_V and chapter_element != None and not flags & NODE_NO_CHAPTER:
+                        parents.append(chapter_element)
+                        chapter_element.children.append(elem)
+                    if stack:
+                        parents.append(stack[-1][0])
+                    elem.parents = parents
+
+            if stack:
+                parent = stack[-1]
+                parent[0].children.append(elem)
+                parent[1] -= 1
+                if not parent[1]:
+                    stack.pop()
+            else:
+                results.append(elem)
+                num_top_level -= 1
+
+            if plan & PLAN_CHILDREN:
+                num_children, pos = read_varint(data, pos)
+                if num_children:
+                    stack.append([elem, num_children])
+        return results
+
+
+def dumps(results):
+    """ParserResults as bytes"""
+    return Writer().write(results)
+
+
+def dump(results, f):
+    f.write(dumps(results))
+
+
+def loads(data):
+    """ParserResults from bytes (or a buffer) written by dumps()"""
+    return Reader(data).read()
+
+
+def load(f):
+    return loads(f.read())
@@ -2,15 +2,31 @@
 
 import re
 import collections
+from array import array
 
 import pprint
 
 from .Token import Token
+from .Locations import LineIndex
 from .Constants import SPACES, NEWLINES
 
 
 class TokensDeque(collections.deque):
 
+    def extend_columns(self, text, offset, types, starts, ends):
+        """Append tokens given as columns of types, starts and ends (offsets in text, which
+           begins at offset in the source)."""
+        new_token = tuple.__new__
+        self.extend([
+            new_token(Token, (token_type, text[start:end], offset + start, offset + end))
+            for token_type, start, end in zip(types, starts, ends)
+        ])
+
+    def discard(self, num_tokens):
+        """Discard the first num_tokens tokens"""
+        for _ in range(num_tokens):
+            self.popleft()
+
     def __repr__(self):
         out = 'TokensDeque([\n'
         for elem in self:
@@ -18,95 +34,270 @@ class TokensDeque(collections.deque):
         out += '])\n'
         return out
 
+
+class TokenStore:
+    """A columnar alternative to TokensDeque. Token types and start/end offsets are kept in
+       array('i') columns, and values are slices of the source text the tokens cover, rather
+       than a Token per token. Indexing is O(1) and returns an equivalent Token.
+
+       Tokens must be contiguous in the source (as the Tokenizer produces them)."""
+
+    # Compact the columns once this many discarded tokens are at the front
+    COMPACT_MIN = 4096
+
+    def __init__(self, tokens=()):
+        self.types = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.source = ''            # source text covered by tokens in the columns
+        self.source_offset = 0      # offset in source of self.source[0]
+        self.head = 0               # index in the columns of the first token
+
+        self.extend(tokens)
+
+    def extend_columns(self, text, offset, types, starts, ends):
+        """Append tokens given as columns of types, starts and ends (offsets in text, which
+           begins at offset in the source)."""
+        if not types:
+            return
+        if self.head == len(self.types):
+            # Nothing kept - restart the source at these tokens
+            self._compact()
+            self.source = ''
+            self.source_offset = offset + starts[0]
+        elif offset + starts[0] != self.source_offset + len(self.source):
+            raise ValueError("TokenStore tokens must be contiguous in the source")
+        self.source += text[starts[0]:ends[-1]]
+        if offset:
+            starts = array('i', [x + offset for x in starts])
+            ends = array('i', [x + offset for x in ends])
+        self.types.extend(types)
+        self.starts.extend(starts)
+        self.ends.extend(ends)
+
+    def append(self, token):
+        self.extend_columns(token.value, token.start, (token.type,), (0,), (len(token.value),))
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+
+    def discard(self, num_tokens):
+        """Discard the first num_tokens tokens"""
+        if num_tokens > len(self):
+            raise IndexError("discard from TokenStore with fewer tokens")
+        self.head += num_tokens
+        if self.head >= self.COMPACT_MIN and self.head * 2 >= len(self.types):
+            self._compact()
+
+    def popleft(self):
+        token = self[0]
+        self.discard(1)
+        return token
+
+    def clear(self):
+        self.discard(len(self))
+
+    def _compact(self):
+        """Drop discarded tokens from the columns, and source text only they covered."""
+        head = self.head
+        if head < len(self.types):
+            new_offset = self.starts[head]
+        else:
+            new_offset = self.source_offset + len(self.source)
+        self.source = self.source[new_offset - self.source_offset:]
+        self.source_offset = new_offset
+        del self.types[:head]
+        del self.starts[:head]
+        del self.ends[:head]
+        self.head = 0
+
+    def __len__(self):
+        return len(self.types) - self.head
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError("TokenStore index out of range")
+        idx += self.head
+        start = self.starts[idx]
+        end = self.ends[idx]
+        source_offset = self.source_offset
+        return tuple.__new__(Token, (
+            self.types[idx], self.source[start - source_offset:end - source_offset], start, end
+        ))
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(x == y for x, y in zip(self, other))
+        except TypeError:
+            return False
+
+    def __repr__(self):
+        out = 'TokenStore([\n'
+        for elem in self:
+            out += '\t{}\n'.format(elem)
+        out += '])\n'
+        return out
+
 class Tokenizer:
     """A USFM tokenizer designed to handle partial data (not requiring whole USFM file)"""
 
-    def __init__(self, text='', strict=False, discard_after_tokenizing=True):
+    # Compiled once. Each alternative is a numbered group, so match.lastindex gives the
+    # token type without inspecting the matched text.
+    tokenizing_regex = re.compile(r'''
+        # Paragraph marker, or Begin Character or Note marker
+        ( \\[+\w]+[\n\r \t] )
+        |
+        # End - Character or Note marker or Milestone
+        ( \\[-+\w]+(?:\\)?\* )
+        |
+        # Attributes
+        ( \| (?: \w+ (?:=)? (?: (?:"[^"]+?") | (?:\w+) )? \s* )+ )
+        |
+        # Text
+        ( (?!<\\)[^|\\ \t\r\n]+ )         # Negative lookbehind required if tokenizing gradually
+        |
+        # Newlines
+        ( [\n\r]+ )
+        |
+        # Space
+        ( [ \t] )
+    ''', re.X)
+
+    # Token type for each group in tokenizing_regex, indexed by match.lastindex
+    group_token_types = (
+        None,
+        Token.TYPE_MARKER_START,
+        Token.TYPE_MARKER_END,
+        Token.TYPE_ATTRIBUTE,
+        Token.TYPE_TEXT,
+        Token.TYPE_NEWLINE,
+        Token.TYPE_SPACE,
+    )
+
+    # Token types that more text could continue (see tokenize()). A marker ends with a
+    # space or '*', and a space token is one character.
+    open_token_types = (Token.TYPE_TEXT, Token.TYPE_ATTRIBUTE, Token.TYPE_NEWLINE)
+    marker_token_types = (Token.TYPE_MARKER_START, Token.TYPE_MARKER_END)
+
+    def __init__(self, text='', strict=False, discard_after_tokenizing=True, columnar=False,
+                 offset=0, line=1):
         self.text = text            # text to be tokenized
-        self.tokens = TokensDeque()
-        self.tokenizing_bound = 0   # offset in 'text' up to which tokenizing is complete. 
+        self.columnar = columnar    # keep tokens in a TokenStore rather than a TokensDeque
+        self.tokens = self._new_tokens()
+        self.tokenizing_bound = offset  # offset in source up to which tokenizing is complete. 
+        self.text_offset = offset   # offset in source of text[0] - non-zero once text is discarded,
+                                    # or if text is part of a larger source
         self.discard_after_tokenizing = discard_after_tokenizing
+        self.lines = LineIndex(offset, line)    # line and column of offsets, kept when text is discarded
+        self.lines.add(text)
 
         self.DEBUG = 0
 
-        self.tokenizing_regex = '''
-            # Paragraph marker, or Begin Character or Note marker
-            \\\\[+\w]+[\n\r \t]
-            |
-            # End - Character or Note marker or Milestone
-            \\\\[-+\w]+(?:\\\\)?\*
-            |
-            # Attributes
-            (?: \| (?: \w+ (?:=)? ( (?:"[^"]+?") | (?:\w+) )? \s* )+ )
-            |
-            # Text
-            (?!<\\\\)[^|\\\\ \t\r\n]+         # Negative lookbehind required if tokenizing gradually
-            |
-            # Newlines
-            [\n\r]+
-            |
-            # Space
-            [ \t]
-        '''     
-    
     # TODO whitespace - preservation and chunking with +
 
     def add(self, text):
         self.text += text
+        self.lines.add(text)
 
     def reset(self):
-        """Reset entire state of tokenizer"""
+        """Reset entire state of tokenizer. Text added after is still at the offset and line
+           it was created with."""
+        lines = self.lines
         self.text = ''
-        self.tokens = TokensDeque()
-        self.tokenizing_bound = 0
-
-    def _create_token_from_match(self, token_type, match):
-        return Token(
-            token_type,
-            match.group(0),
-            self.tokenizing_bound + match.start(),
-            self.tokenizing_bound + match.end()
-        )
-
-    def tokenize(self):
+        self.tokens = self._new_tokens()
+        self.tokenizing_bound = lines.offset
+        self.text_offset = lines.offset
+        self.lines = LineIndex(lines.offset, lines.first_line)
+
+    def _new_tokens(self):
+        if self.columnar:
+            return TokenStore()
+        return TokensDeque()
+
+    def discard_tokens(self, num_tokens):
+        """Discard the first num_tokens tokens (e.g. once they've been parsed). Offsets in
+           remaining tokens are unchanged."""
+        self.tokens.discard(num_tokens)
+
+    def tokenize(self, final=True):
         """Tokenize as far as possible in 'text'.
-            If discard_after_tokenizing is set, discard the tokenized text."""
-        try_bound = 0
+            If discard_after_tokenizing is set, discard the tokenized text.
+            final=False if more text may be added: the last token, if that could continue
+            it (e.g. text, or attributes '|s' of '|strong="H1"'), is left until then, so a
+            token isn't split where the text was."""
+        text = self.text
+        offset = self.text_offset
+        # Position in 'text' (not the source) where tokenizing starts. Match from there
+        # rather than slicing, so tokenizing gradually doesn't copy text each time.
+        start_bound = self.tokenizing_bound - offset
+        try_bound = start_bound
 
-        for match in re.finditer(self.tokenizing_regex, self.text[self.tokenizing_bound:], re.X):
-            if self.DEBUG:
-                print("TOKENIZER match = {}".format(match))
+        group_token_types = self.group_token_types
+        # Collect tokens as columns, then add them to self.tokens together
+        types = array('i')
+        starts = array('i')
+        ends = array('i')
+        types_append = types.append
+        starts_append = starts.append
+        ends_append = ends.append
+
+        for match in self.tokenizing_regex.finditer(text, start_bound):
+            start, end = match.span()
             # Ensure all text > self.tokenizing_bound tokenized.
-            # Matches in subsequent tokenize() calls have match.start() == 0, 
-            if match.start() != try_bound:
+            if start != try_bound:
                 break
+            try_bound = end
+
+            token_type = group_token_types[match.lastindex]
+            # Runs of several newlines have always been tokenized as text
+            if token_type == Token.TYPE_NEWLINE and end - start > 1 \
+            and text[start:end] not in NEWLINES:
+                token_type = Token.TYPE_TEXT
 
-            # When creating tokens, add try_bound to self.tokenizing_bound
-            # to get correct offsets
-
-            if match.group(0)[0] == '\\':
-                if match.group(0)[-1] == '*':
-                    self.tokens.append(
-                        self._create_token_from_match(Token.TYPE_MARKER_END, match)
-                    )
-                else:
-                    self.tokens.append(
-                        self._create_token_from_match(Token.TYPE_MARKER_START, match)
-                    )
-            elif match.group(0)[0] == '|':
-                self.tokens.append(self._create_token_from_match(Token.TYPE_ATTRIBUTE, match))
-            elif match.group(0) in NEWLINES:
-                self.tokens.append(self._create_token_from_match(Token.TYPE_NEWLINE, match))
-            elif match.group(0) in SPACES:
-                self.tokens.append(self._create_token_from_match(Token.TYPE_SPACE, match))
-            else:
-                self.tokens.append(self._create_token_from_match(Token.TYPE_TEXT, match))
-
-            try_bound = match.end()
+            types_append(token_type)
+            starts_append(start)
+            ends_append(end)
 
             # TODO - newline grouping?
 
-        if try_bound != 0:
-            self.tokenizing_bound += try_bound
+        if not final and types:
+            # Leave tokens that text not added yet may continue: the last, and attributes
+            # after the last marker, which may be before the rest of a value (e.g.
+            # '|strong=' and '"H1' of '|strong="H1 H2"')
+            keep = len(types)
+            if types[-1] in self.open_token_types:
+                keep -= 1
+            for idx in range(len(types) - 1, -1, -1):
+                if types[idx] in self.marker_token_types:
+                    break
+                if types[idx] == Token.TYPE_ATTRIBUTE:
+                    keep = idx
+            if keep < len(types):
+                try_bound = starts[keep]
+                del types[keep:]
+                del starts[keep:]
+                del ends[keep:]
+
+        # When creating tokens, add offset to get offsets in the source
+        self.tokens.extend_columns(text, offset, types, starts, ends)
+        if self.DEBUG:
+            new_tokens = TokensDeque()
+            new_tokens.extend_columns(text, offset, types, starts, ends)
+            print("TOKENIZER tokens = {}".format(new_tokens))
+
+        if try_bound != start_bound:
+            self.tokenizing_bound = offset + try_bound
 
+        if self.discard_after_tokenizing and try_bound:
+            self.text = text[try_bound:]
+            self.text_offset += try_bound
 
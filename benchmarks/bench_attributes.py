@@ -0,0 +1,70 @@
+# -*- coding: UTF-8 -*-
+# Lookups/second of \w by strong number, walking the tree with an ElementMatcher compared
+# with the AttributeIndex, and of verses with two strong numbers (intersect()).
+#
+#   python benchmarks/bench_attributes.py [book.usfm]
+
+import sys
+import time
+import random
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Matchers import ElementMatcher
+from usfmparser.Attributes import AttributeIndex, VERSE
+from usfmparser.Elements.CharacterMarkerElements import W
+
+import sample
+
+
+def by_walk(results, strongs):
+    matcher = ElementMatcher(cls=W)
+    ret = []
+    for strong in strongs:
+        ret.append([x.start for x in results.get_flattened_forward()
+                    if matcher.match(x) and x.attributes.get('strong') == strong])
+    return ret
+
+
+def by_index(index, strongs):
+    return [[x & 0xffffffff for x in index.get('strong', strong)] for strong in strongs]
+
+
+def bench(name, func, arg, strongs):
+    start = time.perf_counter()
+    found = func(arg, strongs)
+    elapsed = time.perf_counter() - start
+    print('{:<10} {:>7} lookups  {:8.3f}s  {:>12,.0f} lookups/s'.format(
+        name, len(strongs), elapsed, len(strongs) / elapsed
+    ))
+    return found
+
+
+if __name__ == '__main__':
+    text = sample.load_text(tagged=True)
+    parser = Parser(text)
+    parser.parse()
+    results = parser.results
+    results.get_flattened_forward()
+
+    start = time.perf_counter()
+    index = AttributeIndex()
+    index.add_results(results)
+    print('{} chars, {} keys indexed in {:.3f}s'.format(len(text), len(index), time.perf_counter() - start))
+
+    rand = random.Random(1)
+    strongs = index.get_values('strong')
+    walked = bench('walk', by_walk, results, strongs[:20])
+    lookups = [rand.choice(strongs) for _ in range(50000)]
+    bench('index', by_index, index, lookups)
+    assert(walked == by_index(index, strongs[:20]))
+
+    pairs = [(rand.choice(strongs), rand.choice(strongs)) for _ in range(50000)]
+    start = time.perf_counter()
+    for a, b in pairs:
+        index.find_all([('strong', a), ('strong', b)], level=VERSE)
+    elapsed = time.perf_counter() - start
+    print('{:<10} {:>7} queries  {:8.3f}s  {:>12,.0f} queries/s'.format(
+        'intersect', len(pairs), elapsed, len(pairs) / elapsed
+    ))
@@ -0,0 +1,44 @@
+# -*- coding: UTF-8 -*-
+# Time to get ParserResults for a book from a ParseCache: a miss (parse and store) and a
+# hit (load), compared with parsing.
+#
+#   python benchmarks/bench_cache.py [book.usfm]
+
+import sys
+import time
+import tempfile
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Cache import ParseCache
+
+import sample
+
+
+def parse(text):
+    parser = Parser(text)
+    parser.parse()
+    return parser.results
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    for tagged in (False, True):
+        text = sample.load_text(tagged=tagged)
+        print('{} chars{}'.format(len(text), ', tagged' if tagged else ''))
+        with tempfile.TemporaryDirectory() as d:
+            cache = ParseCache(d)
+            results, parse_time = timed(parse, text)
+            results, miss_time = timed(cache.parse, text)
+            hit_time = min(timed(cache.parse, text)[1] for _ in range(3))
+            print('    parse    {:8.3f}s'.format(parse_time))
+            print('    miss     {:8.3f}s'.format(miss_time))
+            print('    hit      {:8.3f}s  ({:,} bytes cached, {:.1f}x faster than parsing)'.format(
+                hit_time, cache.size(), parse_time / hit_time
+            ))
@@ -0,0 +1,72 @@
+# -*- coding: UTF-8 -*-
+# Looking up verses in a serialized book: through MappedResults (the verse table, or one
+# chapter's elements) compared with reading the whole book first.
+#
+#   python benchmarks/bench_mapped.py [book.usfm]
+
+import os
+import sys
+import time
+import random
+import tempfile
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser import Serialization
+from usfmparser.Mapped import MappedResults
+
+import sample
+
+
+LOOKUPS = 1000
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    for tagged in (False, True):
+        text = sample.load_text(tagged=tagged)
+        parser = Parser(text)
+        parser.parse()
+        refs = [(x.chapter, x.verse.first_verse) for x in parser.results.iter_verses()
+                if x.verse.last_verse == None]
+        refs = random.Random(1).sample(refs, min(LOOKUPS, len(refs)))
+        print('{} chars{}, {} random verses'.format(len(text), ', tagged' if tagged else '', len(refs)))
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'book.usfb')
+            with open(path, 'wb') as f:
+                Serialization.dump(parser.results, f)
+
+            def read_all():
+                with open(path, 'rb') as f:
+                    results = Serialization.load(f)
+                return [results.get_verse(*ref).get_text() for ref in refs]
+
+            def mapped_text():
+                with MappedResults(path) as book:
+                    return [book.get_verse_text(*ref) for ref in refs]
+
+            def mapped_elements():
+                with MappedResults(path) as book:
+                    texts = []
+                    for ref in refs:
+                        chapter_results = book.get_chapter_results(ref[0])
+                        texts.append(chapter_results.get_verse(*ref).get_text())
+                    return texts
+
+            expected, all_time = timed(read_all)
+            texts, text_time = timed(mapped_text)
+            assert(texts == expected)
+            texts, elements_time = timed(mapped_elements)
+            assert(texts == expected)
+            print('    read whole book         {:8.3f}s'.format(all_time))
+            print('    mapped, verse table     {:8.3f}s'.format(text_time))
+            print('    mapped, chapter elements {:7.3f}s  (reading chapters as needed, {} kept)'.format(
+                elements_time, MappedResults.DEFAULT_MAX_CHAPTERS
+            ))
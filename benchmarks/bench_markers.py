@@ -0,0 +1,68 @@
+# -*- coding: UTF-8 -*-
+# Time to classify every marker token of a book with the lookup table (Markers.marker_info())
+# compared with the previous per-call regex work in marker_from_token(), and the time to
+# parse the book.
+#
+#   python benchmarks/bench_markers.py [book.usfm]
+
+import re
+import sys
+import time
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Tokenizer import Tokenizer
+from usfmparser.Token import Token
+from usfmparser.Markers import marker_info
+from usfmparser.Elements.ParagraphMarkerElements import PARAGRAPH_MARKER_ELEMENTS
+
+import sample
+
+
+def legacy_is_boundary(value):
+    # marker_from_token() and the membership tests the parser made with its result
+    tmp = value.replace('\\', '').replace('*', '').replace('+', '')
+    marker = re.sub(r'\s+|\d+', '', tmp).lower()
+    return marker in PARAGRAPH_MARKER_ELEMENTS or marker == 'c'
+
+
+def table_is_boundary(value):
+    return marker_info(value).boundary
+
+
+def best_time(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def classify(is_boundary, values):
+    for value in values:
+        is_boundary(value)
+
+
+def parse(text):
+    parser = Parser(text)
+    parser.parse()
+
+
+if __name__ == '__main__':
+    for tagged in (False, True):
+        text = sample.load_text(tagged=tagged)
+        tokenizer = Tokenizer()
+        tokenizer.add(text)
+        tokenizer.tokenize()
+        values = [x.value for x in tokenizer.tokens
+                  if x.type in (Token.TYPE_MARKER_START, Token.TYPE_MARKER_END)]
+        print('{} chars{}, {} marker tokens'.format(
+            len(text), ', tagged' if tagged else '', len(values)
+        ))
+        print('    regex per token  {:6.3f}s'.format(best_time(classify, legacy_is_boundary, values)))
+        print('    lookup table     {:6.3f}s'.format(best_time(classify, table_is_boundary, values)))
+        print('    parse            {:6.3f}s'.format(best_time(parse, text)))
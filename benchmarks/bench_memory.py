@@ -0,0 +1,81 @@
+# -*- coding: UTF-8 -*-
+# Memory held by a parsed book: bytes per element (allocated while parsing and still held
+# by the results, measured with tracemalloc), and the size of each kind of element.
+# Also the same for an ArenaTree of the book (not counting the source text it refers to).
+#
+#   python benchmarks/bench_memory.py [book.usfm]
+
+import gc
+import sys
+import tracemalloc
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Arena import ArenaTree
+
+import sample
+
+
+def all_elements(results):
+    """Each element in results once (V are children of both C and a paragraph)"""
+    seen = {}
+    stack = list(results)
+    while stack:
+        elem = stack.pop()
+        if id(elem) in seen:
+            continue
+        seen[id(elem)] = elem
+        stack.extend(getattr(elem, 'children', ()))
+    return list(seen.values())
+
+
+def instance_size(elem):
+    """Bytes of the instance itself, including its __dict__ if it has one"""
+    size = sys.getsizeof(elem)
+    if hasattr(elem, '__dict__'):
+        size += sys.getsizeof(elem.__dict__)
+    return size
+
+
+def held_by(func, *args):
+    """Return func(*args), and bytes allocated by it that are still held"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = func(*args)
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, held
+
+
+def parse(text):
+    parser = Parser(text)
+    parser.parse()
+    return parser.results
+
+
+if __name__ == '__main__':
+    for tagged in (False, True):
+        text = sample.load_text(tagged=tagged)
+
+        results, held = held_by(parse, text)
+
+        elements = all_elements(results)
+        print('{} chars{}: {} elements, {:,} bytes held, {:.0f} bytes/element'.format(
+            len(text), ', tagged' if tagged else '', len(elements), held, held / len(elements)
+        ))
+
+        by_class = {}
+        for elem in elements:
+            name = elem.__class__.__name__
+            count, size = by_class.get(name, (0, 0))
+            by_class[name] = (count + 1, size + instance_size(elem))
+        for name, (count, size) in sorted(by_class.items(), key=lambda x: -x[1][0])[:6]:
+            print('    {:<12} {:>8} x {:>4.0f} bytes'.format(name, count, size / count))
+
+        tree, held = held_by(ArenaTree.from_text, text)
+        print('    arena: {} nodes, {:,} bytes held, {:.0f} bytes/node'.format(
+            len(tree), held, held / len(tree)
+        ))
@@ -0,0 +1,160 @@
+# -*- coding: UTF-8 -*-
+# Parse time for texts with many nested character markers, with span parsing on an
+# explicit stack (Parser.parse_span_marker()) compared with the previous recursive
+# implementation: a Strong's-tagged book (a \w per word), and interlinear-style books
+# where every word is nested several spans deep.
+#
+#   python benchmarks/bench_nesting.py [book.usfm]
+
+import sys
+import time
+import random
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Token import Token
+from usfmparser.Exceptions import ParserError, USFMSyntaxError, InvalidMarkerError
+from usfmparser.Elements.MilestoneMarkerElements import MilestoneMarkerElement
+
+import sample
+
+
+# Markers each word is wrapped in, outermost first, in interlinear-style text
+NESTED_MARKERS = ('wj', 'qt', 'add', 'nd', 'pn', 'k', 'bk', 'w')
+
+
+def generate_interlinear(depth, chapters=50, verses=20, seed=1):
+    """A book where every word is nested depth spans deep, innermost a \\w with attributes"""
+    rand = random.Random(seed)
+    markers = NESTED_MARKERS[-depth:]
+    out = ['\\id PSA Generated benchmark text\n', '\\h Generated\n']
+    for chapter in range(1, chapters + 1):
+        out.append('\\c {}\n\\p\n'.format(chapter))
+        for verse in range(1, verses + 1):
+            words = []
+            for _ in range(rand.randint(5, 25)):
+                word = '{}|strong="H{:04d}" x-morph="He,Ncmpa"'.format(
+                    rand.choice(sample.WORDS), rand.randint(1, 8674)
+                )
+                for level, marker in enumerate(reversed(markers)):
+                    plus = '+' if level < len(markers) - 1 else ''
+                    word = '\\{}{} {}\\{}{}*'.format(plus, marker, word, plus, marker)
+                words.append(word)
+            out.append('\\v {} {}\n'.format(verse, ' '.join(words)))
+    return ''.join(out)
+
+
+class RecursiveParser(Parser):
+    """The previous span parser, which recursed for each nested span"""
+
+    def parse_span_marker(self, depth=0):
+        if hasattr(self, 'max_depth') and self.max_depth != None:
+            max_depth = int(self.max_depth)
+        else:
+            max_depth = 100
+
+        if depth > max_depth:
+            e = ParserError("Maximum depth ({}) reached in parse_span_marker()".format(max_depth))
+            self._add_failed(self.current_token().start, e)
+            raise e
+
+        start_token = self.current_token()
+        start_info = self.marker_info(start_token)
+        start_ctm = start_info.marker
+        start_marker_class = start_info.cls or self.get_marker_class(start_ctm)
+        assert(not issubclass(start_marker_class, MilestoneMarkerElement))
+
+        start_elem = start_marker_class(start_token.start, 0, start_ctm, start_token.value, (), ())
+        start_elem._depth = depth + 2
+        if self.trace:
+            self.trace(self.TRACE_SPAN_START, start_elem, depth)
+
+        token = self.next_token()
+        info = self.marker_info(token)
+        marker = info.marker
+
+        while token and not info.boundary:
+            plain_text = self.collapse_text((Token.TYPE_SPACE, Token.TYPE_NEWLINE, Token.TYPE_TEXT))
+            if plain_text:
+                plain_text._depth = start_elem._depth + 1
+                plain_text.parents.append(start_elem)
+                start_elem.children.append(plain_text)
+            elif info.is_v:
+                v_milestone = self.milestone_c_v(depth + 1)
+                v_milestone._depth = start_elem._depth + 1
+                v_milestone.parents.append(start_elem)
+                start_elem.children.append(v_milestone)
+            elif info.no_end:
+                self.advance_token()
+                text = self.collapse_text((Token.TYPE_SPACE, Token.TYPE_NEWLINE, Token.TYPE_TEXT))
+                if not text:
+                    raise USFMSyntaxError("{} requires following text".format(marker))
+                text._depth = start_elem._depth + 2
+                marker_class = info.cls or self.get_marker_class(marker)
+                elem = marker_class(token.start, text.end, marker, token.value + text.text, (start_elem), (text,))
+                text.parents.append(elem)
+                elem._depth = start_elem._depth + 1
+                start_elem.children.append(elem)
+            elif info.paired and token.type == Token.TYPE_MARKER_START:
+                span_marker = self.parse_span_marker(depth+1)
+                span_marker.parents.append(start_elem)
+                start_elem.children.append(span_marker)
+            elif token.type == Token.TYPE_ATTRIBUTE:
+                if start_elem.attributes:
+                    raise InvalidMarkerError("Marker {} contains more than 1 set of attributes".format(start_ctm))
+                start_elem.attributes = start_elem.parse_attributes(token.value)
+                start_elem.attributes_raw = token.value
+            elif token.type == Token.TYPE_MARKER_END:
+                if token.value.endswith('\\*'):
+                    start_elem.children.append(self.milestone(depth + 1))
+                else:
+                    if token.value != start_info.close_value:
+                        raise ParserError("Close token {} doesn't match opening token {}".format(
+                            token, start_token
+                        ))
+                    start_elem.end = token.end
+                    start_elem.end_marker_raw = token.value
+                    start_elem._root = self.results
+                    if self.trace:
+                        self.trace(self.TRACE_SPAN_END, start_elem, depth)
+                    return start_elem
+            else:
+                raise ParserError("Should not occur, token = {}, marker = {}".format(token, marker))
+
+            self.advance_token()
+            token = self.current_token()
+            info = self.marker_info(token)
+            marker = info.marker
+
+        if not token:
+            start_elem.end = self.last_token().end
+        start_elem._root = self.results
+        if self.trace:
+            self.trace(self.TRACE_SPAN_END, start_elem, depth)
+        return start_elem
+
+
+def best_time(parser_class, text, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser = parser_class(text)
+        parser.parse()
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    return parser.results, best
+
+
+if __name__ == '__main__':
+    texts = [('Strong\'s-tagged', sample.load_text(tagged=True))]
+    for depth in (3, 8):
+        texts.append(('interlinear, depth {}'.format(depth), generate_interlinear(depth)))
+    for name, text in texts:
+        before, before_time = best_time(RecursiveParser, text)
+        after, after_time = best_time(Parser, text)
+        assert(repr(before) == repr(after))
+        print('{:<22} {:>9,} chars  recursive {:6.3f}s  stack {:6.3f}s'.format(
+            name, len(text), before_time, after_time
+        ))
@@ -0,0 +1,60 @@
+# -*- coding: UTF-8 -*-
+# Lookups/second of every verse in a book by chapter and verse number, scanning each
+# chapter's verses (as C.get_verse() did) compared with the ReferenceIndex, and of
+# passages by reference.
+#
+#   python benchmarks/bench_references.py [book.usfm]
+
+import sys
+import time
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Elements.MilestoneMarkerElements import V
+
+import sample
+
+
+def scan(chapter, verse):
+    for c in chapter.children:
+        if isinstance(c, V) and c.value == verse:
+            return c
+    return None
+
+
+def by_scan(results, refs):
+    return [scan(results.get_chapter(c), v) for c, v in refs]
+
+
+def by_index(results, refs):
+    return [results.get_chapter(c).get_verse(v) for c, v in refs]
+
+
+def by_passage(results, refs):
+    return [results['{}:{}'.format(c, v)].verses[0] for c, v in refs]
+
+
+def bench(name, func, results, refs):
+    start = time.perf_counter()
+    verses = func(results, refs)
+    elapsed = time.perf_counter() - start
+    print('{:<8} {:>7} lookups  {:8.3f}s  {:>12,.0f} lookups/s'.format(
+        name, len(refs), elapsed, len(refs) / elapsed
+    ))
+    return verses
+
+
+if __name__ == '__main__':
+    # Chapters of 20 verses, and of Psalm 119's 176
+    for verses in (20, 176):
+        text = sample.load_text(chapters=3000 // verses, verses=verses)
+        parser = Parser(text)
+        parser.parse()
+        results = parser.results
+        refs = [(c.value, v.value.first_verse) for c in results.get_chapters() for v in c.get_verses()]
+        print('{} chars, {} verses, {} per chapter'.format(len(text), len(refs), verses))
+        before = bench('scan', by_scan, results, refs)
+        after = bench('index', by_index, results, refs)
+        passages = bench('passage', by_passage, results, refs)
+        assert(before == after == passages)
@@ -0,0 +1,76 @@
+# -*- coding: UTF-8 -*-
+# Verses containing a word: matching every element with ElementMatcher(text_contains=...)
+# compared with the TextIndex (Search), and phrase queries. Also the time to build,
+# write and open the index, and its size.
+#
+#   python benchmarks/bench_search.py [book.usfm]
+
+import io
+import os
+import sys
+import time
+import tempfile
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Matchers import ElementMatcher
+from usfmparser.Search import TextIndex
+
+import sample
+
+
+def by_matcher(results, words):
+    ret = []
+    for word in words:
+        matcher = ElementMatcher(text_contains=word)
+        ret.append(sum(1 for x in results.get_flattened_forward() if matcher.match(x)))
+    return ret
+
+
+def by_index(index, words):
+    return [len(index.find(word)) for word in words]
+
+
+def by_phrase(index, phrases):
+    return [len(index.find_phrase(phrase)) for phrase in phrases]
+
+
+def bench(name, func, arg, queries):
+    start = time.perf_counter()
+    found = func(arg, queries)
+    elapsed = time.perf_counter() - start
+    print('{:<8} {:>6} queries  {:8.3f}s  {:>10,.0f} queries/s'.format(
+        name, len(queries), elapsed, len(queries) / elapsed
+    ))
+    return found
+
+
+if __name__ == '__main__':
+    text = sample.load_text()
+    parser = Parser(text)
+    parser.parse()
+    results = parser.results
+    results.get_flattened_forward()
+
+    start = time.perf_counter()
+    index = TextIndex()
+    index.add_results(results)
+    built = time.perf_counter() - start
+    data = index.dumps()
+    print('{} chars, {} verses, {} words: indexed in {:.3f}s, {:,} bytes'.format(
+        len(text), len(index.verses), len(index), built, len(data)
+    ))
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'index.usft')
+        with open(path, 'wb') as f:
+            f.write(data)
+        start = time.perf_counter()
+        with TextIndex.open(path) as mapped:
+            print('opened in {:.3f}s'.format(time.perf_counter() - start))
+            words = list(sample.WORDS)
+            bench('matcher', by_matcher, results, words[:3])
+            bench('index', by_index, index, words * 20)
+            bench('mapped', by_index, mapped, words * 20)
+            phrases = [' '.join(words[x:x + 2]) for x in range(len(words) - 1)] * 20
+            bench('phrase', by_phrase, mapped, phrases)
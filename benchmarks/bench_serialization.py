@@ -0,0 +1,55 @@
+# -*- coding: UTF-8 -*-
+# Size and write/read time of a parsed book in the Serialization format, compared with
+# pickle, and the time to read one chapter.
+#
+#   python benchmarks/bench_serialization.py [book.usfm]
+
+import gc
+import sys
+import time
+import pickle
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser import Serialization
+
+import sample
+
+
+def best_time(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func(*args)
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    return value, best
+
+
+if __name__ == '__main__':
+    gc.disable()        # as ParseCache does while loading
+    for tagged in (False, True):
+        text = sample.load_text(tagged=tagged)
+        parser = Parser(text)
+        parser.parse()
+        results = parser.results
+        print('{} chars{}'.format(len(text), ', tagged' if tagged else ''))
+
+        data, write_time = best_time(pickle.dumps, results, pickle.HIGHEST_PROTOCOL)
+        _, read_time = best_time(pickle.loads, data)
+        print('    pickle   {:>12,} bytes  write {:6.3f}s  read {:6.3f}s'.format(
+            len(data), write_time, read_time
+        ))
+
+        data, write_time = best_time(Serialization.dumps, results)
+        _, read_time = best_time(Serialization.loads, data)
+        print('    binary   {:>12,} bytes  write {:6.3f}s  read {:6.3f}s'.format(
+            len(data), write_time, read_time
+        ))
+
+        chapter = results.get_chapters()[len(results.chapters) // 2].value
+        _, chapter_time = best_time(lambda: Serialization.Reader(data).read_chapter(chapter))
+        print('    one chapter                      read {:6.3f}s'.format(chapter_time))
+        gc.collect()
@@ -0,0 +1,72 @@
+# -*- coding: UTF-8 -*-
+# Repeated text-matcher queries over a tagged book (every word a \w, some within \add in
+# \q1 paragraphs): get_text() made from children on every call, compared with the text
+# cached by paragraph, span, verse and chapter elements (see ParentElement.invalidate()).
+#
+#   python benchmarks/bench_text.py [book.usfm]
+
+import sys
+import time
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Matchers import ElementMatcher
+from usfmparser.Elements.ParagraphMarkerElements import ParagraphMarkerElement
+from usfmparser.Elements.SpanMarkerElement import SpanMarkerElement
+from usfmparser.Elements.MilestoneMarkerElements import MilestoneMarkerElement
+
+import sample
+
+
+QUERIES = 5
+
+
+def uncached_get_text(self, element_matcher=None, **kwargs):
+    # get_text() before text was cached
+    ret = self.marker_raw[-1]
+    ret += ''.join([x.get_text() for x in self.children])
+    return ret
+
+
+def uncached_get_cached_text(self):
+    return None
+
+
+def queries(results):
+    flattened = results.get_flattened_forward()
+    found = []
+    for word in sample.WORDS[:QUERIES]:
+        matcher = ElementMatcher(text_contains=word)
+        found.append(sum(1 for x in flattened if matcher.match(x)))
+    return found
+
+
+def bench(name, results):
+    start = time.perf_counter()
+    found = queries(results)
+    elapsed = time.perf_counter() - start
+    print('{:<9} {} queries  {:8.3f}s  {:8.1f} queries/s'.format(
+        name, QUERIES, elapsed, QUERIES / elapsed
+    ))
+    return found
+
+
+if __name__ == '__main__':
+    text = sample.load_text(tagged=True)
+    parser = Parser(text)
+    parser.parse()
+    results = parser.results
+    print('{} chars, {} elements, tagged'.format(len(text), len(results.get_flattened_forward())))
+
+    cached_methods = (ParagraphMarkerElement.get_text, SpanMarkerElement.get_text,
+                      MilestoneMarkerElement._get_cached_text)
+    ParagraphMarkerElement.get_text = SpanMarkerElement.get_text = uncached_get_text
+    MilestoneMarkerElement._get_cached_text = uncached_get_cached_text
+    try:
+        before = bench('uncached', results)
+    finally:
+        (ParagraphMarkerElement.get_text, SpanMarkerElement.get_text,
+            MilestoneMarkerElement._get_cached_text) = cached_methods
+    after = bench('cached', results)
+    assert(before == after)
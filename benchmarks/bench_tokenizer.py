@@ -0,0 +1,89 @@
+# -*- coding: UTF-8 -*-
+# Tokens/second for Tokenizer.tokenize() on a whole book, compared with the previous
+# tokenizer core (verbose regex string passed to re.finditer(), each match classified
+# by inspecting its text).
+#
+#   python benchmarks/bench_tokenizer.py [book.usfm]
+
+import re
+import sys
+import time
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Tokenizer import Tokenizer, TokensDeque
+from usfmparser.Token import Token
+from usfmparser.Constants import SPACES, NEWLINES
+
+import sample
+
+
+LEGACY_TOKENIZING_REGEX = r'''
+    \\[+\w]+[\n\r \t]
+    |
+    \\[-+\w]+(?:\\)?\*
+    |
+    (?: \| (?: \w+ (?:=)? ( (?:"[^"]+?") | (?:\w+) )? \s* )+ )
+    |
+    (?!<\\)[^|\\ \t\r\n]+
+    |
+    [\n\r]+
+    |
+    [ \t]
+'''
+
+
+def legacy_tokenize(text):
+    tokens = TokensDeque()
+
+    def create(token_type, match):
+        return Token(token_type, match.group(0), match.start(), match.end())
+
+    try_bound = 0
+    for match in re.finditer(LEGACY_TOKENIZING_REGEX, text, re.X):
+        if match.start() != try_bound:
+            break
+        if match.group(0)[0] == '\\':
+            if match.group(0)[-1] == '*':
+                tokens.append(create(Token.TYPE_MARKER_END, match))
+            else:
+                tokens.append(create(Token.TYPE_MARKER_START, match))
+        elif match.group(0)[0] == '|':
+            tokens.append(create(Token.TYPE_ATTRIBUTE, match))
+        elif match.group(0) in NEWLINES:
+            tokens.append(create(Token.TYPE_NEWLINE, match))
+        elif match.group(0) in SPACES:
+            tokens.append(create(Token.TYPE_SPACE, match))
+        else:
+            tokens.append(create(Token.TYPE_TEXT, match))
+        try_bound = match.end()
+    return tokens
+
+
+def tokenize(text):
+    tokenizer = Tokenizer(text)
+    tokenizer.tokenize()
+    return tokenizer.tokens
+
+
+def bench(name, func, text, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = func(text)
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    print('{:<8} {:>9} tokens  {:8.3f}s  {:>12,.0f} tokens/s'.format(
+        name, len(tokens), best, len(tokens) / best
+    ))
+    return tokens
+
+
+if __name__ == '__main__':
+    for tagged in (False, True):
+        text = sample.load_text(tagged=tagged)
+        print('{} chars{}'.format(len(text), ', tagged' if tagged else ''))
+        before = bench('before', legacy_tokenize, text)
+        after = bench('after', tokenize, text)
+        assert(before == after)
@@ -0,0 +1,48 @@
+# -*- coding: UTF-8 -*-
+# Verses/second getting the text and words of every verse in a book, calling V.get_text()
+# and V.get_words() per verse, compared with ParserResults.iter_verses().
+#
+#   python benchmarks/bench_verses.py [book.usfm]
+
+import sys
+import time
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+
+import sample
+
+
+def per_verse(results):
+    return [
+        (chapter.value, verse.value, verse.get_text(), verse.get_words())
+        for chapter in results.get_chapters() for verse in chapter.get_verses()
+    ]
+
+
+def one_pass(results):
+    return [tuple(x) for x in results.iter_verses()]
+
+
+def bench(name, func, results):
+    start = time.perf_counter()
+    verses = func(results)
+    elapsed = time.perf_counter() - start
+    print('{:<9} {:>7} verses  {:8.3f}s  {:>10,.0f} verses/s'.format(
+        name, len(verses), elapsed, len(verses) / elapsed
+    ))
+    return verses
+
+
+if __name__ == '__main__':
+    for tagged in (False, True):
+        text = sample.load_text(tagged=tagged)
+        parser = Parser(text)
+        parser.parse()
+        print('{} chars{}'.format(len(text), ', tagged' if tagged else ''))
+        # Flatten first, so neither includes it
+        parser.results.get_flattened_forward()
+        before = bench('per verse', per_verse, parser.results)
+        after = bench('one pass', one_pass, parser.results)
+        assert(before == after)
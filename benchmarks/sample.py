@@ -0,0 +1,46 @@
+# -*- coding: UTF-8 -*-
+# Input for benchmarks. Benchmarks take a USFM file as their first argument; without one,
+# they use a generated book of about the size of Psalms.
+
+import sys
+import random
+
+WORDS = ('in the beginning God created heaven and earth light darkness water spirit '
+         'moved upon face of deep said let there be was good').split()
+
+
+def generate_book(code='PSA', chapters=150, verses=20, tagged=False, seed=1):
+    """Generate a USFM book with headings, paragraphs, poetry, footnotes and nested
+       character markers. If tagged, every word is a \\w with a strong attribute."""
+    rand = random.Random(seed)
+    out = ['\\id {} Generated benchmark text\n'.format(code), '\\h Generated\n',
+           '\\toc1 Generated\n', '\\mt1 Generated\n']
+    for chapter in range(1, chapters + 1):
+        out.append('\\c {}\n'.format(chapter))
+        out.append('\\s1 Heading {}\n'.format(chapter))
+        out.append('\\p\n')
+        for verse in range(1, verses + 1):
+            if verse % 7 == 0:
+                out.append('\\q1\n')
+            words = []
+            for _ in range(rand.randint(5, 25)):
+                word = rand.choice(WORDS)
+                if tagged:
+                    word = '\\w {}|strong="H{:04d}"\\w*'.format(word, rand.randint(1, 8674))
+                words.append(word)
+            if verse % 5 == 0:
+                words.append('\\f + \\fr {}:{} \\ft a footnote\\f*'.format(chapter, verse))
+            if verse % 11 == 0:
+                words.insert(2, '\\add something \\+nd LORD\\+nd*\\add*')
+            out.append('\\v {} {}\n'.format(verse, ' '.join(words)))
+    return ''.join(out)
+
+
+def load_text(argv=None, **kwargs):
+    """Text of the USFM file named in argv, or a generated book."""
+    if argv is None:
+        argv = sys.argv
+    if len(argv) > 1:
+        with open(argv[1], encoding='utf-8-sig') as f:
+            return f.read()
+    return generate_book(**kwargs)
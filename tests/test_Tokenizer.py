@@ -4,7 +4,7 @@ import sys
 from os.path import dirname
 sys.path.append(dirname(dirname(sys.path[0])))
 
-from usfmparser.Tokenizer import Tokenizer, TokensDeque
+from usfmparser.Tokenizer import Tokenizer, TokensDeque, TokenStore
 from usfmparser.Token import Token
 
 D = TokensDeque
@@ -49,6 +49,116 @@ assert(t.tokens == D([
 ]))
 
 
+#### DISCARDING
+
+# Tokenized text is discarded, offsets stay relative to the whole source
+t = Tokenizer()
+t.add('\\h Genesis\n\\')
+t.tokenize()
+assert(t.text == '\\')
+assert(t.text_offset == 11)
+t.discard_tokens(2)
+assert(t.tokens == D([Token(Token.TYPE_NEWLINE, '\n', 10, 11)]))
+t.add('c 1 ')
+t.tokenize()
+assert(t.text == '')
+assert(t.tokenizing_bound == 16)
+assert(t.tokens == D([
+    Token(Token.TYPE_NEWLINE, '\n', 10, 11),
+    Token(Token.TYPE_MARKER_START, '\\c ', 11, 14),
+    Token(Token.TYPE_TEXT, '1', 14, 15),
+    Token(Token.TYPE_SPACE, ' ', 15, 16)
+]))
+
+t = Tokenizer(discard_after_tokenizing=False)
+t.add('\\h Genesis\n\\')
+t.tokenize()
+t.add('c 1 ')
+t.tokenize()
+assert(t.text == '\\h Genesis\n\\c 1 ')
+assert(t.tokens[-1] == Token(Token.TYPE_SPACE, ' ', 15, 16))
+
+# Only text of tokens that won't change is discarded - not of a token left to be continued
+t = Tokenizer()
+t.add('\\w God|strong="H1')
+t.tokenize(final=False)
+assert(t.text == '|strong="H1' and t.text_offset == t.tokenizing_bound == 6)
+t.add('"\\w*')
+t.tokenize(final=False)
+assert(t.text == '' and t.tokens[-2] == Token(Token.TYPE_ATTRIBUTE, '|strong="H1"', 6, 18))
+
+# Reset keeps the offset and line the tokenizer was created with
+t = Tokenizer('\\p\n', offset=100, line=5)
+t.tokenize()
+t.reset()
+t.add('\\q1\nline\n')
+t.tokenize()
+assert(t.tokens[0] == Token(Token.TYPE_MARKER_START, '\\q1\n', 100, 104))
+assert(t.lines.location(104) == (6, 1))
+
+
+# Text that may be added to isn't tokenized if it could continue a token (final=False),
+# so adding text anywhere gives the tokens of the whole text
+text = '\\v 1 the \\w God|strong="H0430 H1" x-occ="1"\\w* crea-ted\n\n\\p\n'
+whole = Tokenizer(text)
+whole.tokenize()
+for split in range(len(text) + 1):
+    t = Tokenizer(text[:split])
+    t.tokenize(final=False)
+    assert(t.tokenizing_bound == t.text_offset and text[t.tokenizing_bound:split] == t.text)
+    t.add(text[split:])
+    t.tokenize(final=False)
+    t.tokenize()
+    assert(t.tokens == whole.tokens)
+
+
+#### COLUMNAR
+
+t = Tokenizer(columnar=True)
+t.add('\\h Genesis\n\\')
+t.tokenize()
+assert(isinstance(t.tokens, TokenStore))
+assert(t.tokens == D([
+    Token(Token.TYPE_MARKER_START, '\\h ', 0, 3),
+    Token(Token.TYPE_TEXT, 'Genesis', 3, 10),
+    Token(Token.TYPE_NEWLINE, '\n', 10, 11)
+]))
+assert(t.tokens[1] == Token(Token.TYPE_TEXT, 'Genesis', 3, 10))
+assert(t.tokens[-1] == Token(Token.TYPE_NEWLINE, '\n', 10, 11))
+t.discard_tokens(2)
+assert(len(t.tokens) == 1)
+assert(t.tokens[0] == Token(Token.TYPE_NEWLINE, '\n', 10, 11))
+t.add('c 1 ')
+t.tokenize()
+assert(t.tokens[1] == Token(Token.TYPE_MARKER_START, '\\c ', 11, 14))
+assert(t.tokens.popleft() == Token(Token.TYPE_NEWLINE, '\n', 10, 11))
+assert(len(t.tokens) == 3)
+
+# Compacting keeps values and offsets
+s = TokenStore()
+s.COMPACT_MIN = 2
+s.extend([Token(Token.TYPE_TEXT, 'a', 0, 1), Token(Token.TYPE_SPACE, ' ', 1, 2), Token(Token.TYPE_TEXT, 'b', 2, 3)])
+s.discard(2)
+assert(s.head == 0)
+assert(s.source == 'b')
+assert(list(s) == [Token(Token.TYPE_TEXT, 'b', 2, 3)])
+s.clear()
+s.append(Token(Token.TYPE_TEXT, 'c', 3, 4))
+assert(s[0] == Token(Token.TYPE_TEXT, 'c', 3, 4))
+
+
+#### NEWLINES
+
+t = Tokenizer('a\n\nb\r\n')
+t.tokenize()
+assert(t.tokens == D([
+    Token(Token.TYPE_TEXT, 'a', 0, 1),
+    Token(Token.TYPE_TEXT, '\n\n', 1, 3),
+    Token(Token.TYPE_TEXT, 'b', 3, 4),
+    Token(Token.TYPE_NEWLINE, '\r\n', 4, 6)
+]))
+
+
 ###### ATTRIBUTES (tokenizing)
 
 t = Tokenizer('something|else')
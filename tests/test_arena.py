@@ -0,0 +1,106 @@
+# -*- coding: UTF-8 -*-
+# Test ArenaTree - the same tree as ParserResults, kept in arrays
+
+import sys
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Arena import ArenaTree, ArenaNode
+
+from usfmparser.Elements.ParagraphMarkerElements import P, D
+from usfmparser.Elements.CharacterMarkerElements import W
+from usfmparser.Elements.MilestoneMarkerElements import C, V
+
+
+text = '''\\id PSA Test
+\\c 1
+\\p
+\\v 1 In the \\w beginning|strong="H7225"\\w* God\\f + \\fr 1:1 \\ft a note\\f*
+\\v 2-3 created \\add the \\+nd LORD\\+nd*\\add*
+\\c 2
+\\d A psalm
+\\q1
+\\v 1 Blessed is the man
+\\p
+\\v 2 that walks not
+'''
+
+parser = Parser(text)
+parser.parse()
+results = parser.results
+expected_repr = repr(results)       # before get_flattened_forward(), which changes it
+
+for tree in (ArenaTree.from_results(results, text), ArenaTree.from_text(text)):
+    assert(len(tree) == len(results.get_flattened_forward()))
+    assert(not tree.overflow)
+
+    # Views
+    top_level = list(tree)
+    assert(all(isinstance(x, ArenaNode) for x in top_level))
+    assert([x.cls for x in top_level if x.cls in (C, P)] == [C, P, C, P])
+    chapter = tree.get_chapter(2)
+    assert(chapter.cls == C and chapter.value == 2 and chapter.marker == 'c')
+    assert(tree.get_chapter(3) == None)
+
+    verse = tree.get_verse(1, 1)
+    assert(verse.start == results.get_verse(1, 1).start)
+    assert(verse.parent.cls == P)
+    words = [x for x in verse.parent.children if x.cls == W]
+    assert(len(words) == 1 and words[0].children[0].text == 'beginning')
+    assert(words[0].element().attributes['strong'] == 'H7225')
+    assert(tree.get_verse(1, 2) == None)      # a range isn't a single verse
+    assert(tree.get_verse(2, 2).value.first_verse == 2)
+
+    # Materialized elements are the same as parsing
+    assert(repr(tree.to_results()) == expected_repr)
+    chapter_results = tree.to_results(chapter=2)
+    assert(list(chapter_results.chapters) == [2])
+    assert([x.value.first_verse for x in chapter_results.get_chapter(2).get_verses()] == [1, 2])
+    assert(chapter_results.get_verse(2, 1).parents[0] is chapter_results.get_chapter(2))
+    assert(chapter_results.get_verse(2, 1)._root is chapter_results)
+
+    # Verse text, as ParserResults.iter_verses()
+    expected = [(x.chapter, x.verse, x.text, [y.start for y in x.words]) for x in results.iter_verses()]
+    got = [(x.chapter, x.verse, x.text, [y.start for y in x.words]) for x in tree.iter_verses()]
+    assert(got == expected)
+    assert(got[1][1].last_verse == 3 and got[2][2] == 'Blessed is the man')
+
+# Text that isn't a slice of the source is kept too
+text = '\\p\n\\v 1 text\n'
+parser = Parser(text)
+parser.parse()
+parser.results[0].children[-1].text = 'changed'
+tree = ArenaTree.from_results(parser.results, text)
+assert(tree.overflow)
+assert(repr(tree.to_results()) == repr(parser.results))
+
+# Verses after a \c that failed to parse aren't in the chapter before it, as parsed
+text = '\\id GEN\n\\c 1\n\\p\n\\v 1 one\n\\c x\n\\p\n\\v 1 lost\n\\v 2 two\n'
+parser = Parser(text, recover=True)
+parser.parse()
+for tree in (ArenaTree.from_results(parser.results, text), ArenaTree.from_text(text, recover=True)):
+    assert(tree.get_verse(1, 1).start == parser.results.get_verse(1, 1).start)
+    assert(tree.get_verse(1, 2) == None)
+    materialized = tree.to_results()
+    verses = [x for x in materialized.get_flattened_forward() if isinstance(x, V)]
+    assert([isinstance(x.parents[0], C) for x in verses] == [True, False, False])
+    assert(materialized.get_chapter(1).children == [verses[0]])
+    assert(materialized.get_verse(1, 2) == None)
+
+# Psalm titles - the text of a \d within a chapter is also added after the next \v, as
+# the same element, with the \d as its parent
+text = '\\id PSA Test\n\\c 119\n\\q1\n\\v 8 forsake me not\n\\d BETH\n\\q1\n\\v 9 Wherewithal\n'
+parser = Parser(text)
+parser.parse()
+results = parser.results
+expected_repr = repr(results)
+d_text = [x for x in results if isinstance(x, D)][0].children[0]
+for tree in (ArenaTree.from_results(results, text), ArenaTree.from_text(text)):
+    assert(len(tree.same_as) == 1)
+    materialized = tree.to_results()
+    assert(repr(materialized) == expected_repr)
+    d, q = [x for x in materialized if getattr(x, 'marker', None) in ('d', 'q')][1:]
+    assert(isinstance(d, D) and q.children[1] is d.children[0])
+    assert(q.children[1].parents == [d] and q.children[1].text == d_text.text)
+    assert(materialized.get_verse(119, 9).get_text() == results.get_verse(119, 9).get_text())
@@ -0,0 +1,94 @@
+# -*- coding: UTF-8 -*-
+# Test the inverted index of \w attributes (usfmparser.Attributes)
+
+import sys
+import pickle
+from array import array
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Attributes import (
+    AttributeIndex, Posting, ELEMENT, VERSE, pack, unpack, intersect, union
+)
+from usfmparser.Elements.CharacterMarkerElements import W
+
+
+posting = pack(3, 150, 176, 123456)
+assert(unpack(posting) == Posting(3, 150, 176, 123456))
+assert(pack(0, 1, 2, 0) < pack(0, 1, 2, 1) < pack(0, 1, 3, 0) < pack(0, 2, 1, 0) < pack(1, 0, 0, 0))
+try:
+    pack(0, 1, 1, 1 << 32)
+    assert(False)
+except ValueError:
+    pass
+
+gen = '''\\id GEN Test
+\\c 1
+\\p
+\\v 1 In the \\w beginning|strong="H7225"\\w* \\w God|strong="H0430" lemma="elohim"\\w*
+\\w created|strong="H1254"\\w*
+\\v 2 And \\w God|strong="H0430" lemma="elohim"\\w* \\w saw|strong="H7200,H0853"\\w* \\f + \\fr 1:2 \\ft a \\w note|strong="H9999"\\w*\\f*
+\\c 2
+\\p
+\\v 1 \\w created|strong="H1254"\\w* again
+'''
+exo = '''\\id EXO Test
+\\c 3
+\\p
+\\v 14 \\w God|strong="H0430"\\w* said
+'''
+n = Parser(gen)
+n.parse()
+words = [x for x in n.results.get_flattened_forward() if isinstance(x, W)]
+
+index = AttributeIndex()
+assert(index.add_results(n.results) == 0)
+n = Parser(exo)
+n.parse()
+assert(index.add_results(n.results, 'XXX') == 1)
+assert(index.books == ['GEN', 'XXX'])
+
+god = index.lookup('strong', 'H0430')
+assert(god == [
+    Posting(0, 1, 1, words[1].start), Posting(0, 1, 2, words[3].start),
+    Posting(1, 3, 14, exo.index('\\w God'))
+])
+assert(index.get_book(index.get('strong', 'H0430')[-1]) == 'XXX')
+assert(index.count('lemma', 'elohim') == 2 and index.count('lemma', 'nothing') == 0)
+assert(len(index.get('strong', 'nothing')) == 0)
+# Each value of a list
+assert(index.lookup('strong', 'H0853') == index.lookup('strong', 'H7200') == [Posting(0, 1, 2, words[4].start)])
+# In notes too
+assert(index.lookup('strong', 'H9999')[0].verse == 2)
+assert(index.get_names() == ['lemma', 'strong'])
+assert(index.get_values('lemma') == ['elohim'])
+
+# The same \w
+found = index.find_all([('strong', 'H0430'), ('lemma', 'elohim')])
+assert([unpack(x) for x in found] == god[:2])
+assert(len(index.find_all([('strong', 'H0430'), ('strong', 'H1254')])) == 0)
+# The same verse - offset 0
+found = index.find_all([('strong', 'H0430'), ('strong', 'H1254')], level=VERSE)
+assert([unpack(x) for x in found] == [Posting(0, 1, 1, 0)])
+found = index.find_any([('strong', 'H1254'), ('lemma', 'elohim')], level=VERSE)
+assert([tuple(unpack(x))[:3] for x in found] == [(0, 1, 1), (0, 1, 2), (0, 2, 1)])
+found = index.find_any([('strong', 'H1254'), ('lemma', 'elohim')])
+assert(len(found) == 4 and list(found) == sorted(found))
+assert(len(intersect()) == 0 and len(union()) == 0)
+
+# A short list against a long one, and results don't share the index's arrays
+long_list = array('Q', [pack(0, 1, 1, x) for x in range(0, 20000, 2)])
+short = array('Q', [pack(0, 1, 1, 4), pack(0, 1, 1, 5), pack(0, 1, 1, 19998)])
+assert(list(intersect(short, long_list)) == [pack(0, 1, 1, 4), pack(0, 1, 1, 19998)])
+result = intersect(index.get('strong', 'H1254'))
+result.append(0)
+assert(len(index.get('strong', 'H1254')) == 2)
+
+# Verses out of order are sorted when read
+n = Parser('\\id LEV x\n\\c 1\n\\p\n\\v 2 \\w a|strong="H1"\\w*\n\\v 1 \\w b|strong="H1"\\w*\n')
+n.parse()
+index.add_results(n.results)
+assert([x.verse for x in index.lookup('strong', 'H1')] == [1, 2])
+
+assert(pickle.loads(pickle.dumps(index)).lookup('strong', 'H0430') == god)
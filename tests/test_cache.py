@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+# Test ParseCache - parsed books cached on disk
+
+import os
+import sys
+import time
+import tempfile
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Cache import ParseCache, version_stamp, _source_modules
+from usfmparser import Parser as parser_module
+
+
+text = '''\\id GEN Test
+\\c 1
+\\p
+\\v 1 In the \\w beginning|strong="H7225"\\w* God\\f + \\ft note\\f*
+\\v 2 created \\add the\\add* earth
+\\c 2
+\\p
+\\v 1 Again
+'''
+
+parser = Parser(text)
+parser.parse()
+expected = repr(parser.results)
+
+with tempfile.TemporaryDirectory() as d:
+    cache = ParseCache(d)
+    results = cache.parse(text)
+    assert(cache.misses == 1 and cache.hits == 0 and len(cache) == 1)
+    assert(repr(results) == expected)
+
+    cached = cache.parse(text)
+    assert(cache.hits == 1)
+    assert(cached is not results and repr(cached) == expected)
+    assert(cached.parser == None)
+    assert(sorted(cached.chapters) == [1, 2])
+    verse = cached.get_verse(1, 2)
+    assert(verse._root is cached and verse.parents[0] is cached.get_chapter(1))
+    assert(verse.get_text() == results.get_verse(1, 2).get_text())
+    assert(cached.milestones == results.milestones)
+
+    # Different text or options, different entries. trace doesn't change the results.
+    assert(cache.key(text) != cache.key(text + '\\v 2 More\n'))
+    assert(cache.key(text) != cache.key(text, max_depth=5))
+    assert(cache.key(text) == cache.key(text, trace=print))
+    assert(cache.get(text, max_depth=5) == None)
+
+    # Unreadable entries are parsed again
+    with open(cache.path(cache.key(text)), 'wb') as f:
+        f.write(b'truncated')
+    assert(cache.get(text) == None)
+    assert(repr(cache.parse(text)) == expected)
+
+    # Least recently used are evicted
+    size = cache.size()
+    cache.max_size = size * 2 + size // 2
+    other = text.replace('Again', 'Once more')
+    cache.parse(other)
+    past = time.time() - 60
+    os.utime(cache.path(cache.key(other)), (past, past))
+    cache.parse(text)       # used - more recent than other
+    cache.parse(text.replace('Again', 'Third'))
+    assert(len(cache) == 2)
+    assert(cache.get(other) == None and cache.get(text) != None)
+
+    cache.clear()
+    assert(len(cache) == 0)
+
+    # Source, locations and recover-mode diagnostics are the same from the cache
+    bad = text + '\\c 3\n\\p\n\\v 1 a \\nonsense b\n\\v 2 c\n\\c 4\n\\p\n\\v 1 d \\bad\n'
+    miss = cache.parse(bad, recover=True)
+    hit = cache.parse(bad, recover=True)
+    assert(cache.get(bad) == None)
+    assert(hit is not miss and repr(hit) == repr(miss))
+    assert(hit.source == bad)
+    for reference in ('1:1', '2', '3:1-2', '4:1'):
+        assert(hit[reference].get_usfm() == miss[reference].get_usfm() != None)
+    verse = hit.get_verse(3, 1)
+    assert(verse.get_location() == miss.get_verse(3, 1).get_location() == (11, 1))
+    assert(len(miss.diagnostics) == 2)
+    assert([(x.offset, x.line, x.column, type(x.exception), str(x.exception)) for x in hit.diagnostics]
+           == [(x.offset, x.line, x.column, type(x.exception), str(x.exception)) for x in miss.diagnostics])
+    failed = [x for x in hit if type(x).__name__ == 'ParsingFailedElement']
+    assert([x.e for x in failed] == [x.exception for x in hit.diagnostics])
+    assert(failed[0].get_location() == (11, 8))
+
+    # As are the verses after a \c that failed to parse, in no chapter
+    lost = text + '\\c x\n\\p\n\\v 9 lost\n'
+    miss = cache.parse(lost, recover=True)
+    hit = cache.parse(lost, recover=True)
+    assert(hit is not miss and repr(hit) == repr(miss))
+    assert(hit.get_verse(2, 9) == None and hit.get_references().find_verse(2, 9) == None)
+    assert(len(hit.get_chapter(2).children) == len(miss.get_chapter(2).children) == 1)
+
+assert(version_stamp() == version_stamp())
+# The parser's code is part of the stamp, not only the element classes' layout
+assert(parser_module in _source_modules())
@@ -0,0 +1,86 @@
+# -*- coding: UTF-8 -*-
+# Test parsing many books with usfmparser.Corpus
+
+import sys
+import os
+import tempfile
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Exceptions import USFMSyntaxError
+from usfmparser.Parser import Parser
+from usfmparser.Corpus import (
+    parse_corpus, find_usfm_files, BookSummary, parse_sharded, shard_bounds
+)
+
+
+def verse_count(results):
+    return len(results.get_chapter(1).get_verses())
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as d:
+        with open(os.path.join(d, '01GEN.usfm'), 'w') as f:
+            f.write('\\id GEN Genesis\n\\c 1\n\\p\n\\v 1 In the beginning\n\\v 2 The earth\n')
+        with open(os.path.join(d, '02EXO.SFM'), 'w') as f:
+            f.write('\\id EXO Exodus\r\n\\c 1\r\n\\p\r\n\\v 1 These are the names\r\n')
+        with open(os.path.join(d, '03BAD.usfm'), 'w') as f:
+            f.write('\\id BAD Bad\n\\c 1\n\\v 1 no paragraph\n')
+        with open(os.path.join(d, 'README.txt'), 'w') as f:
+            f.write('not usfm')
+
+        files = find_usfm_files(d)
+        assert([os.path.basename(x) for x in files] == ['01GEN.usfm', '02EXO.SFM', '03BAD.usfm'])
+
+        results = parse_corpus(d, max_workers=2)
+        assert(len(results) == 3)
+        assert(results[0].value == BookSummary('GEN', 1, 2))
+        assert(results[0].error == None)
+        # \r\n newlines are read as \n
+        assert(results[1].value == BookSummary('EXO', 1, 1))
+        assert(results[2].value == None)
+        assert(isinstance(results[2].error, USFMSyntaxError))
+
+        results = parse_corpus(files[:2], transform=verse_count, max_workers=1)
+        assert([x.value for x in results] == [2, 1])
+
+    # One book, split at \c
+    text = ('\\id PSA Psalms\n\\c 1\n\\p\n\\v 1 a \\w word|strong="H1"\\w*\n\\v 2 b\n'
+            '\\d ALEPH\n\\c 2\n\\p\n\\v 1 c\\f + \\ft note\\f*\n\\c 3\n\\q1\n\\v 1 d\n')
+    assert(shard_bounds(text, 1) == [0, len(text)])
+    bounds = shard_bounds(text, 10)
+    assert(len(bounds) == 5)
+    assert(all(text[x:x + 3] == '\\c ' for x in bounds[2:-1]))
+
+    parser = Parser(text)
+    parser.parse()
+    expected = parser.results
+    results = parse_sharded(text, max_workers=2)
+    assert(repr(results) == repr(expected))
+    assert(results.get_number_of_chapters() == 3)
+    for chapter in (1, 2, 3):
+        for verse in range(1, expected.get_number_of_verses(chapter) + 1):
+            assert(results.get_verse(chapter, verse).get_text() ==
+                expected.get_verse(chapter, verse).get_text())
+    # \d text at the end of chapter 1 is added after \v 1 of chapter 2, as when not sharded
+    assert(results.get_verse(2, 1).parents[1].children[1].get_text() == 'ALEPH\n')
+    assert(results.get_verse(3, 1)._root is results)
+
+    # Errors are the same as a sequential parse
+    try:
+        parse_sharded(text + '\\c 4\n\\v 1 no paragraph\n', max_workers=2)
+        assert(False)
+    except USFMSyntaxError:
+        pass
+
+    # With recover=True, the same diagnostics as a sequential parse, at lines of the book
+    bad = text + '\\c 4\n\\v 1 no paragraph\n\\c 5\n\\p\n\\v 1 a \\nonsense b\n\\c 6\n\\p\n\\v 1 \\add c\\nd*\n'
+    parser = Parser(bad, recover=True)
+    parser.parse()
+    expected = parser.results
+    results = parse_sharded(bad, max_workers=2, recover=True)
+    assert(len(expected.diagnostics) == 3)
+    assert([(x.offset, x.line, x.column, str(x.exception)) for x in results.diagnostics] ==
+           [(x.offset, x.line, x.column, str(x.exception)) for x in expected.diagnostics])
+    assert(str(results.diagnostics[0].exception).startswith('[~ 14]'))
+    assert(repr(results) == repr(expected))
@@ -0,0 +1,73 @@
+# -*- coding: UTF-8 -*-
+# Test traversing the flattened parse tree from milestones (elements_from() and indices)
+
+import sys
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+
+from usfmparser.Matchers import ElementMatcher
+from usfmparser.Elements.Text import Text
+from usfmparser.Elements.ParagraphMarkerElements import P, D
+from usfmparser.Elements.MilestoneMarkerElements import C, V, FORWARD, BACKWARD
+
+
+text = '''\\id PSA Test
+\\c 1
+\\p
+\\v 1 one \\w word|strong="H1"\\w*
+\\v 2 two\\f + \\ft note\\f*
+\\d ALEPH
+\\c 2
+\\p
+\\v 1 three
+'''
+
+parser = Parser(text)
+parser.parse()
+results = parser.results
+
+flattened = results.get_flattened_forward()
+for idx, elem in enumerate(flattened):
+    # \d text pending at the end of chapter 1 also follows \v 1 of chapter 2
+    assert(results.get_flattened_index(elem) <= idx)
+    assert(flattened[results.get_flattened_index(elem)] is elem)
+    assert(results.get_flattened_backward()[results.get_flattened_index(elem, BACKWARD)] is elem)
+
+c1 = results.get_chapter(1)
+v1, v2 = c1.get_verses()
+c2 = results.get_chapter(2)
+
+next_c = results.get_next_index(C)
+assert(next_c[0] == results.get_flattened_index(c1))
+assert(next_c[results.get_flattened_index(c1) + 1] == results.get_flattened_index(c2))
+assert(next_c[results.get_flattened_index(c2) + 1] == len(flattened))
+assert(next_c[len(flattened)] == len(flattened))
+
+# until_cls gives the same elements as until
+for until_cls in (V, C, (C, V, D)):
+    matcher = ElementMatcher(cls=until_cls)
+    for milestone in (c1, v1, v2, c2):
+        for direction in (FORWARD, BACKWARD):
+            assert(milestone.elements_from(direction=direction, until_cls=until_cls)
+                == milestone.elements_from(direction=direction, until=matcher))
+
+texts = v1.elements_from(include=ElementMatcher(cls=Text), until_cls=V)
+assert([x.get_text() for x in texts] == [' one ', 'word'])
+assert(v1.elements_from(until_cls=V, first=1) == [flattened[results.get_flattened_index(v1) + 1]])
+assert(v2.elements_from(direction=BACKWARD, until_cls=C, last=1)[0] is flattened[results.get_flattened_index(c1) + 1])
+
+assert(v1.get_text() == 'one word')
+assert(v2.get_text() == 'two')
+# The pending \d text is included in the next verse
+assert(c2.get_verse(1).get_text() == 'ALEPH\n three')
+assert([x.get_text() for x in v1.get_words()] == [' word'])
+
+# All verses in one pass
+verses = list(results.iter_verses())
+assert([(x.chapter, x.verse) for x in verses] == [(1, 1), (1, 2), (2, 1)])
+assert(verses[0].text == 'one word')
+assert(verses[0].words == v1.get_words())
+assert(verses[1].text == 'two')          # not the footnote
+assert(verses[2].text == c2.get_verse(1).get_text())
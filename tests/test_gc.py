@@ -0,0 +1,126 @@
+# -*- coding: UTF-8 -*-
+# Test that a parsed tree has no reference cycles - it's freed without gc.collect()
+
+import gc
+import sys
+import pickle
+import weakref
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Elements.ChildElement import WeakList
+from usfmparser.Elements.MilestoneMarkerElements import V
+
+
+text = '''\\id GEN Test
+\\c 1
+\\s1 Heading
+\\p
+\\v 1 In the \\w beginning|strong="H7225"\\w* God\\f + \\fr 1:1 \\ft a note\\f*
+\\v 2 created \\add the \\+nd LORD\\+nd*\\add*
+\\c 2
+\\d A psalm
+\\p
+\\v 1 Blessed \\qt-s |who="Jesus"\\*is\\qt-e\\* the man
+'''
+
+
+def parse_and_use():
+    """Parse text, use the tree (so caches are filled), and return weak references to
+       the parser, results and some elements."""
+    parser = Parser(text)
+    parser.parse()
+    results = parser.results
+    list(results.iter_verses())
+    verse = results.get_verse(1, 1)
+    verse.get_text()
+    results.get_flattened_backward()
+    results[-1].get_flattened_backward()
+    list(iter(results[-1]))
+    refs = [weakref.ref(parser), weakref.ref(results), weakref.ref(verse)]
+    refs.extend([weakref.ref(x) for x in results.get_flattened_forward()])
+    return refs
+
+
+gc.disable()
+try:
+    refs = parse_and_use()
+    assert(all(ref() == None for ref in refs))
+
+    # Still true of a copy made by pickling
+    parser = Parser(text)
+    parser.parse()
+    copy = pickle.loads(pickle.dumps(parser.results))
+    assert(copy.parser == None)
+    verse = copy.get_verse(1, 1)
+    assert(verse._root is copy)
+    assert(verse.parents[0] is copy.get_chapter(1))
+    refs = [weakref.ref(copy), weakref.ref(copy.get_chapter(2))]
+    del copy
+    assert(all(ref() == None for ref in refs))
+
+    # A child doesn't keep its parents (or the results) alive
+    assert(isinstance(verse.parents, WeakList))
+    assert(verse.parents == [None, None] and verse._root == None)
+finally:
+    gc.enable()
+
+# results.parser while the parser exists
+parser = Parser(text)
+assert(parser.results.parser is parser)
+results = parser.results
+del parser
+assert(results.parser == None)
+
+# parents can still be set and changed as a list
+parser = Parser(text)
+parser.parse()
+verse = parser.results.get_verse(2, 1)
+assert(isinstance(verse, V))
+verse.parents = [parser.results.get_chapter(2)]
+verse.parents.append(parser.results[-1])
+assert(verse.parents == [parser.results.get_chapter(2), parser.results[-1]])
+
+
+# Elements kept after the parser and results are freed
+def parse_and_keep():
+    parser = Parser(text)
+    parser.parse()
+    results = parser.results
+    paragraph = [x for x in results if getattr(x, 'marker', None) == 'p'][0]
+    return paragraph, results.get_verse(2, 1)
+
+
+gc.disable()
+try:
+    paragraph, verse = parse_and_keep()
+    # A paragraph keeps its children, so its verses' text is still known
+    verses = [x for x in paragraph.children if isinstance(x, V)]
+    assert(verses[0].parents[0] == None and verses[0].parents[1] is paragraph)
+    assert([x.get_text() for x in verses] == ['In the beginning God', 'created the LORD'])
+    assert('parents=[?, P]' in repr(verses[0]))
+    # A verse without its paragraph has no text, rather than failing
+    assert(verse.parents == [None, None] and verse.get_text() == None)
+    assert('parents=[?, ?]' in repr(verse))
+    assert(verse.get_root() == None and verse.get_location() == None)
+finally:
+    gc.enable()
+
+
+# A chapter kept after the results are freed has only its verses - no text, every time
+def parse_and_keep_chapter():
+    parser = Parser(text)
+    parser.parse()
+    return parser.results.get_chapter(1)
+
+
+gc.disable()
+try:
+    chapter = parse_and_keep_chapter()
+    verse = chapter.get_verse(1)
+    assert(verse.parents[0] is chapter and verse.parents[1] == None)
+    assert(verse.get_text() == None and chapter.get_text() == None)
+    assert(verse.get_words() == [])
+finally:
+    gc.enable()
@@ -0,0 +1,99 @@
+# -*- coding: UTF-8 -*-
+# Test line and column of offsets (Locations.LineIndex) and elements (Element.get_location())
+
+import sys
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser, ParserResults
+from usfmparser.Locations import LineIndex, Location
+from usfmparser.Exceptions import NonExistentMarkerError
+from usfmparser.Elements.Element import ParsingFailedElement
+from usfmparser.Elements.Text import Text
+from usfmparser.Elements.CharacterMarkerElements import W
+from usfmparser import Corpus
+
+
+# LineIndex, given text in chunks (split mid-line)
+lines = LineIndex()
+for chunk in ('ab\ncd', 'e\n', '\nfg'):
+    lines.add(chunk)
+assert(lines.location(0) == Location(1, 1))
+assert(lines.location(2) == (1, 3))        # the newline itself
+assert(lines.location(3) == (2, 1))
+assert(lines.location(5) == (2, 3))
+assert(lines.location(7) == (3, 1))
+assert(lines.location(8) == (4, 1))
+assert(lines.location(9) == (4, 2))
+assert(len(lines) == 4)
+lines.add('\n')
+assert(len(lines) == 5)
+
+# Offset in a larger source
+lines = LineIndex(100)
+lines.add('x\ny')
+assert(lines.location(100) == (1, 1) and lines.location(102) == (2, 1))
+lines = LineIndex(100, 7)
+lines.add('x\ny')
+assert(lines.location(100) == (7, 1) and lines.location(102) == (8, 1))
+
+
+text = '''\\id GEN Test
+\\c 1
+\\p
+\\v 1 In the beginning \\w God|strong="H0430"\\w* created
+\\v 2 the heavens
+\\q1 and the earth.
+'''
+
+n = Parser(text)
+n.parse()
+results = n.results
+v2 = results.get_verse(1, 2)
+assert(v2.get_location() == (5, 1))
+assert(results.get_chapter(1).get_location() == (2, 1))
+# Text within a paragraph has no _root of its own
+p = [x for x in results if x.__class__.__name__ == 'P'][0]
+word = [x for x in p.get_flattened_forward() if isinstance(x, W)][0]
+assert(word.get_location() == (4, 23))
+assert(word.get_location(end=True) == (4, 47))
+inner = word.children[0]
+assert(isinstance(inner, Text) and not hasattr(inner, '_root_ref'))
+assert(inner.get_location() == (4, 26))
+assert(Text(0, 1, (), 'x').get_location() == None)
+
+
+# Errors give the line they're on, however the text arrives
+bad = text + '\\p\n\\v 3 and\n\\nonsense here\n'
+for chunk_size in (len(bad), 7, 1):
+    n = Parser()
+    try:
+        for idx in range(0, len(bad), chunk_size):
+            n.add(bad[idx:idx + chunk_size])
+            for elem in n.yield_results():
+                pass
+        for elem in n.yield_results(final=True):
+            pass
+        assert(False)
+    except NonExistentMarkerError as e:
+        assert(str(e).startswith('[~ 9] '))
+    assert(n.line_num == 9)
+    assert(n.get_location() == (9, 1))
+
+# Failed elements know where they are
+n = Parser('\\id GEN\n\\c 1\n  \\nonsense here\n')
+try:
+    n.parse()
+    assert(False)
+except Exception:
+    pass
+failed = n.results[-1]
+assert(isinstance(failed, ParsingFailedElement))
+assert(failed.get_location() == (3, 3))
+assert(repr(failed).startswith('ParsingFailedElement(offset=15, line=3, column=3, '))
+
+# Sharded parses give the locations of the whole book
+book = ''.join('\\c {}\n\\p\n\\v 1 verse one\n\\v 2 verse two\n'.format(x) for x in range(1, 9))
+sharded = Corpus.parse_sharded(book, max_workers=2)
+assert(sharded.get_verse(6, 2).get_location() == (6 * 4, 1))
+assert(ParserResults().get_location(0) == None)
@@ -0,0 +1,73 @@
+# -*- coding: UTF-8 -*-
+# Test MappedResults - a serialized book read through a memory map
+
+import os
+import sys
+import tempfile
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Serialization import dump
+from usfmparser.Mapped import MappedResults
+from usfmparser.Matchers import ElementMatcher
+
+from usfmparser.Elements.CharacterMarkerElements import W
+from usfmparser.Elements.ConvertableElements import VerseNumberSequence
+
+
+text = '''\\id GEN Test
+\\h Genesis
+\\toc1 The Book of Genesis
+\\c 1
+\\p
+\\v 1 In the \\w beginning|strong="H7225"\\w* God\\f + \\fr 1:1 \\ft a note\\f*
+\\v 2-3 created \\w the|strong="H853"\\w* heavens
+\\c 2
+\\p
+\\v 1 Thus the \\w heavens|strong="H8064"\\w* were finished
+\\v 2 And on the seventh day
+'''
+
+parser = Parser(text)
+parser.parse()
+results = parser.results
+
+with tempfile.TemporaryDirectory() as d:
+    path = os.path.join(d, 'GEN.usfb')
+    with open(path, 'wb') as f:
+        dump(results, f)
+
+    with MappedResults(path, max_chapters=1) as book:
+        assert(book.get_number_of_chapters() == 2 and book.get_chapter_numbers() == [1, 2])
+        assert(book.get_number_of_verses(1) == 2 and book.get_number_of_verses(2) == 2)
+        assert(book.get_id().get_code() == 'GEN')
+        assert(book.get_toc(1).get_text() == results.get_toc(1).get_text())
+
+        # Verse text without reading elements
+        assert(book.get_verse_text(1, 1) == results.get_verse(1, 1).get_text())
+        assert(book.get_verse_text(1, VerseNumberSequence(2, 3)) == 'created the heavens')
+        assert(book.get_verse_text(1, 2) == None and book.get_verse_text(3, 1) == None)
+        verse = results.get_verse(2, 1)
+        assert(book.get_verse_range(2, 1) == (verse.start, book.get_verse_range(2, 2)[0]))
+        assert(not book._chapters)
+        assert(list(book.iter_verse_texts()) == [(x.chapter, x.verse, x.text) for x in results.iter_verses()])
+
+        # Elements, a chapter at a time
+        chapter_results = book.get_chapter_results(2)
+        verse = book.get_verse(2, 1)
+        assert(verse.start == results.get_verse(2, 1).start)
+        assert(verse.get_text() == book.get_verse_text(2, 1))
+        assert(list(book._chapters) == [2])
+        assert(book.get_chapter(1).value == 1 and list(book._chapters) == [1])
+        assert(book.get_chapter(3) == None)
+        assert([(x.chapter, x.verse, x.text, [y.start for y in x.words]) for x in book.iter_verses()] ==
+               [(x.chapter, x.verse, x.text, [y.start for y in x.words]) for x in results.iter_verses()])
+
+        # ElementMatcher queries
+        strongs = [x.attributes['strong'] for x in book.find_all(ElementMatcher(cls=W))]
+        assert(strongs == ['H7225', 'H853', 'H8064'])
+        assert([x.start for x in book.find_all(ElementMatcher(cls=W), chapter=2)] ==
+               [results.get_verse(2, 1).parents[1].children[2].start])
+        assert(list(book.find_all(ElementMatcher(cls=W), chapter=5)) == [])
+    assert(book._mmap == None)
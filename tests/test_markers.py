@@ -0,0 +1,78 @@
+# -*- coding: UTF-8 -*-
+# Test the marker lookup table (Markers.marker_info())
+
+import re
+import sys
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Token import Token
+from usfmparser.Markers import (
+    marker_info, NOT_A_MARKER, MILESTONE_NONE, MILESTONE_START, MILESTONE_END
+)
+from usfmparser.Elements.ParagraphMarkerElements import P, Q, TOC
+from usfmparser.Elements.CharacterMarkerElements import W, ADD
+from usfmparser.Elements.NoteMarkerElements import F, FT
+from usfmparser.Elements.MilestoneMarkerElements import C, V
+
+
+def legacy_marker(value, matching=False):
+    # marker_from_token() before the lookup table
+    if not value.startswith('\\'):
+        return ''
+    tmp = value.replace('\\', '').replace('*', '')
+    if not matching:
+        tmp = tmp.replace('+', '')
+    return re.sub(r'\s+|\d+', '', tmp).lower()
+
+
+VALUES = ['\\p ', '\\p\n', '\\q2 ', '\\toc1 ', '\\c ', '\\v ', '\\w ', '\\w*', '\\+w ',
+          '\\+w*', '\\f ', '\\f*', '\\ft ', '\\qt-s\\*', '\\qt-e\\*', '\\Add ', '\\zfoo ',
+          '\\nonsense ', 'text', '|strong="H1"']
+
+parser = Parser('')
+for value in VALUES:
+    info = marker_info(value)
+    assert(info.marker == legacy_marker(value))
+    assert(info.marker_matching == legacy_marker(value, matching=True))
+    token = Token(Token.TYPE_MARKER_START, value, 0, len(value))
+    assert(parser.marker_from_token(token) == legacy_marker(value))
+    assert(parser.marker_from_token(token, matching=True) == legacy_marker(value, matching=True))
+
+# The same MarkerInfo each time, with interned markers
+assert(marker_info('\\p ') is marker_info('\\p '))
+assert(marker_info('\\p ').marker is marker_info('\\p\n').marker)
+assert(marker_info('text') is NOT_A_MARKER)
+assert(parser.marker_info(None) is NOT_A_MARKER)
+assert(parser.marker_info(Token(Token.TYPE_ATTRIBUTE, '|x', 0, 2)) is NOT_A_MARKER)
+
+info = marker_info('\\q2 ')
+assert(info.cls == Q and info.number == 2 and info.paragraph and info.boundary)
+assert(not (info.span or info.is_c or info.is_v or info.end))
+assert(marker_info('\\toc1 ').cls == TOC and marker_info('\\toc1 ').number == 1)
+assert(marker_info('\\p ').cls == P and marker_info('\\p ').number == None)
+
+info = marker_info('\\c ')
+assert(info.cls == C and info.is_c and info.boundary and not info.paragraph)
+info = marker_info('\\v ')
+assert(info.cls == V and info.is_v and not info.boundary)
+
+info = marker_info('\\+w ')
+assert(info.cls == W and info.plus and info.span and info.paired and not info.no_end)
+assert(info.close_value == '\\+w*')
+info = marker_info('\\w*')
+assert(info.end and not info.plus and info.close_value == '\\w*')
+assert(marker_info('\\add ').cls == ADD and marker_info('\\Add ').marker == 'add')
+
+info = marker_info('\\ft ')
+assert(info.cls == FT and info.no_end and info.span and not info.paired)
+assert(marker_info('\\f ').cls == F and marker_info('\\f ').paired)
+
+assert(marker_info('\\qt-s\\*').milestone == MILESTONE_START)
+assert(marker_info('\\qt-e\\*').milestone == MILESTONE_END)
+assert(marker_info('\\p ').milestone == MILESTONE_NONE)
+
+info = marker_info('\\nonsense ')
+assert(info.cls == None and not (info.existing or info.boundary or info.span))
+assert(marker_info('\\p ').existing and marker_info('\\w ').existing)
@@ -0,0 +1,72 @@
+# -*- coding: UTF-8 -*-
+# Test ElementMatcher and ElementMatcherCombined
+
+import sys
+import pickle
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Matchers import ElementMatcher, ElementMatcherCombined
+
+from usfmparser.Elements.Text import Text
+from usfmparser.Elements.Whitespace import Whitespace
+from usfmparser.Elements.ParagraphMarkerElements import P, Q
+from usfmparser.Elements.CharacterMarkerElements import W
+from usfmparser.Elements.MilestoneMarkerElements import C, V
+
+
+parser = Parser('\\id GEN Test\n\\c 1\n\\p\n\\v 1 In \\w beginning|strong="H7225"\\w*\n\\q1\n\\v 2 earth\n')
+parser.parse()
+results = parser.results
+c1 = results.get_chapter(1)
+v1, v2 = c1.get_verses()
+w = v1.get_words()[0]
+p = v1.parents[1]
+q = v2.parents[1]
+text = w.children[0]
+
+assert(ElementMatcher().match(p))
+assert(not ElementMatcher().match('not an element'))
+assert(not ElementMatcher(logic_func=any).match(p))
+
+assert(ElementMatcher(cls=V).match(v1))
+assert(ElementMatcher(cls=[C, V]).match(c1))
+assert(not ElementMatcher(cls=(C, V)).match(p))
+assert(ElementMatcher(cls=V, value=2).match(v2))
+assert(ElementMatcher(cls=V, value=[1, 3]).match(v1))
+assert(not ElementMatcher(cls=V, value=[1, 3]).match(v2))
+assert(ElementMatcher(cls=Q, number=1).match(q))
+assert(ElementMatcher(marker=['p', 'q']).match(q))
+assert(ElementMatcher(instance=v1).match(v1))
+assert(ElementMatcher(instance=[v2, v1]).match(v1))
+assert(not ElementMatcher(instance=[v2]).match(v1))
+
+assert(ElementMatcher(cls=Text, text_eq='beginning').match(text))
+assert(ElementMatcher(cls=Text, text_contains=['x', 'gin']).match(text))
+assert(ElementMatcher(text_re_search=r'gin+').match(text))
+assert(not ElementMatcher(text_re_match=r'gin').match(text))
+assert(ElementMatcher(cls=V, text_eq='nothing', logic_func=any).match(v1))
+assert(not ElementMatcher(cls=V, text_eq='nothing').match(v1))
+
+# Compiled matchers are recompiled after changes
+matcher = ElementMatcher(cls=V)
+assert(matcher.match(v1))
+matcher.cls = C
+assert(not matcher.match(v1))
+assert(matcher.match(c1))
+
+# Combined matchers are flattened
+combined = ElementMatcher(cls=Text) | ElementMatcher(cls=Whitespace) | ElementMatcher(cls=W)
+assert(len(combined.matchers) == 3)
+assert(combined.match(text) and combined.match(w) and not combined.match(p))
+assert(len((combined & ElementMatcher(cls=Text) & ElementMatcher(text_eq='beginning')).matchers) == 3)
+assert((combined & ElementMatcher(text_eq='beginning')).match(text))
+assert(not (combined & ElementMatcher(text_eq='beginning')).match(w))
+mixed = ElementMatcher(cls=V, value=2) | ElementMatcher(cls=P) | ElementMatcher(cls=Q, use_issubclass=False)
+assert(mixed.match(v2) and mixed.match(p) and mixed.match(q) and not mixed.match(v1))
+custom = ElementMatcherCombined((ElementMatcher(cls=V), ElementMatcher(cls=C)), lambda x: x.count(True) == 1)
+assert(custom.match(v1) and not custom.match(p))
+
+# Compiled matchers can still be pickled
+assert(pickle.loads(pickle.dumps(combined)).match(text))
@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+# Test nested character markers - parsed on a stack, so nesting isn't limited by recursion
+
+import sys
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Exceptions import ParserError
+from usfmparser.Elements.Element import ParsingFailedElement
+from usfmparser.Elements.Text import Text
+from usfmparser.Elements.Whitespace import Whitespace
+from usfmparser.Elements.CharacterMarkerElements import W, ADD, ND
+from usfmparser.Elements.MilestoneMarkerElements import V
+
+
+def nested(depth):
+    opening = ''.join('\\+w ' if x else '\\w ' for x in range(depth))
+    closing = ''.join('\\+w*' if x else '\\w*' for x in reversed(range(depth)))
+    return opening + 'word|strong="H1"' + closing
+
+
+# Deeper than the interpreter's recursion limit
+depth = sys.getrecursionlimit() + 100
+parser = Parser('\\id GEN\n\\c 1\n\\p\n\\v 1 ' + nested(depth) + ' end\n\\v 2 next\n')
+parser.parse()
+p = parser.results[-1]
+elem = [x for x in p.children if isinstance(x, W)][0]
+for level in range(depth):
+    assert(isinstance(elem, W))
+    assert(elem._depth == level + 2)
+    assert(elem.end_marker_raw == ('\\+w*' if level else '\\w*'))
+    if level:
+        assert(elem.parents[0].children[-1] is elem)
+    if level < depth - 1:
+        elem = elem.children[0]
+assert(elem.attributes == {'strong': 'H1'} and elem.children[0].get_text() == 'word')
+
+# max_depth still limits nesting, when given
+try:
+    Parser('\\id GEN\n\\c 1\n\\p\n\\v 1 ' + nested(6), max_depth=3).parse()
+    assert(False)
+except ParserError as e:
+    assert('Maximum depth (3)' in str(e))
+parser = Parser('\\id GEN\n\\c 1\n\\p\n\\v 1 ' + nested(4), max_depth=3)
+parser.parse()
+
+# Spans left open: by the paragraph's end, and the end of the text
+events = []
+parser = Parser('\\id GEN\n\\c 1\n\\p\n\\v 1 \\add a \\+nd b\\+nd* \\+w c d',
+                trace=lambda event, elem, depth: events.append((event, elem.marker, depth)))
+parser.parse()
+add = parser.results[-1].children[-1]
+assert(isinstance(add, ADD) and add.end == parser.results[-1].end)
+assert([type(x) for x in add.children] == [Text, ND, Whitespace, W])
+assert(add.children[3].end == add.end and add.children[3].parents[0] is add)
+assert([x for x in events if x[0] in (Parser.TRACE_SPAN_START, Parser.TRACE_SPAN_END)] == [
+    (Parser.TRACE_SPAN_START, 'add', 0),
+    (Parser.TRACE_SPAN_START, 'nd', 1),
+    (Parser.TRACE_SPAN_END, 'nd', 1),
+    (Parser.TRACE_SPAN_START, 'w', 1),
+    (Parser.TRACE_SPAN_END, 'w', 1),
+    (Parser.TRACE_SPAN_END, 'add', 0),
+])
+
+# Close markers must match
+try:
+    Parser('\\id GEN\n\\c 1\n\\p\n\\v 1 \\add a \\+nd b\\+w*\\add*\n').parse()
+    assert(False)
+except ParserError as e:
+    assert("doesn't match" in str(e))
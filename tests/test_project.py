@@ -0,0 +1,93 @@
+# -*- coding: UTF-8 -*-
+# Test references across the books of a project (usfmparser.Project)
+
+import sys
+import os
+import tempfile
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Project import Project, parse_book_reference, read_book_code
+from usfmparser.Exceptions import InvalidReferenceError
+from usfmparser.Cache import ParseCache
+
+
+GEN = '\\id GEN Genesis\n\\c 1\n\\p\n\\v 1 In the beginning\n\\v 2 The earth\n\\v 3 Light\n\\c 2\n\\p\n\\v 1 Finished\n'
+JHN = '﻿\\id JHN John\r\n\\c 3\r\n\\p\r\n\\v 16 For God so loved\r\n\\v 17-18 Not to condemn\r\n'
+PSA = '\\id PSA Psalms\n' + ''.join(
+    '\\c {}\n\\q1\n'.format(c) + ''.join('\\v {} verse {}\n'.format(v, v) for v in range(1, 4))
+    for c in range(1, 6)
+)
+
+assert(parse_book_reference('GEN 1:1-3') == ('GEN', '1:1-3'))
+assert(parse_book_reference(' jhn 3:16 ') == ('JHN', '3:16'))
+assert(parse_book_reference('1JN') == ('1JN', None))
+for bad in ('', '3:16', 'GEN 1:x', 'GEN 2:1-1:1'):
+    try:
+        parse_book_reference(bad)
+        assert(False)
+    except InvalidReferenceError:
+        pass
+
+with tempfile.TemporaryDirectory() as d:
+    for name, text in (('01GEN.usfm', GEN), ('43JHN.usfm', JHN), ('19PSA.SFM', PSA),
+                       ('00GEN.usfm', '\\id GEN duplicate\n'), ('99NONE.usfm', '\\c 1\n')):
+        with open(os.path.join(d, name), 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+    assert(read_book_code(os.path.join(d, '43JHN.usfm')) == 'JHN')
+    assert(read_book_code(os.path.join(d, '99NONE.usfm')) == None)
+
+    project = Project(d, max_books=2)
+    # The first file with a code is used - books without \id aren't in the project
+    assert(project.get_codes() == ['GEN', 'PSA', 'JHN'] and len(project) == 3)
+    assert(project.paths['GEN'].endswith('00GEN.usfm'))
+    project = Project([os.path.join(d, x) for x in ('01GEN.usfm', '43JHN.usfm', '19PSA.SFM')], max_books=2)
+    assert('GEN' in project and project.get_loaded_codes() == [])
+
+    passage = project['GEN 1:1-2']
+    assert([x.value for x in passage.verses] == [1, 2])
+    assert(project.get_text('GEN 1:3') == 'Light')
+    assert(project.get_usfm('GEN 1:2-2:1') == GEN[GEN.index('\\v 2'):])
+    assert(project.get_text('jhn 3:18') == 'Not to condemn')
+    # \r\n is read as \n, as Corpus.parse_file() does
+    assert(project.get_usfm('JHN 3:16') == '\\v 16 For God so loved\n')
+    assert(project['GEN'].get_chapter(2).get_verse(1).get_text() == 'Finished')
+    assert(project.get_loaded_codes() == ['JHN', 'GEN'])
+
+    # Least recently used books are evicted, but stay in the index of the project
+    assert(len(project['PSA 5'].verses) == 3)
+    assert(project.get_loaded_codes() == ['GEN', 'PSA'])
+    assert(project.get_usfm('JHN 3:17') == '\\v 17-18 Not to condemn\n')
+    assert(project.get_loaded_codes() == ['GEN', 'PSA'])
+    # An evicted book's file is read once - a loaded book's source is used
+    assert(list(project._sources) == ['JHN'])
+    assert(project.get_usfm('JHN 3:16') == '\\v 16 For God so loved\n' and list(project._sources) == ['JHN'])
+    assert(project.get_range('PSA 2:2-3:1') == ('PSA', PSA.index('\\v 2 verse 2\n\\v 3 verse 3\n\\c 3'), PSA.index('\\v 2', PSA.index('\\c 3'))))
+    assert(project.get_usfm('PSA 4') == PSA[PSA.index('\\c 4'):PSA.index('\\c 5')])
+
+    # Not found
+    assert(project.get_passage('EXO 1:1') == None and project.get_usfm('EXO 1:1') == None)
+    assert(project.get_passage('GEN 9:1') == None and project.get_range('GEN 9:1') == None)
+    for missing in ('EXO', 'GEN 9:1'):
+        try:
+            project[missing]
+            assert(False)
+        except KeyError:
+            pass
+    try:
+        project.get_passage('GEN')
+        assert(False)
+    except InvalidReferenceError:
+        pass
+
+    # Books loaded through a cache
+    project = Project(d, cache=ParseCache(os.path.join(d, 'cache')))
+    assert(project.get_text('PSA 3:2') == 'verse 2')
+    assert(project.get_usfm('PSA 3:2') == '\\v 2 verse 2\n')
+
+    # Indexes of every book
+    project = Project(d, max_books=1)
+    text_index = project.build_text_index()
+    assert(text_index.books == ['GEN', 'PSA', 'JHN'])
+    assert([tuple(x.verse) for x in text_index.find_phrase('so loved')] == [('JHN', 3, 16, None)])
+    assert(len(project.build_attribute_index().books) == 3)
@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+# Test Parser(recover=True) - parse errors recorded as diagnostics, and parsing carried on
+
+import sys
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser, Diagnostic
+from usfmparser.Exceptions import (
+    ParserError, USFMSyntaxError, NonExistentMarkerError, InvalidMarkerError
+)
+from usfmparser.Elements.Element import ParsingFailedElement
+from usfmparser.Elements.ParagraphMarkerElements import ID, P, Q
+from usfmparser.Elements.MilestoneMarkerElements import C
+
+
+text = '''\\id GEN Draft
+\\toc Genesis
+\\c 1
+\\p
+\\v 1 In the \\nonsense beginning
+\\v 2 the earth was formless
+\\p
+\\v 3 And God said \\add let there be light\\nd*
+\\q1 \\v 4 light
+\\v 5 ok
+\\c x
+\\p
+\\v 1 after a bad chapter
+\\c 3
+\\v 1 stray verse
+\\p
+\\v 2 fine
+'''
+
+# Without recover, the first error is raised
+try:
+    Parser(text).parse()
+    assert(False)
+except InvalidMarkerError:
+    pass
+
+parser = Parser(text, recover=True)
+parser.parse()
+results = parser.results
+diagnostics = parser.diagnostics
+assert(diagnostics is results.diagnostics)
+assert([(x.line, x.column, type(x.exception)) for x in diagnostics] == [
+    (2, 1, InvalidMarkerError),             # \toc without a number
+    (5, 13, NonExistentMarkerError),        # \nonsense
+    (8, 42, ParserError),                   # \nd* closing \add
+    (11, 4, ValueError),                    # \c x
+    (15, 1, USFMSyntaxError),               # \v outside a paragraph
+])
+assert(all(isinstance(x, Diagnostic) for x in diagnostics))
+assert(text[diagnostics[1].offset:].startswith('\\nonsense'))
+
+# A failed element for each, after the paragraph it was in
+failed = [x for x in results if isinstance(x, ParsingFailedElement)]
+assert([x.e for x in failed] == [x.exception for x in diagnostics])
+assert([x.offset for x in failed] == [x.offset for x in diagnostics])
+kinds = [type(x) for x in results if not type(x).__name__ == 'Whitespace']
+assert(kinds == [ID, ParsingFailedElement, C, P, ParsingFailedElement, P, ParsingFailedElement,
+                 Q, ParsingFailedElement, P, C, ParsingFailedElement, P])
+
+# Paragraphs keep what was parsed before the error, and end at the next paragraph
+first_p = [x for x in results if isinstance(x, P)][0]
+assert(first_p.end == text.index('\\p\n\\v 3'))
+assert(results.get_verse(1, 1).get_text() == 'In the')
+assert(results.get_verse(1, 2) == None)     # skipped, after the error
+assert(results.get_verse(1, 3).get_text() == 'And God said')
+assert(results.get_verse(1, 5).get_text() == 'ok')
+# Verses after a bad \c aren't in the chapter before it
+assert([x.value for x in results.get_chapter(1).get_verses()] == [1, 3, 4, 5])
+assert(results.get_verse(3, 2).get_text() == 'fine')
+
+# Streaming reports the same problems
+parser = Parser(recover=True)
+elems = []
+for line in text.splitlines(keepends=True):
+    parser.add(line)
+    elems.extend(parser.yield_results())
+elems.extend(parser.yield_results(final=True))
+assert([(x.offset, type(x.exception)) for x in parser.diagnostics]
+       == [(x.offset, type(x.exception)) for x in diagnostics])
+assert([type(x) for x in elems if not type(x).__name__ == 'Whitespace'] == kinds)
+
+# Text without problems has no diagnostics
+parser = Parser('\\id GEN\n\\c 1\n\\p\n\\v 1 fine\n', recover=True)
+parser.parse()
+assert(parser.diagnostics == [] and not any(isinstance(x, ParsingFailedElement) for x in parser.results))
+
+# An error in the last paragraph of the book
+text = '\\id GEN\n\\c 1\n\\p\n\\v 1 fine \\nonsense end\n'
+parser = Parser(text, recover=True)
+parser.parse()
+results = parser.results
+assert(isinstance(results[-1], ParsingFailedElement))
+assert([type(x.exception) for x in parser.diagnostics] == [NonExistentMarkerError])
+assert(results.get_references().end == len(text))
+assert(results['1:1'].get_usfm() == '\\v 1 fine \\nonsense end\n')
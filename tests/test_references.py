@@ -0,0 +1,142 @@
+# -*- coding: UTF-8 -*-
+# Test the index of chapters and verses (References), and passages by reference
+
+import sys
+import pickle
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser, ParserResults
+from usfmparser.References import ReferenceIndex, parse_reference
+from usfmparser.Exceptions import InvalidReferenceError
+from usfmparser.Elements.MilestoneMarkerElements import C, V
+from usfmparser.Elements.Element import ParsingFailedElement
+from usfmparser import Corpus
+
+
+assert(parse_reference('3') == (3, None, 3, None))
+assert(parse_reference('3:16') == (3, 16, 3, 16))
+assert(parse_reference('3:16-18') == (3, 16, 3, 18))
+assert(parse_reference(' 3:16 - 4:2 ') == (3, 16, 4, 2))
+assert(parse_reference('3-4') == (3, None, 4, None))
+assert(parse_reference('3-4:2') == (3, None, 4, 2))
+for bad in ('', 'GEN 3:16', '3:', '3:16-', '4:2-3:16', '3:16-15'):
+    try:
+        parse_reference(bad)
+        assert(False)
+    except InvalidReferenceError:
+        pass
+
+
+text = '''\\id GEN Test
+\\c 1
+\\p
+\\v 1 In the beginning.
+\\v 2 And the earth.
+\\s1 Heading
+\\p
+\\v 3-4 Bridged verse.
+\\v 5 Five.
+\\c 2
+\\p
+\\v 1 Chapter two.
+\\v 2 Two two.
+'''
+
+n = Parser(text)
+n.parse()
+results = n.results
+index = results.references
+assert(isinstance(index, ReferenceIndex) and results.get_references() is index)
+assert(results.source == text)
+
+# Exact verses, as C.get_verse() - a range is found by its numbers with find_verse()
+c1 = results.get_chapter(1)
+assert(index.get_verse(1, 2) is c1.get_verse(2))
+assert(index.get_verse(1, 4) == None and c1.get_verse(4) == None)
+bridged = index.find_verse(1, 4)
+assert(isinstance(bridged, V) and bridged is index.find_verse(1, 3))
+assert(index.find_verse(2, 1).parents[0] is results.get_chapter(2))
+assert(index.find_verse(3, 1) == None)
+# A verse runs to the next \c, \v or \d
+start, end = index.get_range(1, 2)
+assert(text[start:end] == '\\v 2 And the earth.\n\\s1 Heading\n\\p\n')
+start, end = index.get_range(2, 2)
+assert(end == len(text))
+
+# Passages
+passage = results['1:2']
+assert(passage.get_usfm() == '\\v 2 And the earth.\n\\s1 Heading\n\\p\n')
+assert(passage.verses == [c1.get_verse(2)])
+assert(passage.get_text() == c1.get_verse(2).get_text())
+passage = results['1:4-2:1']
+assert(passage.get_usfm() == text[text.index('\\v 3-4'):text.index('\\v 2 Two')])
+assert([x.value for x in passage.verses] == [bridged.value, 5, 1])
+elements = passage.get_elements()
+assert(elements[0] is bridged and elements[-1].get_text() == ' Chapter two.\n')
+# A whole chapter's elements start at its \c, with what's before the first verse
+elements = results['2'].get_elements()
+assert(elements[0] is results.get_chapter(2) and elements[2].marker == 'p')
+assert(elements[-1].get_text() == ' Two two.\n')
+assert(results['2'].get_usfm() == text[text.index('\\c 2'):])
+assert(results['1'].get_usfm() == text[text.index('\\c 1'):text.index('\\c 2')])
+assert(len(results['1-2'].verses) == 6)
+# A last verse past the end of the chapter runs to the end of the chapter
+assert(results['1:5-9'].get_usfm() == '\\v 5 Five.\n')
+assert(results.get_passage('3:1') == None)
+try:
+    results['3:1']
+    assert(False)
+except KeyError:
+    pass
+# Integer indices are still elements
+assert(isinstance(results[1], C))
+
+# Text added in chunks is kept as one source
+n = Parser()
+for idx in range(0, len(text), 10):
+    n.add(text[idx:idx + 10])
+n.parse()
+assert(n.results.source == text)
+assert(n.results['1:2'].get_usfm() == results['1:2'].get_usfm())
+
+# Results without an index (e.g. read by Serialization) build one when first asked for
+copy = ParserResults(results)
+copy.chapters = results.chapters
+copy.source = text
+assert(copy.references == None)
+assert(copy['1:4-2:1'].get_usfm() == results['1:4-2:1'].get_usfm())
+assert(copy.get_references().get_range(1, 2) == index.get_range(1, 2))
+
+# The index is pickled with the results
+unpickled = pickle.loads(pickle.dumps(results))
+assert(unpickled['1:3'].verses[0] in unpickled.get_chapter(1).children)
+assert(unpickled.get_chapter(1).get_verse(5) is unpickled.references.get_verse(1, 5))
+
+# Streamed results keep neither
+n = Parser(text)
+list(n.yield_results(final=True))
+assert(n.results.source == None and n.results.references == None)
+
+# Sharded parses index the whole book
+book = ''.join('\\c {}\n\\p\n\\v 1 verse one\n\\v 2 verse two\n'.format(x) for x in range(1, 9))
+sharded = Corpus.parse_sharded(book, max_workers=2)
+assert(sharded.references.get_verse(6, 2) is sharded.get_verse(6, 2))
+assert(sharded['3:2-4:1'].get_usfm() == '\\v 2 verse two\n\\c 4\n\\p\n\\v 1 verse one\n')
+
+# Built from the elements, with a ParsingFailedElement last (see Parser, recover)
+text = '\\id GEN\n\\c 1\n\\p\n\\v 1 fine \\nonsense end\n'
+parser = Parser(text, recover=True)
+parser.parse()
+results = parser.results
+results.references = None
+assert(results.get_references().end == len(text))
+assert(results['1:1'].get_usfm() == '\\v 1 fine \\nonsense end\n')
+
+# Elements of a passage skip a ParsingFailedElement, which has no offsets
+text = '\\id GEN\n\\c 1\n\\p\n\\v 1 fine \\nonsense end\n\\p\n\\v 2 two\n'
+parser = Parser(text, recover=True)
+parser.parse()
+elements = parser.results['1:1-2'].get_elements()
+assert(elements[0] is parser.results.get_verse(1, 1) and elements[-1].get_text() == ' two\n')
+assert(len(elements) == 5 and not any(isinstance(x, ParsingFailedElement) for x in elements))
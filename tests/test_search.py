@@ -0,0 +1,117 @@
+# -*- coding: UTF-8 -*-
+# Test the full-text index of verse text (usfmparser.Search)
+
+import io
+import os
+import sys
+import tempfile
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Serialization import SerializationError
+from usfmparser.Search import (
+    TextIndex, VerseRef, Hit, normalize_word, iter_words, decode_postings
+)
+
+
+assert(normalize_word('Jesus’') == 'jesus')
+assert(normalize_word('LORD') == 'lord' and normalize_word('-') == '')
+assert(list(iter_words('In the beginning, God [created] the-heavens’ and…earth.')) == [
+    'in', 'the', 'beginning', 'god', 'created', 'the-heavens', 'and', 'earth'
+])
+
+gen = '''\\id GEN Test
+\\c 1
+\\p
+\\v 1 In the beginning God created the heavens and the earth.
+\\v 2 And the earth was without form\\f + \\fr 1:2 \\ft not in verse text\\f*, and void.
+\\v 3 And God said, Let there be light: and there was light.
+\\c 2
+\\p
+\\v 1-2 Thus the heavens and the earth were finished.
+'''
+jhn = '''\\id JHN Test
+\\c 1
+\\p
+\\v 1 In the beginning was the Word, and the Word was with God.
+'''
+
+index = TextIndex()
+for text in (gen, jhn):
+    n = Parser(text)
+    n.parse()
+    index.add_results(n.results)
+assert(index.books == ['GEN', 'JHN'] and len(index.verses) == 5)
+assert(index.verses[3] == VerseRef('GEN', 2, 1, 2))
+
+assert(index.find('LIGHT') == [Hit(VerseRef('GEN', 1, 3, None), (6, 10))])
+assert([x.verse.book for x in index.find('beginning')] == ['GEN', 'JHN'])
+assert(index.find('footnote') == [] and index.find('not') == [])
+assert(index.count('earth') == 3)
+# Split into words as verse text is
+assert(index.find('Word,') == index.find('word') != [] and index.count('word.') == 1)
+assert(index.find('') == [] and index.count('…') == 0)
+rom = '\\id ROM Test\n\\c 8\n\\p\n\\v 16 that we are God\'s children\n'
+other = TextIndex()
+n = Parser(rom)
+n.parse()
+other.add_results(n.results)
+assert(other.find("God's") == other.find_phrase("God's") == [Hit(VerseRef('ROM', 8, 16, None), (3,))])
+assert(other.count("GOD'S") == 1 and other.count("God's children") == 1 and other.count("God's word") == 0)
+
+# All words, any word
+assert([tuple(x.verse)[:3] for x in index.find_all(['god', 'beginning'])] == [('GEN', 1, 1), ('JHN', 1, 1)])
+assert(index.find_all(['god', 'beginning'])[1].positions == (11,))
+assert(index.find_all(['god', 'nothing']) == [] and index.find_all([]) == [])
+assert([x.verse.verse for x in index.find_any(['light', 'void'])] == [2, 3])
+
+# Phrases
+assert(index.find_phrase('the heavens and the earth') == [
+    Hit(VerseRef('GEN', 1, 1, None), (5,)), Hit(VerseRef('GEN', 2, 1, 2), (1,))
+])
+assert(index.find_phrase('Let there be light')[0].positions == (3,))
+assert(index.find_phrase('there light') == [])
+assert(index.find_phrase('the Word') == [Hit(VerseRef('JHN', 1, 1, None), (4, 7))])
+
+# Near - before or after
+assert([x.verse.book for x in index.find_near(['god', 'beginning'], 1)] == ['GEN'])
+assert([x.verse.book for x in index.find_near(['god', 'beginning'], 9)] == ['GEN', 'JHN'])
+assert(index.find_near(['created', 'god'], 1)[0].positions == (4,))
+
+# Postings are varints of verse id and position deltas
+assert(decode_postings(index._postings['light']) == [(2, [6, 10])])
+
+# Written, and read back - postings are decoded when a word is used
+data = index.dumps()
+copy = TextIndex.loads(data)
+assert(copy.books == index.books and copy.verses == index.verses)
+assert(copy.get_words() == index.get_words())
+for word in index.get_words():
+    assert(copy.get_postings(word) == index.get_postings(word))
+assert(copy.find_phrase('the Word') == index.find_phrase('the Word'))
+assert(TextIndex.load(io.BytesIO(data)).dumps() == data)
+
+# Books added to an index read from a file
+n = Parser('\\id REV Test\n\\c 22\n\\p\n\\v 21 The grace of our Lord Jesus be with you all. Amen.\n')
+n.parse()
+assert(copy.add_results(n.results) == 2)
+assert([x.verse.book for x in copy.find('with')] == ['JHN', 'REV'])
+assert(TextIndex.loads(copy.dumps()).find_phrase('the grace') == copy.find_phrase('the grace'))
+
+with tempfile.TemporaryDirectory() as d:
+    path = os.path.join(d, 'bible.usft')
+    with open(path, 'wb') as f:
+        index.dump(f)
+    with TextIndex.open(path) as mapped:
+        assert(mapped.find_phrase('the heavens and the earth') == index.find_phrase('the heavens and the earth'))
+        mapped.add_results(n.results)
+    # Postings added to are kept once the file is closed
+    assert(mapped.find('amen') != [] and mapped.find('light') == [])
+    with open(path, 'wb') as f:
+        f.write(b'USFB' + data[4:])
+    try:
+        TextIndex.open(path)
+        assert(False)
+    except SerializationError:
+        pass
@@ -0,0 +1,119 @@
+# -*- coding: UTF-8 -*-
+# Test the binary serialization format for ParserResults
+
+import sys
+import io
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser, ParserResults
+from usfmparser.Exceptions import USFMSyntaxError
+from usfmparser.Elements.Element import ParsingFailedElement
+from usfmparser.Elements.MilestoneMarkerElements import C, V
+from usfmparser.Serialization import (
+    dumps, loads, dump, load, Reader, SerializationError,
+    write_varint, read_varint, zigzag, unzigzag, MAGIC
+)
+
+
+# Varints
+for value in (0, 1, 127, 128, 300, 2 ** 31, 2 ** 40):
+    out = bytearray(b'x')
+    write_varint(out, value)
+    assert(read_varint(out, 1) == (value, len(out)))
+for value in (0, 1, -1, 5, -300):
+    assert(unzigzag(zigzag(value)) == value and zigzag(value) >= 0)
+
+
+text = '''\\id PSA Test
+\\h Psalms
+\\toc1 The Psalms
+\\c 1
+\\p
+\\v 1 In the \\w beginning|strong="H7225" lemma="x"\\w* God\\f + \\fr 1:1 \\ft a note\\f*
+\\v 2-3 created \\add the \\+nd LORD\\+nd*\\add* ἐν ἀρχῇ
+\\d ALEPH
+\\p
+\\v 4 three
+\\c 2
+\\d A psalm
+\\p
+\\v 1 Blessed is the man
+\\q2 who walks not
+'''
+
+parser = Parser(text)
+parser.parse()
+results = parser.results
+expected = repr(results)
+
+data = dumps(results)
+assert(data.startswith(MAGIC))
+copy = loads(data)
+assert(repr(copy) == expected)
+assert(sorted(copy.chapters) == [1, 2])
+verse = copy.get_verse(1, 1)
+assert(verse._root is copy)
+assert(verse.parents[0] is copy.get_chapter(1) and verse.parents[1].marker == 'p')
+assert(copy.get_chapter(1).get_verses()[1].value.last_verse == 3)
+word = verse.parents[1].children[2]
+assert(word.attributes == results.get_verse(1, 1).parents[1].children[2].attributes)
+assert(list(word.attributes) == ['strong', 'lemma'])
+assert(word.children[0].parents[0] is word)
+assert([(x.text, [y.start for y in x.words]) for x in copy.iter_verses()] ==
+       [(x.text, [y.start for y in x.words]) for x in results.iter_verses()])
+
+# An element at two places in the tree is still one element
+shared = [x for x in copy.get_flattened_forward() if getattr(x, 'text', '').startswith('ALEPH')]
+assert(len(shared) == 2 and shared[0] is shared[1])
+
+# Files
+f = io.BytesIO()
+dump(results, f)
+f.seek(0)
+assert(repr(load(f)) == expected)
+
+# Chapters on their own
+reader = Reader(data)
+assert(reader.get_chapters() == [1, 2])
+chapter = reader.read_chapter(2)
+assert(list(chapter.chapters) == [2])
+assert(chapter[0] is chapter.get_chapter(2))
+assert(chapter.get_verse(2, 1).get_text() == results.get_verse(2, 1).get_text())
+try:
+    reader.read_chapter(3)
+    assert(False)
+except KeyError:
+    pass
+
+# Elements for failed parsing
+failed = ParserResults([ParsingFailedElement(5, USFMSyntaxError('bad marker'))])
+copy = loads(dumps(failed))
+assert(copy[0].offset == 5 and isinstance(copy[0].e, USFMSyntaxError) and str(copy[0].e) == 'bad marker')
+
+# Diagnostics of a recover-mode parse, sharing exceptions with failed elements as parsed
+parser = Parser('\\id GEN\n\\c 1\n\\p\n\\v 1 a \\nonsense b\n\\c x\n', recover=True)
+parser.parse()
+copy = loads(dumps(parser.results))
+assert([x[:3] for x in copy.diagnostics] == [x[:3] for x in parser.diagnostics])
+assert([str(x.exception) for x in copy.diagnostics] == [str(x.exception) for x in parser.diagnostics])
+assert([x.e for x in copy if isinstance(x, ParsingFailedElement)] == [x.exception for x in copy.diagnostics])
+assert(loads(dumps(Parser('\\id GEN\n').results)).diagnostics == [])
+
+# Verses after a \c that failed to parse aren't in the chapter before it, as parsed
+parser = Parser('\\id GEN\n\\c 1\n\\p\n\\v 1 one\n\\c x\n\\p\n\\v 1 lost\n\\v 2 two\n', recover=True)
+parser.parse()
+copy = loads(dumps(parser.results))
+assert(repr(copy[-1]) == repr(parser.results[-1]))
+verses = [x for x in copy.get_flattened_forward() if isinstance(x, V)]
+assert([isinstance(x.parents[0], C) for x in verses] == [True, False, False])
+assert(copy.get_chapter(1).children == [verses[0]] and copy.get_verse(1, 1) is verses[0])
+assert(copy.get_verse(1, 2) == None and copy.get_references().find_verse(1, 2) == None)
+
+# Not the format
+for bad in (b'', b'USFB', b'XXXX' + data[4:], data[:len(data) // 2]):
+    try:
+        loads(bad)
+        assert(False)
+    except SerializationError:
+        pass
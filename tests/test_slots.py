@@ -0,0 +1,56 @@
+# -*- coding: UTF-8 -*-
+# Test that elements have __slots__ (no per-instance __dict__), and still pickle
+
+import sys
+import pickle
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+
+from usfmparser.Elements.Element import ParsingFailedElement
+from usfmparser.Elements.Text import Text
+from usfmparser.Elements.Whitespace import Whitespace
+from usfmparser.Elements.NumberedElement import NumberedElement
+from usfmparser.Elements.ParagraphMarkerElements import PARAGRAPH_MARKER_ELEMENTS
+from usfmparser.Elements.CharacterMarkerElements import CHARACTER_MARKER_ELEMENTS
+from usfmparser.Elements.NoteMarkerElements import NOTE_MARKER_ELEMENTS
+from usfmparser.Elements.MilestoneMarkerElements import (
+    MILESTONE_MARKER_ELEMENTS, PairedMilestoneMarkerElement
+)
+
+
+classes = [Text, Whitespace, ParsingFailedElement, PairedMilestoneMarkerElement]
+for elements in (PARAGRAPH_MARKER_ELEMENTS, CHARACTER_MARKER_ELEMENTS, NOTE_MARKER_ELEMENTS,
+                 MILESTONE_MARKER_ELEMENTS):
+    classes.extend(elements.values())
+for cls in classes:
+    assert(not hasattr(cls.__new__(cls), '__dict__'))
+    # A mixin's SLOTS are declared only by the classes using it
+    if 'number' in cls.__dict__.get('__slots__', ()):
+        assert(issubclass(cls, NumberedElement))
+
+parser = Parser('\\id GEN Test\n\\c 1\n\\p\n\\v 1 In \\w beginning|strong="H7225"\\w*\\f + \\ft note\\f*\n\\d title\n')
+parser.parse()
+results = parser.results
+for elem in results.get_flattened_forward():
+    assert(not hasattr(elem, '__dict__'))
+assert(results.get_verse(1, 1)._root is results)
+
+# Numbered paragraphs have their number
+parser = Parser('\\id GEN Test\n\\c 1\n\\pi2\n\\v 1 In\n\\pi\n\\v 2 the\n')
+parser.parse()
+assert([x.number for x in parser.results if getattr(x, 'marker', None) == 'pi'] == [2, 1])
+
+# Attributes not declared can't be set
+try:
+    results.get_verse(1, 1).something = 1
+    assert(False)
+except AttributeError:
+    pass
+
+del results.parser
+copy = pickle.loads(pickle.dumps(results))
+assert(repr(copy) == repr(results))
+assert(copy.get_verse(1, 1).get_text() == results.get_verse(1, 1).get_text())
+assert(copy.get_verse(1, 1)._root is copy)
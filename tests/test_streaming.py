@@ -0,0 +1,104 @@
+# -*- coding: UTF-8 -*-
+# Test Parser.yield_results() - parsing incrementally, yielding completed elements
+
+import sys
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+
+from usfmparser.Elements.Whitespace import Whitespace
+from usfmparser.Elements.ParagraphMarkerElements import ID, P, Q
+from usfmparser.Elements.MilestoneMarkerElements import C, V
+
+
+text = '''\\id GEN Test
+\\c 1
+\\p
+\\v 1 In the beginning \\w God|strong="H0430"\\w* created
+\\v 2 the heavens
+\\q1 and the earth.
+\\c 2
+\\p
+\\v 1 Thus the heavens
+'''
+
+# Nothing complete until a following paragraph marker (or \c) is seen
+n = Parser()
+n.add('\\id GEN Test\n')
+assert(list(n.yield_results()) == [])
+n.add('\\c 1\n')
+elems = list(n.yield_results())
+assert(len(elems) == 1)
+assert(isinstance(elems[0], ID))
+assert(elems[0].end == 13)
+assert(not n.results)
+
+n.add('\\p\n\\v 1 In the beginning\n')
+elems = list(n.yield_results())
+# \p closes \c 1
+assert(isinstance(elems[0], C))
+assert(isinstance(elems[-1], Whitespace))
+n.add('\\q1 ')
+elems = list(n.yield_results())
+assert(len(elems) == 1)
+assert(isinstance(elems[-1], P))
+assert(isinstance(elems[-1].children[0], V))
+assert(elems[-1].children[0].value == 1)
+assert(elems[-1].end == 43)
+
+elems = list(n.yield_results(final=True))
+assert(len(elems) == 1)
+assert(isinstance(elems[0], Q))
+assert(not n.tokenizer.tokens)
+
+
+# Streaming line-at-a-time gives the same elements as parsing everything at once
+whole = Parser(text)
+whole.parse()
+
+n = Parser()
+streamed = []
+for line in text.splitlines(True):
+    n.add(line)
+    streamed.extend(n.yield_results())
+    # parsed tokens are discarded as we go
+    assert(len(n.tokenizer.tokens) < 40)
+streamed.extend(n.yield_results(final=True))
+
+assert(len(streamed) == len(whole.results))
+assert([repr(x) for x in streamed] == [repr(x) for x in whole.results])
+
+# As does text split anywhere - within a word, a marker or attributes - or added a
+# character at a time
+expected = [repr(x) for x in whole.results]
+for chunks in [(text[:x], text[x:]) for x in range(len(text) + 1)] + [text]:
+    split = Parser()
+    elems = []
+    for chunk in chunks:
+        split.add(chunk)
+        elems.extend(split.yield_results())
+    elems.extend(split.yield_results(final=True))
+    assert([repr(x) for x in elems] == expected)
+
+# Yielded chapters aren't kept by the parser
+assert(not n.results.chapters)
+chapters = [x for x in streamed if isinstance(x, C)]
+assert(len(chapters) == 2)
+assert(len(chapters[0].get_verses()) == 2)
+
+# The text of verses, from the paragraphs they're in, as they're yielded
+n = Parser()
+texts = []
+for line in text.splitlines(True):
+    n.add(line)
+    for elem in n.yield_results():
+        if isinstance(elem, P):
+            texts.extend(x.get_text() for x in elem.children if isinstance(x, V))
+for elem in n.yield_results(final=True):
+    if isinstance(elem, P):
+        texts.extend(x.get_text() for x in elem.children if isinstance(x, V))
+assert(texts == ['In the beginning God created', 'the heavens', 'Thus the heavens'])
+assert(texts[0] == whole.results.get_verse(1, 1).get_text())
+assert(whole.results.get_verse(1, 2).get_text() == 'the heavens\nand the earth.')
+assert(chapters[0].get_verses()[0].get_text() == texts[0])
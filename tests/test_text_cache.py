@@ -0,0 +1,85 @@
+# -*- coding: UTF-8 -*-
+# Test that get_text() of paragraph, span, verse and chapter elements is cached, and
+# dropped when children change through the ParentElement methods
+
+import sys
+import pickle
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+from usfmparser.Matchers import ElementMatcher
+from usfmparser.Elements.Text import Text
+from usfmparser.Elements.CharacterMarkerElements import W, ADD
+
+
+text = '\\id GEN Test\n\\c 1\n\\q1\n\\v 1 \\add the \\+w LORD|strong="H3068"\\+w* said\\add* to him\n\\p\n\\v 2 more\n'
+n = Parser(text)
+n.parse()
+results = n.results
+q1 = results[3]
+add = [x for x in q1.children if isinstance(x, ADD)][0]
+w = [x for x in add.children if isinstance(x, W)][0]
+
+before = q1.get_text()
+assert(q1._text is before and q1.get_text() is before)
+assert(add._text == add.get_text() and w._text == ' LORD')
+flattened = results.get_flattened_forward()
+
+# Changing children drops what's cached by the element, its ancestors and the results
+w.add_child(Text(0, 0, (), 'S'))
+assert(not hasattr(w, '_text') and not hasattr(add, '_text') and not hasattr(q1, '_text'))
+assert(not hasattr(q1, '_flattened_forward') and '_flattened_forward' not in results.__dict__)
+assert(w.get_text() == ' LORDS' and 'LORDS' in q1.get_text())
+assert(len(results.get_flattened_forward()) == len(flattened) + 1)
+# Elsewhere isn't
+results[4].get_text()
+w.remove_child(w.children[-1])
+assert(q1.get_text() == before and hasattr(results[4], '_text'))
+
+marker = Text(0, 0, (), ' now')
+add.insert_child(0, marker)
+assert(add.get_text().startswith('  now') and add.children[0] is marker)
+add.replace_child(marker, Text(0, 0, (), ' then'))
+assert(' then' in q1.get_text())
+add.set_children(add.children[1:])
+assert(q1.get_text() == before)
+try:
+    add.remove_child(marker)
+    assert(False)
+except ValueError:
+    pass
+
+# Verse and chapter text is made again after any change
+c = results.get_chapter(1)
+v1 = c.get_verse(1)
+verse_before = v1.get_text()
+chapter_before = c.get_text()
+assert(v1.get_text() is verse_before and c.get_text() is chapter_before)
+w.add_child(Text(0, 0, (), 'S'))
+assert('LORDS' in v1.get_text() and 'LORDS' in c.get_text())
+w.remove_child(w.children[-1])
+assert(v1.get_text() == verse_before and c.get_text() == chapter_before)
+
+# Text matchers find the same elements, each text being made once
+matcher = ElementMatcher(text_contains='LORD')
+found = [x for x in results.get_flattened_forward() if matcher.match(x)]
+assert(all(any(x is y for x in found) for y in (q1, add, w)))
+assert([x for x in results.get_flattened_forward() if matcher.match(x)] == found)
+
+del results.parser
+copy = pickle.loads(pickle.dumps(results))
+assert(copy[3].get_text() == before)
+
+# Parsing more text appends to the results and chapter directly - what's cached goes too
+n = Parser('\\id GEN\n\\c 1\n\\p\n\\v 1 In the beginning\n')
+n.parse()
+c = n.results.get_chapter(1)
+v1 = c.get_verse(1)
+assert(v1.get_text() == 'In the beginning' and c.get_text() == 'In the beginning')
+flattened = n.results.get_flattened_forward()
+n.add('\\q1 God created\n\\v 2 the heavens\n')
+n.parse()
+assert(v1.get_text() == 'In the beginning\nGod created')
+assert('the heavens' in c.get_text() and c.get_verse(2) != None)
+assert(len(n.results.get_flattened_forward()) > len(flattened))
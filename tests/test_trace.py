@@ -0,0 +1,36 @@
+# -*- coding: UTF-8 -*-
+# Test Parser trace events, and that parsing is silent by default
+
+import io
+import sys
+import contextlib
+from os.path import dirname
+sys.path.append(dirname(dirname(sys.path[0])))
+
+from usfmparser.Parser import Parser
+
+
+text = '\\id GEN Test\n\\c 1\n\\p\n\\v 1 In \\add the \\+nd LORD\\+nd*\\add*\n\\v 2 end\n'
+
+out = io.StringIO()
+with contextlib.redirect_stdout(out):
+    parser = Parser(text)
+    parser.parse()
+assert(out.getvalue() == '')
+
+events = []
+parser = Parser(text, trace=lambda event, elem, depth: events.append((event, elem.marker, depth)))
+parser.parse()
+assert(events == [
+    (Parser.TRACE_PARAGRAPH_START, 'id', 0),
+    (Parser.TRACE_PARAGRAPH_END, 'id', 0),
+    (Parser.TRACE_MILESTONE, 'c', 0),
+    (Parser.TRACE_PARAGRAPH_START, 'p', 0),
+    (Parser.TRACE_MILESTONE, 'v', 0),
+    (Parser.TRACE_SPAN_START, 'add', 0),
+    (Parser.TRACE_SPAN_START, 'nd', 1),
+    (Parser.TRACE_SPAN_END, 'nd', 1),
+    (Parser.TRACE_SPAN_END, 'add', 0),
+    (Parser.TRACE_MILESTONE, 'v', 0),
+    (Parser.TRACE_PARAGRAPH_END, 'p', 0),
+])